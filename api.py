@@ -0,0 +1,401 @@
+﻿"""
+OmicsLingua analysis API — the Writing Assistant checks over HTTP
+
+A plain ASGI application (no web framework) for clients outside the
+Streamlit app, such as the LMS or an editor plugin. Every endpoint takes
+and returns JSON:
+
+    POST /v1/checks            {"text": "...", "checks": [...]}   -> {"results": {check: result}}
+    POST /v1/checks/batch      {"texts": [...], "checks": [...]}  -> {"results": [{check: result}, ...]}
+    POST /v1/<check>           {"text": "..."}                    -> {"result": ...}
+    POST /v1/<check>/batch     {"texts": [...]}                   -> {"results": [...]}
+    GET  /healthz              loaded models, uptime
+    GET  /metrics              Prometheus text format
+
+Checks (utils.nlp_engine): analysis (analyze_text), passive_voice
+(check_passive_voice), readability (get_readability_score), terms
+(extract_scientific_terms), grammar (check_grammar_basic). "checks"
+defaults to all of them.
+
+Run it on localhost (uvicorn is in requirements.txt):
+
+    pip install -r requirements.txt
+    python api.py                              # http://127.0.0.1:8502
+    python api.py --workers 4
+    curl -s localhost:8502/v1/passive_voice -d '{"text": "The samples were sequenced."}'
+
+Each worker process loads the API_WARM_PROFILES models during ASGI
+startup and shares them, and the Doc cache, between its requests.
+Analysis runs in a thread pool off the event loop; a text is parsed once
+for all requested checks, and the uncached texts of a batch go through
+nlp.pipe together. Concurrent requests for the same text and checks are
+coalesced into one computation.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import API_HOST, API_MAX_BATCH, API_PORT, API_THREADS, API_WARM_PROFILES, MAX_TEXT_LENGTH
+from utils.nlp_engine import (
+    PROFILE_ORDER, ModelNotAvailableError, check_grammar_basic, check_model_ready, check_passive_voice,
+    doc_cache_stats, extract_scientific_terms, get_docs, get_readability_score, analyze_text, model_stats
+)
+
+logger = logging.getLogger(__name__)
+
+CHECKS = {
+    'analysis': analyze_text,
+    'passive_voice': check_passive_voice,
+    'readability': get_readability_score,
+    'terms': extract_scientific_terms,
+    'grammar': check_grammar_basic,
+}
+# Checks that declare no pipeline profile work on the raw text instead of a parsed Doc
+_TEXT_CHECKS = {name for name, check in CHECKS.items() if not hasattr(check, 'nlp_profile')}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def run_checks(texts, checks):
+    """[{check: result}] for texts, parsing each text once for all checks"""
+    parsed = [check for check in checks if check not in _TEXT_CHECKS]
+    docs = [None] * len(texts)
+    if parsed:
+        # The richest profile any requested check needs; a richer Doc serves the cheaper checks
+        profile = max((CHECKS[check].nlp_profile for check in parsed), key=PROFILE_ORDER.index)
+        docs = get_docs(texts, profile=profile)
+    return [{check: CHECKS[check](text if check in _TEXT_CHECKS else doc) for check in checks}
+            for text, doc in zip(texts, docs)]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Metrics:
+    """Request counters and latency histograms, rendered for /metrics"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.latency = {}  # route -> Histogram
+        self.requests = {}  # (route, status) -> count
+        self.texts = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.in_flight = 0
+
+    def observe(self, route, status, seconds):
+        self.latency.setdefault(route, Histogram()).observe(seconds)
+        self.requests[route, status] = self.requests.get((route, status), 0) + 1
+
+    def render(self):
+        lines = [
+            "# HELP omicslingua_request_seconds Request latency by route",
+            "# TYPE omicslingua_request_seconds histogram",
+        ]
+        for route, histogram in sorted(self.latency.items()):
+            lines.extend(histogram.lines("omicslingua_request_seconds", f'route="{route}"'))
+        lines += ["# HELP omicslingua_requests_total Requests by route and status",
+                  "# TYPE omicslingua_requests_total counter"]
+        lines += [f'omicslingua_requests_total{{route="{route}",status="{status}"}} {count}'
+                  for (route, status), count in sorted(self.requests.items())]
+        cache = doc_cache_stats()
+        for name, kind, help_text, value in (
+            ("texts_total", "counter", "Texts received", self.texts),
+            ("texts_computed_total", "counter", "Texts analyzed", self.computed),
+            ("texts_coalesced_total", "counter", "Texts served by an identical in-flight request", self.coalesced),
+            ("requests_in_flight", "gauge", "Requests being handled", self.in_flight),
+            ("doc_cache_hits_total", "counter", "Parsed-Doc cache hits", cache['hits']),
+            ("doc_cache_misses_total", "counter", "Parsed-Doc cache misses", cache['misses']),
+            ("doc_cache_bytes", "gauge", "Estimated Doc cache size", cache['bytes']),
+            ("uptime_seconds", "gauge", "Seconds since the worker started", round(time.time() - self.started, 3)),
+        ):
+            lines += [f"# HELP omicslingua_{name} {help_text}", f"# TYPE omicslingua_{name} {kind}",
+                      f"omicslingua_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class Coalescer:
+    """Shares the computation of identical (checks, text) keys between concurrent requests"""
+
+    def __init__(self):
+        self._inflight = {}  # key -> Future
+        self._tasks = set()  # running computations (the loop only keeps weak references)
+
+    @staticmethod
+    def key(text, checks):
+        return checks, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    async def run(self, keys, compute):
+        """Results for keys; compute(positions) returns the results of the keys not already in flight
+
+        Returns (results, number of keys computed by this call).
+        """
+        loop = asyncio.get_running_loop()
+        futures, owned = [], []
+        for position, key in enumerate(keys):
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = loop.create_future()
+                owned.append(position)
+            futures.append(future)
+
+        if owned:
+            # A task of its own, so a client disconnecting does not cancel
+            # work other requests are waiting on
+            task = loop.create_task(compute(owned))
+            self._tasks.add(task)
+            task.add_done_callback(lambda task: self._settle(task, [(keys[p], futures[p]) for p in owned]))
+        return await asyncio.gather(*(asyncio.shield(f) for f in futures)), len(owned)
+
+    def _settle(self, task, pending):
+        self._tasks.discard(task)
+        for index, (key, future) in enumerate(pending):
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future.done():
+                continue
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result()[index])
+
+
+class AnalysisAPI:
+    """The ASGI application"""
+
+    def __init__(self, warm_profiles=API_WARM_PROFILES, threads=API_THREADS, max_batch=API_MAX_BATCH,
+                 max_text_length=MAX_TEXT_LENGTH):
+        self.warm_profiles = warm_profiles
+        self.threads = threads
+        self.max_batch = max_batch
+        self.max_text_length = max_text_length
+        # JSON overhead allowance on top of the text budget
+        self.max_body = 4 * max_batch * max_text_length + 64 * 1024
+        self.metrics = Metrics()
+        self.coalescer = Coalescer()
+        self._executor = None
+
+    # -- ASGI ---------------------------------------------------------------
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except ModelNotAvailableError as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def startup(self):
+        """Load the warm profiles so the first request does not pay for the model load"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), check_model_ready, self.warm_profiles)
+        logger.info(f"Analysis API ready: {model_stats()}")
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="analysis")
+        return self._executor
+
+    async def _http(self, scope, receive, send):
+        started = time.perf_counter()
+        method, path = scope['method'], scope['path'].rstrip("/") or "/"
+        route = "other"
+        self.metrics.in_flight += 1
+        try:
+            route, handler = self._route(method, path)
+            body = await self._read_body(receive) if method == "POST" else b""
+            status, payload = 200, await handler(body)
+        except HTTPError as e:
+            status, payload = e.status, {'error': e.message}
+        except Exception:
+            logger.exception(f"{method} {path} failed")
+            status, payload = 500, {'error': "Internal error"}
+        finally:
+            self.metrics.in_flight -= 1
+
+        # Handlers return JSON-able objects, or str for the Prometheus text format
+        if isinstance(payload, str):
+            content_type, payload = "text/plain; version=0.0.4; charset=utf-8", payload.encode("utf-8")
+        else:
+            content_type = "application/json; charset=utf-8"
+            payload = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b"content-type", content_type.encode()),
+                                (b"content-length", str(len(payload)).encode())]})
+        await send({'type': 'http.response.body', 'body': payload})
+        self.metrics.observe(route, status, time.perf_counter() - started)
+
+    def _route(self, method, path):
+        """(metrics route label, handler) for a request"""
+        if path in ("/healthz", "/metrics"):
+            if method != "GET":
+                raise HTTPError(405, f"{path} only supports GET")
+            return path, self.healthz if path == "/healthz" else self.render_metrics
+
+        parts = path.strip("/").split("/")
+        if len(parts) in (2, 3) and parts[0] == "v1" and (len(parts) == 2 or parts[2] == "batch"):
+            name, batch = parts[1], len(parts) == 3
+            if name == "checks" or name in CHECKS:
+                if method != "POST":
+                    raise HTTPError(405, f"{path} only supports POST")
+                check = None if name == "checks" else (name,)
+                return path, lambda body: self.analyze(body, batch, check)
+        raise HTTPError(404, f"No route for {path}")
+
+    async def _read_body(self, receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise HTTPError(400, "Client disconnected")
+            chunk = message.get('body', b"")
+            size += len(chunk)
+            if size > self.max_body:
+                raise HTTPError(413, f"Request body over {self.max_body} bytes")
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b"".join(chunks)
+
+    # -- endpoints ----------------------------------------------------------
+
+    async def healthz(self, body):
+        return {'status': "ok", 'models': model_stats(), 'checks': list(CHECKS),
+                'uptime_seconds': round(time.time() - self.metrics.started, 3)}
+
+    async def render_metrics(self, body):
+        return self.metrics.render()
+
+    async def analyze(self, body, batch, check=None):
+        """/v1/checks[/batch] (check None: checks from the request) or /v1/<check>[/batch]"""
+        request = self._parse_request(body, batch)
+        checks = check or self._parse_checks(request.get('checks'))
+        texts = request['texts'] if batch else [request['text']]
+        keys = [self.coalescer.key(text, checks) for text in texts]
+
+        async def compute(positions):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), run_checks,
+                                              [texts[p] for p in positions], checks)
+
+        results, computed = await self.coalescer.run(keys, compute)
+        self.metrics.texts += len(texts)
+        self.metrics.computed += computed
+        self.metrics.coalesced += len(texts) - computed
+
+        if check:
+            results = [result[check[0]] for result in results]
+        if batch:
+            return {'results': results}
+        return {'result': results[0]} if check else {'results': results[0]}
+
+    def _parse_request(self, body, batch):
+        try:
+            request = json.loads(body or b"null")
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "Expected a JSON object")
+
+        field = 'texts' if batch else 'text'
+        texts = request.get(field)
+        if not batch:
+            texts = [texts]
+        elif not isinstance(texts, list) or not texts:
+            raise HTTPError(400, "'texts' must be a non-empty list of strings")
+        elif len(texts) > self.max_batch:
+            raise HTTPError(413, f"At most {self.max_batch} texts per batch")
+        for text in texts:
+            if not isinstance(text, str):
+                raise HTTPError(400, f"'{field}' must be {'a list of strings' if batch else 'a string'}")
+            if len(text) > self.max_text_length:
+                raise HTTPError(413, f"Texts are limited to {self.max_text_length} characters")
+        return request
+
+    @staticmethod
+    def _parse_checks(checks):
+        if checks is None:
+            return tuple(CHECKS)
+        if not isinstance(checks, list) or not checks or not all(isinstance(check, str) for check in checks):
+            raise HTTPError(400, "'checks' must be a non-empty list of strings")
+        unknown = [check for check in checks if check not in CHECKS]
+        if unknown:
+            raise HTTPError(400, f"Unknown checks {unknown}; available: {list(CHECKS)}")
+        return tuple(dict.fromkeys(checks))
+
+
+app = AnalysisAPI()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Writing Assistant checks over HTTP")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Server processes, each with its own models")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The analysis API needs an ASGI server: pip install -r requirements.txt")
+
+    logging.basicConfig(level=args.log_level.upper())
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level,
+                lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
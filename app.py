@@ -23,8 +23,8 @@ from modules.daily_challenge import render_daily_challenge
 from modules.progress_analytics import render_progress_analytics
 
 # Import utilities
-from utils.nlp_engine import load_model
-from utils.ui import load_css, render_sidebar_profile
+from utils.nlp_engine import doc_cache_stats, model_stats
+from utils.ui import load_css, render_sidebar_profile, get_nlp_model
 from utils.database import UserProgressDB
 from utils.helpers import init_session_state, update_last_session, check_daily_streak
 
@@ -48,17 +48,7 @@ st.set_page_config(
 init_session_state()
 
 # ---------------- LOAD RESOURCES ----------------
-@st.cache_resource(ttl=3600)
-def get_nlp():
-    """Load spaCy model with caching"""
-    try:
-        return load_model()
-    except Exception as e:
-        logger.error(f"Failed to load NLP model: {e}")
-        st.error("Failed to load NLP engine. Some features may be limited.")
-        return None
-
-nlp = get_nlp()
+nlp = get_nlp_model()
 
 # Load CSS
 load_css()
@@ -134,6 +124,10 @@ if st.sidebar.checkbox("🔧 Developer Mode", value=False):
         st.success("Caches cleared!")
     
     st.sidebar.json(st.session_state.user_progress, expanded=False)
+    st.sidebar.caption("NLP Doc cache")
+    st.sidebar.json(doc_cache_stats(), expanded=False)
+    st.sidebar.caption("spaCy models")
+    st.sidebar.json(model_stats(), expanded=False)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown(
@@ -12,11 +12,90 @@ ASSETS_DIR = BASE_DIR / "assets"
 # NLP Settings
 SPACY_MODEL = "en_core_web_sm"
 MAX_TEXT_LENGTH = 10000
+DOC_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Parsed-Doc LRU budget (estimated)
+READABILITY_SYLLABLE_CACHE_SIZE = 65536  # Words whose syllable counts are memoized (LRU)
+READABILITY_USE_LEXICON = True  # Syllables of lexicon words come from the pronunciation lexicon
+PRONUNCIATION_LEXICON_DIR = DATA_DIR / "pronunciation"  # Compiled lexicon (tools/build_pronunciation_lexicon.py)
+PRONUNCIATION_SOURCES = [DATA_DIR / "omics_vocabulary.csv", DATA_DIR / "omics_vocabulary_complete.csv"]
+WRITING_SEGMENT_MAX_CHARS = 2000  # Longer paragraphs are analyzed sentence by sentence
+WRITING_SEGMENT_CACHE_SIZE = 4096  # Per-segment analysis results kept (LRU)
+WRITING_ANALYSIS_WORKERS = None  # Analysis processes (None: one per core, 0: analyze in the script thread)
+WRITING_JOB_QUEUE_SIZE = 512  # Pending paragraph analyses before new drafts are turned away
+WRITING_RESULT_WAIT = 0.5  # Seconds a page run waits for analysis results before rerunning to pick up the rest
+
+# Analysis HTTP API (api.py). Each server worker process loads the
+# API_WARM_PROFILES models at startup and serves requests from them.
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+API_THREADS = 4  # Analysis threads per worker process
+API_MAX_BATCH = 64  # Texts per batch request
+API_WARM_PROFILES = ('parse', 'full')
+
+# spaCy pipeline profiles, cheapest first. Each lists the SPACY_MODEL
+# components to exclude; 'sentencizer' adds rule-based sentence splitting
+# when the parser is excluded.
+SPACY_PROFILES = {
+    'tokenize': {'exclude': ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner'], 'sentencizer': True},
+    'parse': {'exclude': ['lemmatizer', 'ner']},
+    'full': {'exclude': []}
+}
+
+# Vocabulary build pipeline (tools/build_vocabulary.py). Sources are globs
+# relative to BASE_DIR in priority order; an authoritative source keeps its
+# definitions when other sources define the same term.
+VOCAB_SOURCES = [
+    {'name': 'curated', 'path': 'data/sources/*.csv', 'authoritative': True},
+    {'name': 'institutional', 'path': 'CSV/batch*_institutional_glossary.csv'},
+    {'name': 'extracted', 'path': 'tools/extracted/*.json'},
+]
+VOCAB_BUILD_CACHE = BASE_DIR / ".build_cache" / "vocabulary"
+VOCAB_MERGE_MEMORY_LIMIT = 256 * 1024 * 1024  # Larger inputs use the streaming external merge
+# Near-duplicate merging (MinHash similarity): merge when both the term and the
+# definition reach their threshold; pairs reaching `review` in one of them are
+# listed in the merge report only
+VOCAB_NEAR_DUPLICATES = {'term': 0.7, 'definition': 0.5, 'review': 0.85}
+
+# Glossary fetching (tools/fetch_glossaries.py)
+GLOSSARY_HTTP_CACHE = BASE_DIR / ".build_cache" / "http"
+GLOSSARY_FIXTURES = BASE_DIR / "tools" / "fixtures" / "glossaries"
+GLOSSARY_RATE_LIMITS = {  # requests per second per host
+    'www.ncbi.nlm.nih.gov': 3.0,
+    'www.embl.org': 1.0,
+}
+GLOSSARY_TIMEOUT = 30  # seconds
+
+# Online glossaries (utils/glossary_sources.py). A source is a page and a
+# declarative extraction rule:
+#   {'terms': 'dt', 'definitions': 'dd'}    term / definition element pairs
+#   {'items': 'li', 'split': '-'}           one element per entry, split on a separator
+# 'within' limits extraction to elements matching a simple selector
+# ('tag', 'tag.class', 'tag#id', comma-separated alternatives); the whole
+# page is used when nothing matches.
+GLOSSARY_SOURCES = {
+    'ncbi': {
+        'url': "https://www.ncbi.nlm.nih.gov/datasets/docs/v2/glossary/",
+        'rule': {'terms': 'dt', 'definitions': 'dd', 'within': 'dl'},
+        'field': "General Genetics",
+        'reference': "NCBI",
+        'output': "tools/extracted/ncbi_glossary.json",
+    },
+    'embl_ebi': {
+        'url': "https://www.embl.org/ells/teachingbase/ells-glossary/",
+        'rule': {'items': 'li', 'split': "\u2013", 'within': 'article, main'},
+        'field': "Omics & Bioinformatics",
+        'reference': "EMBL-EBI",
+        'output': "tools/extracted/embl_ebi_glossary.json",
+    },
+}
 
 # Learning Settings
 DAILY_WORD_GOAL = 10
 WEEKLY_WORD_GOAL = 50
 RETENTION_DAYS = [1, 3, 7, 14, 30]  # Spaced repetition intervals
+SCHEDULING_ALGORITHM = 'sm2'  # fixed | ladder | sm2 | fsrs (see utils/spaced_repetition.py)
+DESIRED_RETENTION = 0.9  # Target recall probability for FSRS
+SIMILARITY_INDEX_DIR = DATA_DIR / "similarity"  # Quiz distractor neighbours (tools/build_similarity_index.py)
+SIMILARITY_NEIGHBOURS = 10
 
 # Vocabulary Levels
 DIFFICULTY_LEVELS = {
@@ -4,17 +4,24 @@ Vocabulary Intelligence System with spaced repetition and multi-modal learning
 
 import streamlit as st
 import pandas as pd
-import random
+import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import plotly.graph_objects as go
 
-from utils.helpers import load_vocabulary_data, calculate_next_review, add_to_learning_list
+from utils.helpers import add_to_learning_list, record_progress_event
+from utils.vocab_store import get_vocabulary_store
+from utils.search_index import search_index_for
+from utils.quiz_engine import quiz_pool_for
+from utils.similarity_index import similarity_index_for
+from utils.scheduler import ReviewScheduler
+from utils.pronunciation import pronunciation
 from config import OMICS_CATEGORIES, DIFFICULTY_LEVELS
 
 class OmicsVocabularySystem:
     def __init__(self):
-        self.vocab_data = load_vocabulary_data()
+        # Shared across sessions; reloaded only when the CSV changes on disk
+        self.snapshot = get_vocabulary_store().snapshot()
     
     def render(self):
         st.header("🧬 Vocabulary Intelligence System")
@@ -45,7 +52,7 @@ class OmicsVocabularySystem:
         with col4:
             search = st.text_input("🔍 Search", placeholder="Type to search...")
         
-        # Filter vocabulary
+        # Filter vocabulary: row positions; each tab decodes only the rows it shows
         filtered_vocab = self._filter_vocabulary(difficulty, category, learning_status, search)
         
         # Tabs for different learning modes
@@ -69,41 +76,58 @@ class OmicsVocabularySystem:
             self._render_pronunciation_mode(filtered_vocab)
     
     def _filter_vocabulary(self, difficulty, category, status, search):
-        """Filter vocabulary based on criteria"""
-        df = self.vocab_data.copy()
+        """Row positions of the vocabulary matching the criteria"""
+        positions = self._filter_positions(difficulty, category, status, search)
+        
+        if positions is None:
+            return np.arange(len(self.snapshot))
+        
+        return positions
+    
+    def _filter_positions(self, difficulty, category, status, search):
+        """Row positions matching the filters, or None when nothing is filtered"""
+        snapshot = self.snapshot
+        mask = None
+        
+        def restrict(condition):
+            nonlocal mask
+            condition = np.asarray(condition, dtype=bool)
+            mask = condition if mask is None else (mask & condition)
         
         if difficulty != "All":
-            df = df[df['difficulty'] == difficulty.lower()]
+            restrict(snapshot.isin('difficulty', [difficulty.lower()]))
         
         if category:
-            df = df[df['category'].isin(category)]
+            restrict(snapshot.isin('category', category))
         
         if status != "All":
             # Filter based on user progress
             user_vocab = st.session_state.user_progress
             if status == "New":
                 learned = user_vocab['vocab_mastered'].union(user_vocab['vocab_learning'])
-                df = df[~df['term'].isin(learned)]
+                restrict(~snapshot.isin('term', learned))
             elif status == "Learning":
-                df = df[df['term'].isin(user_vocab['vocab_learning'])]
+                restrict(snapshot.isin('term', user_vocab['vocab_learning']))
             elif status == "Mastered":
-                df = df[df['term'].isin(user_vocab['vocab_mastered'])]
+                restrict(snapshot.isin('term', user_vocab['vocab_mastered']))
             elif status == "Review Needed":
-                df = df[df['term'].isin(self._get_review_needed_terms())]
+                restrict(snapshot.isin('term', self._get_review_needed_terms()))
         
         if search:
-            df = df[
-                df['term'].str.contains(search, case=False) |
-                df['definition'].str.contains(search, case=False)
-            ]
+            hits = np.zeros(len(snapshot), dtype=bool)
+            hits[search_index_for(self.snapshot).substring(search, fields=('term', 'definition'))] = True
+            restrict(hits)
+        
+        if mask is None:
+            return None
         
-        return df
+        return np.flatnonzero(mask)
     
-    def _render_browse_mode(self, vocab_df):
+    def _render_browse_mode(self, positions):
         """Browse vocabulary with detailed information"""
-        st.subheader(f"📖 {len(vocab_df)} terms found")
+        st.subheader(f"📖 {len(positions)} terms found")
         
-        if vocab_df.empty:
+        if len(positions) == 0:
             st.info("No vocabulary matches your filters. Try adjusting them!")
             return
         
@@ -112,6 +136,7 @@ class OmicsVocabularySystem:
         
         if view_mode == "Cards":
             # Card view
+            vocab_df = self.snapshot.rows(positions)
             cols_per_row = 2
             rows = [vocab_df.iloc[i:i+cols_per_row] for i in range(0, len(vocab_df), cols_per_row)]
             
@@ -122,7 +147,7 @@ class OmicsVocabularySystem:
                         self._render_vocab_card(term_data)
         else:
             # Table view
-            display_df = vocab_df[['term', 'category', 'difficulty', 'definition']].copy()
+            display_df = self.snapshot.rows(positions, ['term', 'category', 'difficulty', 'definition'])
             st.dataframe(
                 display_df,
                 use_container_width=True,
@@ -200,7 +225,7 @@ class OmicsVocabularySystem:
             with col1:
                 if not is_learning and not is_mastered:
                     if st.button("➕ Add to Learning", key=f"add_{term}"):
-                        st.session_state.user_progress['vocab_learning'].add(term)
+                        add_to_learning_list(term)
                         st.success(f"Added '{term}' to learning list!")
                         st.rerun()
             
@@ -209,6 +234,7 @@ class OmicsVocabularySystem:
                     if st.button("✅ Mark Mastered", key=f"master_{term}"):
                         st.session_state.user_progress['vocab_learning'].discard(term)
                         st.session_state.user_progress['vocab_mastered'].add(term)
+                        record_progress_event('mastered', {'term': term})
                         st.balloons()
                         st.success(f"'{term}' mastered!")
                         st.rerun()
@@ -217,11 +243,11 @@ class OmicsVocabularySystem:
                 if is_mastered:
                     st.success("✅ Mastered")
     
-    def _render_flashcard_mode(self, vocab_df):
+    def _render_flashcard_mode(self, positions):
         """Interactive flashcard system with spaced repetition"""
         st.subheader("🎴 Flashcard Practice")
         
-        if vocab_df.empty:
+        if len(positions) == 0:
             st.info("No vocabulary available. Adjust filters or add new terms!")
             return
         
@@ -229,16 +255,16 @@ class OmicsVocabularySystem:
         if 'flashcard_session' not in st.session_state or st.button("🔄 New Session"):
             # Prioritize review-needed terms
             review_terms = self._get_review_needed_terms()
-            priority_vocab = vocab_df[vocab_df['term'].isin(review_terms)]
+            priority = positions[self.snapshot.isin('term', review_terms)[positions]]
             
-            if not priority_vocab.empty:
-                deck = priority_vocab.sample(min(20, len(priority_vocab)))
+            if len(priority):
+                deck = np.random.choice(priority, min(20, len(priority)), replace=False)
                 st.info(f"📌 Session includes {len(deck)} terms due for review!")
             else:
-                deck = vocab_df.sample(min(20, len(vocab_df)))
+                deck = np.random.choice(positions, min(20, len(positions)), replace=False)
             
             st.session_state.flashcard_session = {
-                'deck': deck.to_dict('records'),
+                'deck': self.snapshot.rows(deck).to_dict('records'),
                 'current_idx': 0,
                 'show_answer': False,
                 'session_stats': {'easy': 0, 'medium': 0, 'hard': 0}
@@ -347,11 +373,11 @@ class OmicsVocabularySystem:
                     session['session_stats']['easy'] += 1
                     self._next_flashcard()
     
-    def _render_quiz_mode(self, vocab_df):
+    def _render_quiz_mode(self, positions):
         """Interactive quiz with multiple question types"""
         st.subheader("✏️ Vocabulary Quiz")
         
-        if vocab_df.empty:
+        if len(positions) == 0:
             st.info("No vocabulary available for quiz. Adjust filters!")
             return
         
@@ -366,11 +392,8 @@ class OmicsVocabularySystem:
             )
         
         if st.button("🎯 Start Quiz", type="primary"):
-            # Initialize quiz
-            quiz_vocab = vocab_df.sample(min(num_questions, len(vocab_df)))
-            
             st.session_state.quiz_session = {
-                'questions': self._generate_quiz_questions(quiz_vocab, question_type),
+                'questions': self._generate_quiz_questions(positions, question_type, num_questions),
                 'current_q': 0,
                 'answers': [],
                 'score': 0
@@ -444,22 +467,24 @@ class OmicsVocabularySystem:
                 else:
                     st.warning("Please provide an answer!")
     
-    def _render_pronunciation_mode(self, vocab_df):
+    def _render_pronunciation_mode(self, positions):
         """Pronunciation practice with audio"""
         st.subheader("🔊 Pronunciation Practice")
         
-        if vocab_df.empty:
+        if len(positions) == 0:
             st.info("No vocabulary available. Adjust filters!")
             return
         
         st.info("🎧 **Pro Tip:** Use text-to-speech in your browser or install a pronunciation extension")
         
         # Select a term
-        term_list = vocab_df['term'].tolist()
+        term_list = self.snapshot.column('term').to_numpy()[positions].tolist()
         selected_term = st.selectbox("Choose a term to practice:", term_list)
         
         if selected_term:
-            term_data = vocab_df[vocab_df['term'] == selected_term].iloc[0]
+            term_data = self.snapshot.rows(positions[[term_list.index(selected_term)]]).iloc[0]
+            # Compiled lexicon entry (vocabulary data, or generated by rules)
+            entry = pronunciation(selected_term) or {}
             
             # Display term with phonetic
             st.markdown(
@@ -474,7 +499,7 @@ class OmicsVocabularySystem:
                 ">
                     <h1 style="margin: 0;">{selected_term}</h1>
                     <p style="font-size: 1.5rem; margin-top: 1rem;">
-                        /{term_data.get('phonetic', 'Phonetic not available')}/
+                        /{entry.get('ipa') or 'Phonetic not available'}/
                     </p>
                 </div>
                 """,
@@ -486,11 +511,16 @@ class OmicsVocabularySystem:
             
             with col1:
                 st.markdown("**Syllable Breakdown:**")
-                st.code(term_data.get('syllables', selected_term))
+                st.code(entry.get('syllables') or selected_term)
+                if entry.get('syllable_count'):
+                    st.caption(f"{entry['syllable_count']} syllables")
             
             with col2:
                 st.markdown("**Stress Pattern:**")
-                st.info(term_data.get('stress', 'Primary stress on first syllable'))
+                st.info(entry.get('stress_text') or 'Primary stress on first syllable')
+            
+            if entry.get('origin') in ('composed', 'rules'):
+                st.caption("ℹ️ Generated from spelling and known omics terms; no recorded pronunciation yet")
             
             # Etymology helps with pronunciation
             if 'etymology' in term_data:
@@ -507,20 +537,20 @@ class OmicsVocabularySystem:
                 st.success("Great job practicing!")
     
     # Helper methods
-    def _get_review_needed_terms(self):
-        """Get terms that need review based on spaced repetition"""
-        review_needed = set()
-        vocab_tracking = st.session_state.user_progress.get('vocab_tracking', {})
+    def _review_scheduler(self):
+        """Per-session review scheduler, rebuilt only when vocab_tracking is replaced"""
+        tracking = st.session_state.user_progress.setdefault('vocab_tracking', {})
+        cached = st.session_state.get('review_scheduler')
         
-        today = datetime.now().date()
+        if cached is None or cached[0] is not tracking:
+            cached = (tracking, ReviewScheduler.from_tracking(tracking))
+            st.session_state.review_scheduler = cached
         
-        for term, data in vocab_tracking.items():
-            if 'next_review' in data:
-                next_review = datetime.fromisoformat(data['next_review']).date()
-                if next_review <= today:
-                    review_needed.add(term)
-        
-        return review_needed
+        return cached[1]
+    
+    def _get_review_needed_terms(self):
+        """Get terms that need review based on spaced repetition"""
+        return set(self._review_scheduler().due_terms())
     
     def _process_flashcard_response(self, term, difficulty):
         """Update spaced repetition schedule"""
@@ -532,21 +562,26 @@ class OmicsVocabularySystem:
         if term not in tracking:
             tracking[term] = {'reviews': 0, 'last_difficulty': difficulty}
         
+        # Schedule with the configured algorithm (updates the due-date index too)
+        next_review, srs = self._review_scheduler().review(term, difficulty)
+        
         tracking[term]['reviews'] += 1
         tracking[term]['last_difficulty'] = difficulty
         tracking[term]['last_review'] = datetime.now().isoformat()
-        
-        # Calculate next review date
-        intervals = {'easy': 7, 'medium': 3, 'hard': 1}
-        next_review = datetime.now() + timedelta(days=intervals[difficulty])
         tracking[term]['next_review'] = next_review.isoformat()
+        tracking[term]['srs'] = srs
         
         # Add to learning or mastered
         if tracking[term]['reviews'] >= 3 and difficulty == 'easy':
+            status = 'mastered'
             st.session_state.user_progress['vocab_mastered'].add(term)
             st.session_state.user_progress['vocab_learning'].discard(term)
         else:
+            status = 'learning'
             st.session_state.user_progress['vocab_learning'].add(term)
+        
+        # Persist only this card's delta, not the whole progress blob
+        record_progress_event('flashcard', {'term': term, 'tracking': dict(tracking[term]), 'status': status})
     
     def _next_flashcard(self):
         """Move to next flashcard"""
@@ -555,27 +590,12 @@ class OmicsVocabularySystem:
         session['show_answer'] = False
         st.rerun()
     
-    def _generate_quiz_questions(self, vocab_df, q_type):
-        """Generate quiz questions"""
-        questions = []
-        
-        for _, term_data in vocab_df.iterrows():
-            if q_type in ["Mixed", "Multiple Choice"]:
-                # Multiple choice question
-                correct = term_data['definition']
-                wrong_options = vocab_df[vocab_df['term'] != term_data['term']].sample(3)['definition'].tolist()
-                options = [correct] + wrong_options
-                random.shuffle(options)
-                
-                questions.append({
-                    'type': 'multiple_choice',
-                    'question': f"What is the definition of '{term_data['term']}'?",
-                    'options': options,
-                    'correct_answer': correct,
-                    'explanation': f"In {term_data['category']}: {term_data['definition']}"
-                })
-        
-        return questions
+    def _generate_quiz_questions(self, positions, q_type, num_questions):
+        """Generate quiz questions for a sample of the filtered terms"""
+        # Filter positions are quiz pool rows
+        return quiz_pool_for(self.snapshot).generate(
+            positions, num_questions, q_type, similar=similarity_index_for(self.snapshot)
+        )
     
     def _check_answer(self, user_answer, correct_answer):
         """Check if answer is correct"""
@@ -622,14 +642,17 @@ class OmicsVocabularySystem:
                         st.markdown(f"✅ Correct answer: {ans['correct_answer']}")
                         st.markdown("---")
         
-        # Update progress
-        st.session_state.user_progress['quiz_history'] = st.session_state.user_progress.get('quiz_history', [])
-        st.session_state.user_progress['quiz_history'].append({
-            'date': datetime.now().isoformat(),
-            'score': quiz['score'],
-            'total': len(quiz['questions']),
-            'percentage': score_pct
-        })
+        # Update progress (once per quiz, not on every rerun of the results page)
+        if not quiz.get('recorded'):
+            result = {
+                'date': datetime.now().isoformat(),
+                'score': quiz['score'],
+                'total': len(quiz['questions']),
+                'percentage': score_pct
+            }
+            st.session_state.user_progress.setdefault('quiz_history', []).append(result)
+            record_progress_event('quiz', {'result': result})
+            quiz['recorded'] = True
         
         if st.button("Take Another Quiz"):
             del st.session_state.quiz_session
@@ -1,4 +1,29 @@
-﻿import streamlit as st
+﻿import numpy as np
+import streamlit as st
+
+from utils.compiled_vocab import CompiledVocabulary
+from utils.search_index import search_index_for_entries
+
+
+def _field_choices(vocabulary):
+    if isinstance(vocabulary, CompiledVocabulary) and "field" in vocabulary.columns:
+        return sorted(vocabulary.categories("field"))
+    return sorted({v.get("field", "Unknown") for v in vocabulary})
+
+
+def _filter_compiled(vocabulary, rows, field, difficulty):
+    """Filter a compiled vocabulary on its categorical codes; decodes only the matches"""
+    keep = np.ones(len(vocabulary), dtype=bool) if rows is None else np.zeros(len(vocabulary), dtype=bool)
+    if rows is not None:
+        keep[rows] = True
+    for name, label in (("field", field), ("difficulty", difficulty)):
+        if label == "All":
+            continue
+        labels = vocabulary.categories(name) if name in vocabulary.columns else []
+        if label not in labels:
+            return []
+        keep &= np.asarray(vocabulary.codes(name)) == labels.index(label)
+    return [vocabulary[int(row)] for row in np.flatnonzero(keep)]
 
 
 def render_omics_vocabulary_explorer(vocabulary: list):
@@ -8,8 +33,9 @@ def render_omics_vocabulary_explorer(vocabulary: list):
 
     Parameters
     ----------
-    vocabulary : list of dict
-        Cleaned and normalized omics vocabulary entries
+    vocabulary : list of dict or CompiledVocabulary
+        Cleaned and normalized omics vocabulary entries (a compiled,
+        memory-mapped vocabulary is filtered without decoding every entry)
     """
 
     st.markdown("## 📘 Omics Vocabulary Explorer")
@@ -29,7 +55,7 @@ def render_omics_vocabulary_explorer(vocabulary: list):
         )
 
     with col2:
-        fields = sorted({v.get("field", "Unknown") for v in vocabulary})
+        fields = _field_choices(vocabulary)
         selected_field = st.selectbox(
             "Field",
             ["All"] + fields
@@ -45,13 +71,13 @@ def render_omics_vocabulary_explorer(vocabulary: list):
     st.markdown("---")
 
     # ---------- Filtering ----------
-    def match(entry):
-        if search_query:
-            q = search_query.lower()
-            if q not in entry.get("term", "").lower() and \
-               not any(q in s.lower() for s in entry.get("synonyms", [])):
-                return False
+    rows = None
+    if search_query:
+        index = search_index_for_entries(vocabulary)
+        rows = index.substring(search_query, fields=("term", "synonyms"))
+    candidates = vocabulary if rows is None else (vocabulary[int(i)] for i in rows)
 
+    def match(entry):
         if selected_field != "All" and entry.get("field") != selected_field:
             return False
 
@@ -60,7 +86,10 @@ def render_omics_vocabulary_explorer(vocabulary: list):
 
         return True
 
-    filtered = [e for e in vocabulary if match(e)]
+    if isinstance(vocabulary, CompiledVocabulary):
+        filtered = _filter_compiled(vocabulary, rows, selected_field, selected_difficulty)
+    else:
+        filtered = [e for e in candidates if match(e)]
 
     # ---------- Results ----------
     st.markdown(f"### 📚 Results ({len(filtered)})")
@@ -71,8 +100,7 @@ def render_omics_vocabulary_explorer(vocabulary: list):
 
     for entry in filtered:
         with st.expander(entry["term"]):
-            st.markdown(f"**Definition**  
-            {entry.get('definition', '—')}")
+            st.markdown(f"**Definition**  \n{entry.get('definition', '—')}")
 
             st.markdown(
                 f"**Field:** {entry.get('field', '—')}  \n"
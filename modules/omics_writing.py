@@ -2,8 +2,14 @@
 Writing Assistant Module
 """
 
+import time
+import uuid
+
 import streamlit as st
-from utils.nlp_engine import analyze_text, check_passive_voice, get_readability_score
+from config import WRITING_RESULT_WAIT
+from utils.analysis_jobs import AnalysisUnavailableError, QueueFullError, get_analysis_service
+from utils.incremental_analysis import analyze_draft
+from utils.nlp_engine import check_passive_voice, get_readability_score
 
 def render_omics_writing_assistant(nlp):
     """Render writing assistant interface"""
@@ -11,8 +17,7 @@ def render_omics_writing_assistant(nlp):
     st.caption("Improve your scientific writing with real-time feedback")
     
     if not nlp:
-        st.error("NLP engine not available. Some features will be limited.")
-        return
+        st.warning("NLP engine not available: drafts get readability scores only.")
     
     # Tabs for different writing tasks
     tab1, tab2, tab3 = st.tabs([
@@ -47,55 +52,55 @@ def render_free_writing_mode(nlp):
         
         # Analysis section
         col1, col2 = st.columns([2, 1])
-        
         with col1:
             st.subheader("📊 Text Analysis")
-            
-            # Basic metrics
-            analysis = analyze_text(user_text, nlp)
-            
-            if analysis:
-                col_a, col_b, col_c = st.columns(3)
-                col_a.metric("Words", analysis['tokens'])
-                col_b.metric("Sentences", analysis['sentences'])
-                col_c.metric("Avg Sentence Length", f"{analysis['avg_sentence_length']:.1f}")
-                
-                # Readability
-                st.markdown("**Readability Scores:**")
-                readability = get_readability_score(user_text)
-                
-                if readability:
-                    col1_r, col2_r = st.columns(2)
-                    with col1_r:
-                        st.metric("Flesch Reading Ease", readability['flesch_reading_ease'])
-                        st.caption("Higher = Easier to read (aim for 50-60 for scientific)")
-                    with col2_r:
-                        st.metric("Grade Level", readability['flesch_kincaid_grade'])
-                        st.caption("Appropriate for graduate level: 12-16")
-                
-                # Passive voice detection
-                st.markdown("**Passive Voice Check:**")
-                passive_sentences = check_passive_voice(user_text, nlp)
-                
-                if passive_sentences:
-                    st.warning(f"Found {len(passive_sentences)} passive construction(s):")
-                    for sent in passive_sentences[:3]:
-                        st.text(f"• {sent}")
-                    if len(passive_sentences) > 3:
-                        st.caption(f"... and {len(passive_sentences) - 3} more")
-                    st.info("💡 Consider using active voice for clearer scientific writing")
-                else:
-                    st.success("✅ No passive voice detected!")
-        
+            analysis_area = st.empty()
         with col2:
             st.subheader("💡 Suggestions")
+            suggestion_area = st.empty()
+        
+        # Only paragraphs changed since the last rerun are re-analyzed;
+        # document metrics are re-aggregated from cached per-paragraph stats.
+        # Workers load their own model, so they are only used when this
+        # process could load it.
+        service = get_analysis_service() if nlp is not None else None
+        if service is None:
+            draft = analyze_draft(user_text, nlp)
+            render_draft_analysis(draft, user_text, nlp, analysis_area, suggestion_area)
+        else:
+            # Analysis runs in worker processes; results are drawn as
+            # paragraphs complete. Editing the text reruns this script,
+            # which cancels the previous job for this session.
+            if 'writing_session_id' not in st.session_state:
+                st.session_state.writing_session_id = uuid.uuid4().hex
+            job = None
+            try:
+                job = service.submit(st.session_state.writing_session_id, user_text)
+            except QueueFullError:
+                analysis_area.warning("⏳ The analysis service is busy. Your text will be analyzed on the next edit.")
+            except AnalysisUnavailableError as e:
+                # Workers cannot run (e.g. the model fails to load in them): analyze here instead
+                draft = analyze_draft(user_text, nlp)
+                render_draft_analysis(draft, user_text, nlp, analysis_area, suggestion_area)
+                st.warning(f"Background analysis is unavailable, so analysis runs in the page: {e}")
             
-            # Generate suggestions based on analysis
-            suggestions = generate_writing_suggestions(user_text, analysis, nlp)
-            
-            for suggestion in suggestions:
-                st.info(f"• {suggestion}")
-            
+            # Wait briefly for results, then rerun to pick up the rest without
+            # holding the script thread (a rerun with the same text keeps the job)
+            deadline = time.monotonic() + WRITING_RESULT_WAIT
+            while job is not None:
+                draft = job.result()
+                render_draft_analysis(draft, user_text, nlp, analysis_area, suggestion_area)
+                if draft['error'] is not None:
+                    analysis_area.error(f"Analysis failed: {draft['error']}. Edit the text to retry.")
+                    break
+                if job.done():
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    st.rerun()
+                job.wait(timeout=remaining)
+        
+        with col2:
             # Action buttons
             st.markdown("---")
             st.download_button(
@@ -108,6 +113,67 @@ def render_free_writing_mode(nlp):
     else:
         st.info("👆 Start typing to see real-time analysis and feedback!")
 
+def render_draft_analysis(draft, user_text, nlp, analysis_area, suggestion_area):
+    """Draw a (possibly partial) draft analysis into its placeholders"""
+    analysis = draft['analysis'] if draft and draft['analysis'] and draft['analysis']['tokens'] else None
+    pending = draft.get('pending', 0) if draft else 0
+    
+    with analysis_area.container():
+        if pending:
+            done = draft['completed'] / max(draft['segments'], 1)
+            st.progress(done, text=f"Analyzing... {draft['completed']} of {draft['segments']} paragraph(s)")
+        
+        if analysis:
+            # Basic metrics
+            col_a, col_b, col_c = st.columns(3)
+            col_a.metric("Words", analysis['tokens'])
+            col_b.metric("Sentences", analysis['sentences'])
+            col_c.metric("Avg Sentence Length", f"{analysis['avg_sentence_length']:.1f}")
+        
+        # Readability (computed without the NLP model too)
+        readability = draft['readability'] if draft else None
+        if readability:
+            st.markdown("**Readability Scores:**")
+            col1_r, col2_r = st.columns(2)
+            with col1_r:
+                st.metric("Flesch Reading Ease", readability['flesch_reading_ease'])
+                st.caption("Higher = Easier to read (aim for 50-60 for scientific)")
+            with col2_r:
+                st.metric("Grade Level", readability['flesch_kincaid_grade'])
+                st.caption("Appropriate for graduate level: 12-16")
+        
+        if analysis:
+            # Passive voice detection
+            st.markdown("**Passive Voice Check:**")
+            passive_sentences = draft['passive_sentences']
+            
+            if passive_sentences:
+                st.warning(f"Found {len(passive_sentences)} passive construction(s):")
+                for sent in passive_sentences[:3]:
+                    st.text(f"• {sent}")
+                if len(passive_sentences) > 3:
+                    st.caption(f"... and {len(passive_sentences) - 3} more")
+                st.info("💡 Consider using active voice for clearer scientific writing")
+            elif not pending:
+                st.success("✅ No passive voice detected!")
+            
+            if not pending:
+                st.caption(f"Re-analyzed {draft['reanalyzed']} of {draft['segments']} paragraph(s) "
+                           f"in {draft['seconds'] * 1000:.0f} ms")
+    
+    if pending:
+        suggestion_area.caption("Suggestions appear when the analysis completes")
+        return
+    
+    with suggestion_area.container():
+        # Generate suggestions based on analysis
+        suggestions = generate_writing_suggestions(user_text, analysis, nlp,
+                                                   passive=draft['passive_sentences'] if draft else [],
+                                                   readability=draft['readability'] if draft else None)
+        
+        for suggestion in suggestions:
+            st.info(f"• {suggestion}")
+
 def render_abstract_builder(nlp):
     """Guided abstract writing"""
     st.subheader("📄 Structured Abstract Builder")
@@ -261,8 +327,12 @@ def compile_abstract(sections):
     
     return ' '.join(parts)
 
-def generate_writing_suggestions(text, analysis, nlp):
-    """Generate writing improvement suggestions"""
+def generate_writing_suggestions(text, analysis, nlp, passive=None, readability=None):
+    """Generate writing improvement suggestions
+    
+    passive and readability can be passed when already computed (e.g. by
+    the incremental draft analysis) to skip re-analyzing the text.
+    """
     suggestions = []
     
     if analysis:
@@ -279,12 +349,14 @@ def generate_writing_suggestions(text, analysis, nlp):
             suggestions.append("Include specific names, locations, or technical terms")
     
     # Passive voice
-    passive = check_passive_voice(text, nlp)
+    if passive is None:
+        passive = check_passive_voice(text, nlp)
     if len(passive) > 2:
         suggestions.append("Reduce passive voice usage - use active voice where possible")
     
     # Readability
-    readability = get_readability_score(text)
+    if readability is None:
+        readability = get_readability_score(text)
     if readability and readability['flesch_reading_ease'] < 30:
         suggestions.append("Text is quite complex - consider simplifying some sentences")
     
@@ -0,0 +1,142 @@
+﻿"""
+Batch manuscript analysis with the Writing Assistant metrics
+
+Streams a directory of .txt files or a JSONL file of texts through
+nlp.pipe and writes one metrics record per document (JSONL or Parquet).
+Does not import Streamlit.
+
+Usage:
+    python tools/batch_analyze.py abstracts/ -o metrics.jsonl
+    python tools/batch_analyze.py theses.jsonl -o metrics.parquet --n-process 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import SPACY_MODEL, SPACY_PROFILES  # noqa: E402
+from utils.nlp_engine import build_text_report, get_readability_score, load_model  # noqa: E402
+
+
+def iter_texts(source, text_field="text", id_field="id", pattern="*.txt"):
+    """Yield (doc_id, text) from a directory of text files or a JSONL file"""
+    source = Path(source)
+
+    if source.is_dir():
+        for path in sorted(source.rglob(pattern)):
+            yield str(path.relative_to(source)), path.read_text(encoding="utf-8", errors="replace")
+        return
+
+    with open(source, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            text = record.get(text_field) or ""
+            yield str(record.get(id_field, line_no)), text
+
+
+def document_metrics(doc_id, doc):
+    """Flat metrics record for one parsed document"""
+    report = build_text_report(doc)
+    readability = get_readability_score(doc.text) or {}
+
+    return {
+        "id": doc_id,
+        "characters": len(doc.text),
+        "words": report["tokens"],
+        "sentences": report["sentences"],
+        "avg_sentence_length": round(report["avg_sentence_length"], 2),
+        "max_sentence_length": max(report["sentence_lengths"], default=0),
+        "passive_count": len(report["passive_sentences"]),
+        "passive_ratio": round(len(report["passive_sentences"]) / max(report["sentences"], 1), 3),
+        "passive_sentences": report["passive_sentences"],
+        "grammar_issue_count": len(report["agreement_issues"]),
+        "grammar_issues": [issue["text"] for issue in report["agreement_issues"]],
+        "terms": report["terms"],
+        "entities": [f"{text}|{label}" for text, label in report["entities"]],
+        "flesch_reading_ease": readability.get("flesch_reading_ease"),
+        "flesch_kincaid_grade": readability.get("flesch_kincaid_grade"),
+        "difficult_words": readability.get("difficult_words"),
+        "reading_time_minutes": readability.get("reading_time_minutes"),
+    }
+
+
+def analyze_stream(nlp, texts, batch_size=32, n_process=1):
+    """Yield metrics records for (doc_id, text) pairs"""
+    docs = nlp.pipe(
+        ((text, doc_id) for doc_id, text in texts),
+        as_tuples=True,
+        batch_size=batch_size,
+        n_process=n_process,
+    )
+    for doc, doc_id in docs:
+        yield document_metrics(doc_id, doc)
+
+
+def write_jsonl(records, out_path):
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def parquet_engine_available():
+    """pandas writes Parquet through pyarrow (in requirements.txt) or fastparquet"""
+    import importlib.util
+
+    return any(importlib.util.find_spec(name) is not None for name in ("pyarrow", "fastparquet"))
+
+
+def write_parquet(records, out_path):
+    import pandas as pd
+
+    rows = list(records)
+    pd.DataFrame(rows).to_parquet(out_path, index=False)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score texts with the Writing Assistant metrics")
+    parser.add_argument("source", help="Directory of .txt files or a JSONL file")
+    parser.add_argument("-o", "--output", required=True, help="Output .jsonl or .parquet file")
+    parser.add_argument("--model", default=SPACY_MODEL, help="spaCy model name or path")
+    parser.add_argument("--profile", default="full", choices=list(SPACY_PROFILES),
+                        help="Pipeline profile; 'parse' skips NER (no entities), 'tokenize' gives counts and readability only")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the text")
+    parser.add_argument("--id-field", default="id", help="JSONL field holding the document id")
+    parser.add_argument("--glob", default="*.txt", help="File pattern when source is a directory")
+    args = parser.parse_args(argv)
+    if args.output.endswith(".parquet") and not parquet_engine_available():
+        parser.error("Parquet output needs pyarrow (pip install pyarrow); or write .jsonl instead")
+
+    load_start = time.perf_counter()
+    nlp = load_model(args.profile, args.model)
+    load_seconds = time.perf_counter() - load_start
+
+    texts = iter_texts(args.source, args.text_field, args.id_field, args.glob)
+    records = analyze_stream(nlp, texts, args.batch_size, args.n_process)
+
+    start = time.perf_counter()
+    if args.output.endswith(".parquet"):
+        count = write_parquet(records, args.output)
+    else:
+        count = write_jsonl(records, args.output)
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Model loaded in {load_seconds:.2f}s", file=sys.stderr)
+    print(f"Analyzed {count} documents in {elapsed:.2f}s ({rate:.1f} docs/sec) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+﻿"""
+Glossary parsing benchmark over saved pages
+
+Parses each source's fixture page (tools/fixtures/glossaries) with every
+installed backend, plus the previous BeautifulSoup extraction when bs4 is
+installed, and checks that all of them extract the same terms. --scale
+repeats the page body to simulate a large glossary.
+
+Usage:
+    python tools/bench_glossary_parse.py --scale 1 50 500
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import GLOSSARY_FIXTURES, GLOSSARY_SOURCES  # noqa: E402
+from utils.glossary_fetch import Fixtures  # noqa: E402
+from utils.glossary_parse import available_backends, extract_pairs  # noqa: E402
+
+_BODY = re.compile(r"(<body[^>]*>)(.*)(</body>)", re.S | re.I)
+
+
+def legacy_pairs(html, rule):
+    """The former extract_* scripts: full BeautifulSoup tree, broad selectors"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    pairs = []
+    if 'items' in rule:
+        for li in soup.select(rule['items']):
+            text = li.get_text(" ", strip=True)
+            if rule['split'] in text:
+                term, definition = text.split(rule['split'], 1)
+                pairs.append((term.strip(), definition.strip()))
+    else:
+        for item in soup.select(f"dl {rule['terms']}"):
+            dd = item.find_next_sibling(rule['definitions'])
+            term, definition = item.get_text(strip=True), dd.get_text(strip=True) if dd else ""
+            if term and definition:
+                pairs.append((term, definition))
+    return pairs
+
+
+def scaled(html, factor):
+    """The page with its body repeated `factor` times"""
+    if factor == 1:
+        return html
+    match = _BODY.search(html)
+    if not match:
+        return html * factor
+    return html[:match.start(2)] + match.group(2) * factor + html[match.end(2):]
+
+
+def time_it(parse, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = parse()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark glossary HTML parsing per backend")
+    parser.add_argument("--fixtures", default=str(GLOSSARY_FIXTURES))
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    fixtures = Fixtures(args.fixtures)
+    parsers = {backend: (lambda b: lambda html, rule: extract_pairs(html, rule, b))(backend)
+               for backend in available_backends()}
+    try:
+        import bs4  # noqa: F401
+        parsers["bs4 (previous)"] = legacy_pairs
+    except ImportError:
+        print("bs4 not installed: previous extraction not measured\n")
+
+    print(f"{'source':<10}{'scale':>7}{'KiB':>8}  {'parser':<16}{'terms':>7}{'ms':>10}{'speedup':>9}")
+    for name, spec in GLOSSARY_SOURCES.items():
+        try:
+            page = fixtures.get(spec['url'])
+        except LookupError:
+            print(f"{name:<10} no fixture (record one with tools/fetch_glossaries.py --record)")
+            continue
+        for factor in args.scale:
+            html = scaled(page, factor)
+            results = {label: time_it(lambda: parse(html, spec['rule']), args.runs)
+                       for label, parse in parsers.items()}
+            baseline = results.get("bs4 (previous)", results["html.parser"])[0]
+            reference = results["html.parser"][1]
+            for label, (seconds, pairs) in results.items():
+                flag = "" if pairs == reference else "  (differs from html.parser)"
+                print(f"{name:<10}{factor:>7}{len(html) / 1024:>8.0f}  {label:<16}{len(pairs):>7}"
+                      f"{seconds * 1000:>10.2f}{baseline / seconds:>8.1f}x{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+﻿"""
+Cold-import benchmark for the analysis core
+
+Each measurement runs in a fresh interpreter, which is what a worker
+process pays at start-up. Compares importing utils.nlp_engine against
+eagerly importing its heavy dependencies (the pre-refactor cost).
+
+Usage:
+    python tools/bench_import.py --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CASES = {
+    "utils.nlp_engine": "import utils.nlp_engine",
+    "nlp_engine + spacy + textstat": "import utils.nlp_engine, spacy, textstat",
+    "streamlit + spacy + textstat": "import streamlit, spacy, textstat",
+}
+
+_PROBE = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "{statement}\n"
+    "elapsed = time.perf_counter() - t\n"
+    "print(elapsed, 'streamlit' in sys.modules)\n"
+)
+
+
+def measure(statement, runs):
+    """Median wall time (seconds) of `statement` in fresh interpreters"""
+    timings = []
+    pulled_streamlit = False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(out[0]))
+        pulled_streamlit = out[1] == "True"
+    return statistics.median(timings), pulled_streamlit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cold import of the NLP core")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'import':<34}{'median ms':>12}  streamlit loaded")
+    for name, statement in CASES.items():
+        try:
+            seconds, pulled = measure(statement, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<34}{'n/a':>12}  ({e.stderr.strip().splitlines()[-1]})")
+            continue
+        print(f"{name:<34}{seconds * 1000:>12.1f}  {pulled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+﻿"""
+Benchmark UserProgressDB saves/sec with N concurrent writers
+
+Each writer thread repeatedly saves its own user's progress (a realistic
+session-state shape with sets and growing history lists).
+
+Usage:
+    python tools/bench_progress_db.py --writers 1 8 32 --saves 200
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.database import UserProgressDB  # noqa: E402
+
+
+def sample_progress(user_index, history=200):
+    return {
+        'vocab_mastered': {f"term{i}" for i in range(user_index % 50)},
+        'vocab_learning': {f"term{i}" for i in range(50, 80)},
+        'vocab_tracking': {f"term{i}": {'reviews': 2, 'last_difficulty': 'easy'} for i in range(100)},
+        'activity_log': [f"Added 'term{i}' to learning list - 10:00" for i in range(history)],
+        'quiz_history': [{'score': 7, 'total': 10, 'percentage': 70.0} for _ in range(history // 10)],
+        'streak_days': 3,
+    }
+
+
+def run(db, writers, saves):
+    barrier = threading.Barrier(writers + 1)
+
+    def writer(index):
+        progress = sample_progress(index)
+        barrier.wait()
+        for n in range(saves):
+            progress['streak_days'] = n
+            db.save(f"user{index}", progress)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return writers * saves / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent progress saves")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--saves", type=int, default=200, help="Saves per writer")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = UserProgressDB(Path(tmp) / "bench.db", legacy_json=None)
+        for writers in args.writers:
+            rate = run(db, writers, args.saves)
+            assert db.load("user0")['streak_days'] == args.saves - 1
+            print(f"{writers:>4} writers: {rate:>10.0f} saves/sec")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
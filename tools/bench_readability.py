@@ -0,0 +1,109 @@
+﻿"""
+Readability benchmark: textstat (five calls per text) vs utils.readability
+
+Scores every text of a corpus both ways with pyphen syllables only,
+reports any text whose scores differ, counts the texts whose scores the
+pronunciation lexicon changes, and times each engine over the whole
+corpus. The corpus is a
+directory of .txt files or a JSONL file (as for tools/batch_analyze.py);
+without one, abstract-length texts are assembled from the definitions
+and examples of data/omics_vocabulary_complete.csv.
+
+Usage:
+    python tools/bench_readability.py
+    python tools/bench_readability.py abstracts/ --runs 5
+    python tools/bench_readability.py theses.jsonl --text-field abstract
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from config import DATA_DIR  # noqa: E402
+from tools.batch_analyze import iter_texts  # noqa: E402
+from utils.readability import (clear_word_caches, readability_scores, syllable_cache_stats,  # noqa: E402
+                               use_lexicon)
+
+
+def textstat_scores(text):
+    """get_readability_score as it was: five textstat calls"""
+    import textstat
+
+    if not text or len(text.strip()) < 10:
+        return None
+    return {
+        'flesch_reading_ease': round(textstat.flesch_reading_ease(text), 1),
+        'flesch_kincaid_grade': round(textstat.flesch_kincaid_grade(text), 1),
+        'avg_sentence_length': round(textstat.avg_sentence_length(text), 1),
+        'difficult_words': textstat.difficult_words(text),
+        'reading_time_minutes': round(textstat.reading_time(text, ms_per_char=14.69) / 60, 1)
+    }
+
+
+def synthetic_abstracts(count, seed=0, sentences=(6, 12)):
+    frame = pd.read_csv(DATA_DIR / "omics_vocabulary_complete.csv")
+    pool = [s.strip() for column in ('definition', 'example') for s in frame[column].dropna().tolist()]
+    pool = [s if s.endswith((".", "!", "?")) else s + "." for s in pool if s]
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(pool) for _ in range(rng.randint(*sentences))) for _ in range(count)]
+
+
+def time_engine(score, texts, runs, reset):
+    timings = []
+    for _ in range(runs):
+        reset()
+        start = time.perf_counter()
+        for text in texts:
+            score(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare textstat and utils.readability scores and speed")
+    parser.add_argument("corpus", nargs="?", help="Directory of .txt files or a JSONL file (default: synthetic)")
+    parser.add_argument("--texts", type=int, default=2000, help="Synthetic corpus size")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the text")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        texts = [text for _, text in iter_texts(args.corpus, args.text_field)]
+    else:
+        texts = synthetic_abstracts(args.texts)
+    words = sum(len(text.split()) for text in texts)
+    print(f"{len(texts)} texts, {words} words")
+
+    use_lexicon(False)
+    mismatches = [(i, expected, actual) for i, text in enumerate(texts)
+                  if (expected := textstat_scores(text)) != (actual := readability_scores(text))]
+    for i, expected, actual in mismatches[:10]:
+        print(f"  text {i}: textstat {expected}\n          one-pass {actual}")
+    print(f"Scores identical for {len(texts) - len(mismatches)}/{len(texts)} texts")
+    plain = [readability_scores(text) for text in texts]
+    use_lexicon(True)
+    changed = sum(before != readability_scores(text) for before, text in zip(plain, texts))
+    print(f"Lexicon syllables change the scores of {changed}/{len(texts)} texts")
+
+    import textstat
+
+    baseline = time_engine(textstat_scores, texts, args.runs, textstat.textstat._cache_clear)
+    cold = time_engine(readability_scores, texts, args.runs, clear_word_caches)
+    warm = time_engine(readability_scores, texts, args.runs, lambda: None)
+    print(f"{'textstat (5 calls)':<26}{baseline * 1000:9.1f} ms  {baseline / len(texts) * 1e6:8.1f} us/text")
+    for label, seconds in (("one-pass, cold syllables", cold), ("one-pass, warm syllables", warm)):
+        print(f"{label:<26}{seconds * 1000:9.1f} ms  {seconds / len(texts) * 1e6:8.1f} us/text  "
+              f"{baseline / seconds:5.1f}x")
+    print(f"Syllable cache: {syllable_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
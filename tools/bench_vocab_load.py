@@ -0,0 +1,97 @@
+﻿"""
+Vocabulary load benchmark: CSV vs JSON vs compiled (memory-mapped)
+
+Scales the shipped vocabulary up to N synthetic entries, writes it in each
+format to a temporary directory, and measures load time and resident
+memory growth in fresh interpreters (what every app process pays).
+
+Usage:
+    python tools/bench_vocab_load.py --rows 1000 10000 100000
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from utils.compiled_vocab import compile_vocabulary  # noqa: E402
+from utils.vocab_store import VOCAB_FILE  # noqa: E402
+
+CASES = {
+    "csv (pandas)": "import pandas as pd; data = pd.read_csv({path!r})",
+    "json (entries)": "import json; data = json.load(open({path!r}, encoding='utf-8'))",
+    "compiled (open)": "from utils.compiled_vocab import CompiledVocabulary; data = CompiledVocabulary({path!r}); data[0]",
+    "compiled (frame)": "from utils.compiled_vocab import CompiledVocabulary; data = CompiledVocabulary({path!r}).to_frame()",
+    # What the vocabulary page does per run: open the store, filter on codes, decode one view
+    "store (page view)": ("from utils.vocab_store import VocabularyStore; s = VocabularyStore({path!r}).snapshot(); "
+                          "p = numpy.flatnonzero(s.isin('difficulty', ['beginner'])); data = s.rows(p[:20])"),
+}
+
+_PROBE = (
+    "import time\n"
+    "import numpy, pandas, json\n"
+    "def rss():\n"
+    "    with open('/proc/self/statm') as f:\n"
+    "        return int(f.read().split()[1]) * 4096\n"
+    "before = rss()\n"
+    "t = time.perf_counter()\n"
+    "{statement}\n"
+    "print(time.perf_counter() - t, rss() - before)\n"
+)
+
+
+def synthetic(frame, rows):
+    """Repeat the vocabulary with numbered terms until it has `rows` entries"""
+    copies = -(-rows // len(frame))
+    big = pd.concat([frame] * copies, ignore_index=True).iloc[:rows].copy()
+    big['term'] = big['term'] + " " + (big.index // len(frame)).astype(str)
+    return big
+
+
+def measure(statement, runs):
+    timings, growth = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(out[0]))
+        growth.append(int(out[1]))
+    return statistics.median(timings), statistics.median(growth)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vocabulary loading per storage format")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    base = pd.read_csv(VOCAB_FILE)
+    print(f"{'rows':>8}  {'format':<18}{'size KiB':>10}{'load ms':>10}{'RSS +MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for rows in args.rows:
+            frame = synthetic(base, rows)
+            csv_path, json_path, vocab_path = tmp / "v.csv", tmp / "v.json", tmp / "v.vocab"
+            frame.to_csv(csv_path, index=False)
+            json_path.write_text(json.dumps(frame.to_dict("records"), indent=2, ensure_ascii=False), encoding="utf-8")
+            compile_vocabulary(frame, vocab_path, source=csv_path)
+
+            paths = {"csv": csv_path, "json": json_path, "compiled": vocab_path, "store": csv_path}
+            for name, statement in CASES.items():
+                path = paths[name.split()[0]]
+                size = (sum(f.stat().st_size for f in path.iterdir()) if path.is_dir() else path.stat().st_size)
+                seconds, grown = measure(statement.format(path=str(path)), args.runs)
+                print(f"{rows:>8}  {name:<18}{size / 1024:>10.0f}{seconds * 1000:>10.1f}{grown / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
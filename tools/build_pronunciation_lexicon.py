@@ -0,0 +1,45 @@
+﻿"""
+Build the compiled pronunciation lexicon from the vocabulary data
+
+Run after the vocabulary CSVs change (e.g. a merged glossary batch):
+    python tools/build_pronunciation_lexicon.py
+    python tools/build_pronunciation_lexicon.py --show metagenomics CRISPR-Cas9 "RNA-seq"
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import PRONUNCIATION_LEXICON_DIR, PRONUNCIATION_SOURCES  # noqa: E402
+from utils.pronunciation import PronunciationLexicon, build_from_sources, generate_entry, lexicon_key  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the term -> syllables/IPA/stress lexicon")
+    parser.add_argument("sources", nargs="*", default=[str(s) for s in PRONUNCIATION_SOURCES],
+                        help="Vocabulary CSVs, highest priority first")
+    parser.add_argument("--out", default=str(PRONUNCIATION_LEXICON_DIR), help="Lexicon directory")
+    parser.add_argument("--show", nargs="*", default=[], metavar="TERM", help="Print the entries of these terms")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    manifest = build_from_sources(args.sources, args.out)
+    elapsed = time.perf_counter() - start
+    origins = ", ".join(f"{count} {origin}" for origin, count in manifest['origins'].items())
+    print(f"{manifest['rows']} entries ({origins}) in {manifest['slots']} slots, {elapsed:.2f}s -> {args.out}")
+
+    lexicon = PronunciationLexicon(args.out)
+    for term in args.show:
+        entry = lexicon.get(lexicon_key(term))
+        if entry is None:
+            entry = dict(generate_entry(term, lexicon) or {}, origin="not in lexicon, generated")
+        print(f"  {term}: {entry.get('syllables')} ({entry.get('syllable_count')} syllables) "
+              f"/{entry.get('ipa') or '?'}/ {entry.get('stress_text')} [{entry.get('origin')}]")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+﻿"""
+Build the quiz distractor similarity index for the vocabulary
+
+Run after the vocabulary CSV changes (e.g. a merged glossary batch):
+    python tools/build_similarity_index.py              # incremental update
+    python tools/build_similarity_index.py --full -k 10 # rebuild from scratch
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from config import SIMILARITY_INDEX_DIR, SIMILARITY_NEIGHBOURS  # noqa: E402
+from utils.similarity_index import SimilarityIndex, build_similarity_index  # noqa: E402
+from utils.vocab_store import VOCAB_FILE  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build nearest-neighbour definitions for quiz distractors")
+    parser.add_argument("--vocab", default=str(VOCAB_FILE), help="Vocabulary CSV")
+    parser.add_argument("--out", default=str(SIMILARITY_INDEX_DIR), help="Index directory")
+    parser.add_argument("-k", type=int, default=SIMILARITY_NEIGHBOURS, help="Neighbours kept per term")
+    parser.add_argument("--full", action="store_true", help="Ignore the existing index")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="Print neighbours of the first N terms")
+    args = parser.parse_args(argv)
+
+    frame = pd.read_csv(args.vocab)
+    start = time.perf_counter()
+    stats = build_similarity_index(frame, args.out, k=args.k, incremental=not args.full)
+    elapsed = time.perf_counter() - start
+
+    print(f"{stats['mode']} build: {stats['recomputed']}/{stats['rows']} rows recomputed "
+          f"(k={stats['k']}) in {elapsed:.2f}s -> {args.out}")
+
+    if args.show:
+        index = SimilarityIndex.load(args.out)
+        terms = frame['term'].to_numpy()
+        for row in range(min(args.show, len(frame))):
+            nearest = [terms[n] for n in index.neighbours_for(np.array([row]), 3)[0] if n >= 0]
+            print(f"  {terms[row]}: {', '.join(nearest) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+﻿"""
+Build the runtime vocabulary from the declared sources (config.VOCAB_SOURCES)
+
+    python tools/build_vocabulary.py            # incremental: only changed sources are re-read
+    python tools/build_vocabulary.py --force    # rebuild every stage
+
+Run python tools/fetch_glossaries.py first: the 'extracted' source reads
+its output (tools/extracted/*.json). A declared source that matches no
+file (e.g. the institutional CSV batches before they are added) is
+skipped with a note rather than failing the build.
+
+Writes data/omics_vocabulary.csv, its compiled artifact, the quiz
+similarity index, the pronunciation lexicon and
+data/omics_vocabulary.merges.json, the report of
+terms merged by normalization and near-duplicate detection (plus pairs
+left for review). Stage outputs are cached in .build_cache/vocabulary.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from config import BASE_DIR, PRONUNCIATION_SOURCES, VOCAB_BUILD_CACHE, VOCAB_MERGE_MEMORY_LIMIT  # noqa: E402
+from utils.pronunciation import build_from_sources  # noqa: E402
+from utils.similarity_index import build_similarity_index  # noqa: E402
+from utils.vocab_build import StageCache, build_vocabulary, merge_report_path  # noqa: E402
+from utils.vocab_store import VOCAB_FILE  # noqa: E402
+from utils.vocab_stream import parse_size  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the runtime vocabulary with cached stages")
+    parser.add_argument("-o", "--output", default=str(BASE_DIR / VOCAB_FILE), help="Runtime CSV to write")
+    parser.add_argument("--cache", default=str(VOCAB_BUILD_CACHE), help="Stage cache directory")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs")
+    parser.add_argument("--no-similarity", action="store_true", help="Skip the quiz similarity index")
+    parser.add_argument("--no-pronunciation", action="store_true", help="Skip the pronunciation lexicon")
+    parser.add_argument("--memory-limit", type=parse_size, default=VOCAB_MERGE_MEMORY_LIMIT,
+                        help="Merge memory budget, e.g. 64M (larger inputs are merged out of core)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = build_vocabulary(args.output, cache=StageCache(args.cache), force=args.force,
+                              memory_limit=args.memory_limit)
+
+    if result['changed'] and not args.no_similarity:
+        stats = build_similarity_index(pd.read_csv(args.output))
+        print(f"  built   similarity index ({stats['mode']}, {stats['recomputed']} rows)")
+
+    # The lexicon is built from the runtime CSV; a build to another path leaves it alone
+    is_source = Path(args.output).resolve() in {Path(s).resolve() for s in PRONUNCIATION_SOURCES}
+    if result['changed'] and is_source and not args.no_pronunciation:
+        manifest = build_from_sources()
+        print(f"  built   pronunciation lexicon ({manifest['rows']} entries)")
+
+    if result['changed']:
+        report = result['report']
+        print(f"  merged  {sum(len(e['variants']) for e in report['canonicalized'])} spelling variants, "
+              f"{sum(len(c['merged']) for c in report['near_duplicates'])} near duplicates; "
+              f"{len(report['review'])} pairs to review in {merge_report_path(args.output)}")
+        print(f"Wrote {result['rows']} terms to {args.output} in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"Up to date ({time.perf_counter() - start:.3f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+﻿"""
+Compile vocabulary CSV/JSON files into the memory-mapped columnar format
+
+    python tools/compile_vocabulary.py                                 # data/omics_vocabulary.csv
+    python tools/compile_vocabulary.py data/omics_vocabulary_clean.json -o data/clean.vocab
+
+The app picks up data/<name>.vocab automatically while it matches the
+content of data/<name>.csv (see utils/compiled_vocab.py).
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from utils.compiled_vocab import compile_vocabulary, compiled_path  # noqa: E402
+from utils.vocab_store import VOCAB_FILE  # noqa: E402
+
+
+def read_source(path):
+    """DataFrame for a CSV, or entry list for a JSON vocabulary"""
+    path = Path(path)
+    if path.suffix == ".json":
+        return json.loads(path.read_text(encoding="utf-8"))
+    return pd.read_csv(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a vocabulary into the columnar format")
+    parser.add_argument("sources", nargs="*", default=[str(VOCAB_FILE)], help="CSV or JSON files")
+    parser.add_argument("-o", "--output", help="Artifact directory (single source only)")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.sources) > 1:
+        parser.error("--output needs a single source")
+
+    for source in args.sources:
+        out = Path(args.output) if args.output else compiled_path(source)
+        start = time.perf_counter()
+        manifest = compile_vocabulary(read_source(source), out, source=source)
+        size = sum(f.stat().st_size for f in out.iterdir())
+        kinds = ", ".join(f"{name}:{spec['kind']}" for name, spec in manifest['columns'].items())
+        print(f"{source} -> {out}: {manifest['rows']} rows, {size / 1024:.1f} KiB "
+              f"in {time.perf_counter() - start:.2f}s ({kinds})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
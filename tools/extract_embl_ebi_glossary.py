@@ -1,33 +1,15 @@
-﻿import requests
-from bs4 import BeautifulSoup
-import json
+﻿"""
+Extract the EMBL-EBI glossary to tools/extracted/ (see tools/fetch_glossaries.py)
 
-URL = "https://www.embl.org/ells/teachingbase/ells-glossary/"
-OUT_JSON = "tools/extracted/embl_ebi_glossary.json"
+    python tools/extract_embl_ebi_glossary.py [--offline]
+"""
 
-r = requests.get(URL)
-soup = BeautifulSoup(r.text, "html.parser")
+import sys
+from pathlib import Path
 
-entries = []
-for li in soup.select("li"):
-    text = li.get_text(" ", strip=True)
-    if "–" in text:
-        term, definition = text.split("–", 1)
-        entries.append({
-            "term": term.strip(),
-            "definition": definition.strip(),
-            "field": "Omics & Bioinformatics",
-            "difficulty": "Intermediate",
-            "usage_example": "",
-            "synonyms": [],
-            "related_terms": [],
-            "methods": [],
-            "applications": [],
-            "references": [{"source": "EMBL-EBI", "url": URL}],
-            "provenance": "embl_ebi_glossary"
-        })
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-with open(OUT_JSON, "w", encoding="utf-8") as f:
-    json.dump(entries, f, indent=2, ensure_ascii=False)
+from tools.fetch_glossaries import main  # noqa: E402
 
-print(f"Extracted {len(entries)} terms to {OUT_JSON}")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main(["embl_ebi", *sys.argv[1:]]))
@@ -0,0 +1,86 @@
+﻿"""
+Fetch and parse the online glossaries concurrently
+
+    python tools/fetch_glossaries.py                    # all sources
+    python tools/fetch_glossaries.py ncbi               # one source
+    python tools/fetch_glossaries.py --offline          # replay saved fixtures, no network
+    python tools/fetch_glossaries.py --record           # fetch and save pages as fixtures
+    python tools/fetch_glossaries.py --offline --repeat 20 --no-write   # parse benchmark
+
+Responses are cached on disk and revalidated with ETag / Last-Modified, so
+an unchanged page costs a 304. Requests to one host are spaced out by
+config.GLOSSARY_RATE_LIMITS. Sources are declared in config.GLOSSARY_SOURCES;
+output goes to tools/extracted/, which the vocabulary build
+(tools/build_vocabulary.py) reads.
+"""
+
+import argparse
+import dataclasses
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import (BASE_DIR, GLOSSARY_FIXTURES, GLOSSARY_HTTP_CACHE,  # noqa: E402
+                    GLOSSARY_RATE_LIMITS, GLOSSARY_SOURCES, GLOSSARY_TIMEOUT)
+from utils.glossary_fetch import GlossaryFetcher, run_sources  # noqa: E402
+from utils.glossary_parse import available_backends  # noqa: E402
+from utils.glossary_sources import load_sources  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch glossary pages and extract their terms")
+    parser.add_argument("sources", nargs="*", help=f"Sources to fetch: {', '.join(GLOSSARY_SOURCES)} (default: all)")
+    parser.add_argument("--offline", action="store_true", help="Replay saved fixtures instead of fetching")
+    parser.add_argument("--record", action="store_true", help="Save fetched pages as fixtures")
+    parser.add_argument("--fixtures", default=str(GLOSSARY_FIXTURES))
+    parser.add_argument("--cache", default=str(GLOSSARY_HTTP_CACHE), help="HTTP response cache directory")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--timeout", type=float, default=GLOSSARY_TIMEOUT)
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU, 0: none)")
+    parser.add_argument("--backend", choices=available_backends(), help="HTML parser (default: fastest installed)")
+    parser.add_argument("--repeat", type=int, default=1, help="Run N times and report timings")
+    parser.add_argument("--no-write", action="store_true", help="Do not write tools/extracted/*.json")
+    args = parser.parse_args(argv)
+
+    if args.offline and args.record:
+        parser.error("--offline and --record are exclusive")
+    unknown = [name for name in args.sources if name not in GLOSSARY_SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+
+    registry = load_sources(backend=args.backend)
+    sources = [registry[name] for name in (args.sources or registry)]
+    sources = [dataclasses.replace(s, output=None if args.no_write else str(Path(BASE_DIR) / s.output))
+               for s in sources]
+
+    timings = []
+    for _ in range(args.repeat):
+        fetcher = GlossaryFetcher(
+            cache_dir=None if args.no_cache or args.offline else args.cache,
+            fixtures_dir=args.fixtures if args.offline or args.record else None,
+            offline=args.offline,
+            record=args.record,
+            rates=GLOSSARY_RATE_LIMITS,
+            timeout=args.timeout,
+        )
+        start = time.perf_counter()
+        results = run_sources(sources, fetcher, workers=args.workers)
+        timings.append(time.perf_counter() - start)
+
+    for source, fetched, entries, parse_seconds in results:
+        print(f"{source.name:<10} {len(entries):>5} terms  {fetched.source:<11} "
+              f"fetch {fetched.seconds * 1000:8.1f} ms  parse {parse_seconds * 1000:8.1f} ms"
+              + (f"  -> {source.output}" if source.output else ""))
+    if args.repeat > 1:
+        print(f"\n{args.repeat} runs: median {statistics.median(timings) * 1000:.1f} ms, "
+              f"min {min(timings) * 1000:.1f} ms")
+    else:
+        print(f"\nTotal {timings[0] * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+﻿"""
+Load test for the Writing Assistant analysis
+
+Simulates concurrent writers: each keeps a multi-paragraph draft, edits one
+paragraph at a time with a think time between edits, and waits for the
+analysis of every edit. Reports edit-to-result latency percentiles.
+
+    python tools/load_test_analysis.py --writers 50 --edits 10
+    python tools/load_test_analysis.py --writers 50 --mode sync      # in-thread baseline
+    python tools/load_test_analysis.py --model blank:en               # without the spaCy model
+
+--mode pool uses the background job service (utils.analysis_jobs);
+--mode sync runs utils.incremental_analysis.analyze_draft in each writer's
+thread, as the Streamlit script thread does without the service.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from config import SPACY_MODEL, WRITING_JOB_QUEUE_SIZE  # noqa: E402
+from utils.analysis_jobs import AnalysisService, QueueFullError, _load_worker_model  # noqa: E402
+from utils.incremental_analysis import analyze_draft  # noqa: E402
+from utils.vocab_store import VOCAB_FILE  # noqa: E402
+
+
+def sentence_pool():
+    frame = pd.read_csv(ROOT / VOCAB_FILE)
+    sentences = [s for column in ('definition', 'example') for s in frame[column].dropna().tolist()]
+    return [s if s.endswith(".") else s + "." for s in sentences]
+
+
+def paragraph(rng, pool, sentences=(3, 6)):
+    return " ".join(rng.choice(pool) for _ in range(rng.randint(*sentences)))
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def writer(index, args, pool, analyze, results):
+    rng = random.Random(args.seed * 1000 + index)
+    draft = [paragraph(rng, pool) + f" Draft {index}." for _ in range(args.paragraphs)]
+    for edit in range(args.edits):
+        time.sleep(rng.expovariate(1 / args.think) if args.think else 0)
+        draft[rng.randrange(len(draft))] += f" {rng.choice(pool)} Edit {index}.{edit}."
+        started = time.perf_counter()
+        try:
+            analyze(f"writer-{index}", "\n\n".join(draft))
+        except QueueFullError:
+            results['rejected'] += 1
+            continue
+        results['latencies'].append(time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Edit-to-result latency under concurrent writers")
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=10, help="Edits per writer")
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per draft")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean seconds between a writer's edits")
+    parser.add_argument("--mode", choices=("pool", "sync"), default="pool")
+    parser.add_argument("--workers", type=int, default=None, help="Pool processes (default: one per core)")
+    parser.add_argument("--queue-size", type=int, default=WRITING_JOB_QUEUE_SIZE)
+    parser.add_argument("--model", default=SPACY_MODEL, help="spaCy model, or blank:en for tokenizer only")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pool = sentence_pool()
+    results = {'latencies': [], 'rejected': 0}
+
+    if args.mode == "pool":
+        service = AnalysisService(workers=args.workers, queue_size=args.queue_size, model=args.model)
+
+        def analyze(session, text):
+            job = service.submit(session, text)
+            while not job.wait(timeout=1.0):
+                pass
+            return job.result()
+
+        # Start the workers and load their models before measuring
+        warmup = [service.submit(f"warmup-{i}", f"Warm up paragraph number {i}.") for i in range(service.workers * 2)]
+        for job in warmup:
+            job.wait()
+        workers = f"{service.workers} processes"
+    else:
+        nlp = _load_worker_model('full', args.model)
+        service = None
+
+        def analyze(session, text):
+            return analyze_draft(text, nlp)
+
+        workers = "script threads"
+
+    threads = [threading.Thread(target=writer, args=(i, args, pool, analyze, results)) for i in range(args.writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if service is not None:
+        stats = service.stats()
+        service.shutdown()
+
+    latencies = [s * 1000 for s in results['latencies']]
+    print(f"{args.writers} writers x {args.edits} edits, {args.paragraphs} paragraphs, "
+          f"think {args.think}s, {args.mode} ({workers}), model {args.model}")
+    if latencies:
+        print(f"  edit -> result  p50 {percentile(latencies, 50):7.1f} ms   p95 {percentile(latencies, 95):7.1f} ms   "
+              f"p99 {percentile(latencies, 99):7.1f} ms   max {max(latencies):7.1f} ms   "
+              f"mean {statistics.mean(latencies):7.1f} ms")
+    print(f"  {len(latencies)} edits analyzed, {results['rejected']} rejected (queue full), "
+          f"{len(latencies) / elapsed:.1f} edits/s")
+    if service is not None:
+        print(f"  service: {stats}")
+
+
+if __name__ == "__main__":
+    main()
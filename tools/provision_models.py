@@ -0,0 +1,58 @@
+﻿"""
+Provision and verify the spaCy model used by the app
+
+Run once at build/deploy time (the app never downloads models itself):
+    python tools/provision_models.py            # download if missing, then verify
+    python tools/provision_models.py --check    # readiness check only, exit 1 if not ready
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import SPACY_MODEL, SPACY_PROFILES  # noqa: E402
+from utils.nlp_engine import ModelNotAvailableError, check_model_ready  # noqa: E402
+
+
+def is_installed(model):
+    import spacy.util
+
+    return spacy.util.is_package(model) or Path(model).exists()
+
+
+def download(model):
+    from spacy.cli import download as spacy_download
+
+    print(f"Downloading {model} ...")
+    spacy_download(model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Provision the spaCy model and check readiness")
+    parser.add_argument("--check", action="store_true", help="Only verify; never download")
+    parser.add_argument("--profiles", nargs="+", default=list(SPACY_PROFILES),
+                        choices=list(SPACY_PROFILES), help="Profiles to load during the check")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    if not args.check and not is_installed(SPACY_MODEL):
+        download(SPACY_MODEL)
+
+    try:
+        stats = check_model_ready(args.profiles)
+    except ModelNotAvailableError as e:
+        print(f"NOT READY: {e}", file=sys.stderr)
+        return 1
+
+    for profile, info in stats.items():
+        print(f"{profile:<10} loaded in {info['load_seconds']:.2f}s  pipes={','.join(info['pipes']) or '-'}")
+    print(f"Ready in {time.perf_counter() - start:.2f}s from cold start")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+﻿"""
+Compare spaced-repetition algorithms on a learner's review history
+
+Replays the flashcard history, then simulates N more days under each
+algorithm and reports the review load and predicted retention:
+    python tools/simulate_scheduling.py --user <user_id> --days 60
+    python tools/simulate_scheduling.py --export progress.json --days 60
+
+History comes from the database's review log (every flashcard answer,
+kept through event compaction) or, for an exported progress JSON, from
+vocab_tracking (last answer per term). Terms answered before the review
+log existed contribute their last answer from vocab_tracking.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.database import UserProgressDB, decode_progress  # noqa: E402
+from utils.scheduler import GRADE_CODES, epoch_day  # noqa: E402
+from utils.spaced_repetition import ALGORITHMS, simulate  # noqa: E402
+
+
+def history_from_reviews(db, user_id):
+    """(term, epoch_day, grade) for every flashcard answer in the review log"""
+    return [
+        (term, epoch_day(reviewed_at), GRADE_CODES[difficulty])
+        for term, difficulty, reviewed_at in db.iter_reviews(user_id)
+        if difficulty in GRADE_CODES
+    ]
+
+
+def history_from_tracking(vocab_tracking):
+    """(term, epoch_day, grade) from vocab_tracking; only the latest answer is kept there"""
+    return [
+        (term, epoch_day(data['last_review']), GRADE_CODES[data['last_difficulty']])
+        for term, data in vocab_tracking.items()
+        if data.get('last_review') and data.get('last_difficulty') in GRADE_CODES
+    ]
+
+
+def load_history(args):
+    if args.export:
+        progress = decode_progress(Path(args.export).read_text(encoding="utf-8"))
+        if args.user:
+            progress = progress.get(args.user, {})
+        return history_from_tracking(progress.get('vocab_tracking', {}))
+
+    db = UserProgressDB(args.db, legacy_json=None)
+    try:
+        history = history_from_reviews(db, args.user)
+        logged = {term for term, _, _ in history}
+        tracked = history_from_tracking((db.load(args.user) or {}).get('vocab_tracking', {}))
+        return [record for record in tracked if record[0] not in logged] + history
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate review load and retention per algorithm")
+    parser.add_argument("--user", help="User id in the progress database (or key in --export)")
+    parser.add_argument("--export", help="Exported progress JSON instead of the database")
+    parser.add_argument("--db", default="data/user_progress.db")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    args = parser.parse_args(argv)
+
+    if not args.user and not args.export:
+        parser.error("one of --user or --export is required")
+
+    history = load_history(args)
+    if not history:
+        print("No flashcard history found", file=sys.stderr)
+        return 1
+
+    terms = len({term for term, _, _ in history})
+    print(f"Replayed {len(history)} reviews of {terms} terms; simulating {args.days} days\n")
+    print(f"{'algorithm':<10}{'reviews/day':>13}{'peak':>7}{'total':>8}{'retention':>11}{'final':>8}")
+    for name in args.algorithms:
+        result = simulate(history, name, days=args.days, seed=args.seed)
+        reviews, retention = result['reviews_per_day'], result['retention']
+        print(f"{name:<10}{reviews.mean():>13.1f}{reviews.max():>7}{reviews.sum():>8}"
+              f"{retention.mean():>11.1%}{retention[-1]:>8.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
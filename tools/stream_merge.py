@@ -0,0 +1,62 @@
+﻿"""
+Merge glossary files into one deduplicated NDJSON file with bounded memory
+
+Streaming counterpart of dedupe_vocab.py / merge_csv_to_json.py: sources
+are read incrementally, duplicates are grouped by hash-partitioning on the
+normalized term, and the output is written line by line.
+
+    python tools/stream_merge.py tools/extracted/*.json CSV/*.csv -o data/omics_vocabulary_expanded.ndjson
+    python tools/stream_merge.py big.ndjson -o merged.ndjson --memory-limit 64M
+
+Earlier inputs take priority for scalar fields; --authoritative marks the
+first input's definitions as final.
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import VOCAB_MERGE_MEMORY_LIMIT  # noqa: E402
+from utils.vocab_build import merge_entries, normalize_key, unify_entry  # noqa: E402
+from utils.vocab_stream import iter_records, merge_stream, parse_size, write_ndjson  # noqa: E402
+
+
+def unified(path):
+    provenance = f"extracted_from_{Path(path).stem}"
+    for raw in iter_records(path):
+        entry = unify_entry(raw, provenance)
+        if entry is not None:
+            yield entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming, memory-bounded glossary merge")
+    parser.add_argument("inputs", nargs="+", help="CSV, JSON or NDJSON glossary files, in priority order")
+    parser.add_argument("-o", "--output", required=True, help="Output .ndjson file")
+    parser.add_argument("--memory-limit", type=parse_size, default=VOCAB_MERGE_MEMORY_LIMIT,
+                        help="Memory budget for grouping, e.g. 64M")
+    parser.add_argument("--authoritative", action="store_true", help="Keep the first input's definitions")
+    parser.add_argument("--workdir", help="Directory for spill files (default: system temp)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    sources = [(unified(path), args.authoritative and i == 0) for i, path in enumerate(args.inputs)]
+    expected = sum(Path(path).stat().st_size for path in args.inputs)
+    stats = {}
+    merged = merge_stream(sources, lambda e: normalize_key(e['term']), merge_entries,
+                          args.memory_limit, expected_bytes=expected, workdir=args.workdir, stats=stats)
+    count = write_ndjson(merged, args.output)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{stats['records']} records -> {count} entries in {args.output} "
+          f"({time.perf_counter() - start:.2f}s, {stats['partitions']} partitions, "
+          f"{stats['repartitioned']} re-split, peak RSS {peak:.0f} MiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+﻿"""
+Background analysis job service for the Writing Assistant
+
+Drafts are analyzed by a process pool (one worker per core, each holding
+its own spaCy model) instead of in the Streamlit script thread:
+
+- a job is the set of segments of a draft (utils.incremental_analysis)
+  whose stats are not cached yet; each segment is one task
+- the queue is bounded: a submission that would exceed
+  WRITING_JOB_QUEUE_SIZE pending tasks raises QueueFullError
+- submitting newer text for a session cancels that session's previous job
+  (tasks not yet started are dropped; a task shared with another session's
+  job keeps running); submitting unchanged text returns the running job,
+  so a rerun of the page keeps following it
+- a finished job is forgotten once its result has been read, and finished
+  jobs nobody read are swept when more sessions than queue slots are held
+- results go to the shared per-segment cache, so identical paragraphs are
+  analyzed once across sessions, and a job's partial result aggregates the
+  segments completed so far
+- a pool broken by a crashed worker (or one whose initializer failed) is
+  replaced on the next submission; after POOL_RESTART_LIMIT consecutive
+  broken pools submit() raises AnalysisUnavailableError and callers fall
+  back to analyzing in their own thread
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from config import SPACY_MODEL, WRITING_ANALYSIS_WORKERS, WRITING_JOB_QUEUE_SIZE
+from utils.incremental_analysis import aggregate_draft, get_segment_cache, segment_stats, split_segments
+
+
+POOL_RESTART_LIMIT = 3
+
+
+class QueueFullError(RuntimeError):
+    """The analysis queue is at capacity; submit again shortly"""
+
+
+class AnalysisUnavailableError(RuntimeError):
+    """The worker pool keeps breaking (e.g. the model cannot load in a worker)"""
+
+
+# -- worker process -------------------------------------------------------------
+
+_worker_nlp = None
+
+
+def _load_worker_model(profile, model):
+    """spaCy pipeline of a worker; 'blank:<lang>' gives a tokenizer + sentencizer only"""
+    if model.startswith("blank:"):
+        import spacy
+
+        nlp = spacy.blank(model.split(":", 1)[1])
+        nlp.add_pipe('sentencizer')
+        return nlp
+    from utils.nlp_engine import load_model
+
+    return load_model(profile, model)
+
+
+def _init_worker(profile, model):
+    global _worker_nlp
+    _worker_nlp = _load_worker_model(profile, model)
+
+
+def _analyze_segment(segment):
+    return segment_stats(segment, _worker_nlp)
+
+
+# -- service ------------------------------------------------------------------
+
+class AnalysisJob:
+    """One submitted draft; poll result() for the partial analysis"""
+
+    def __init__(self, service, session_id, segments, parts, futures, keys):
+        self.service = service
+        self.session_id = session_id
+        self.segments = segments
+        self.parts = parts  # per segment: stats or None while pending
+        self.futures = futures  # segment index -> Future
+        self.keys = keys  # segment index -> cache key
+        self.cancelled = False
+        self.submitted = time.perf_counter()
+        self.finished = None
+
+    def done(self):
+        return self.cancelled or all(f.done() for f in self.futures.values())
+
+    def failed(self):
+        return any(f.done() and not f.cancelled() and f.exception() is not None for f in self.futures.values())
+
+    def wait(self, timeout=None):
+        """Block until at least one more segment completes (or timeout); returns done()"""
+        pending = [f for f in self.futures.values() if not f.done()]
+        if pending and not self.cancelled:
+            wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        return self.done()
+
+    def cancel(self):
+        if not self.done():
+            self.cancelled = True
+            self.service._release(self)
+
+    def result(self):
+        """Aggregated analysis of the completed segments plus progress
+
+        Adds 'completed' and 'pending' segment counts and 'error' (the
+        first worker failure, if any) to the analyze_draft keys.
+        """
+        error = None
+        for index, future in self.futures.items():
+            if self.parts[index] is None and future.done() and not future.cancelled():
+                if future.exception() is not None:
+                    error = error or future.exception()
+                else:
+                    self.parts[index] = future.result()
+        completed = [part for part in self.parts if part is not None]
+        if self.finished is None and len(completed) == len(self.parts):
+            self.finished = time.perf_counter()
+        seconds = (self.finished or time.perf_counter()) - self.submitted
+        draft = aggregate_draft(completed, reanalyzed=len(self.futures), seconds=seconds)
+        draft.update(segments=len(self.segments), completed=len(completed),
+                     pending=len(self.parts) - len(completed), error=error)
+        if self.done():
+            # A rerun with the same text finds every segment cached
+            self.service._forget(self)
+        return draft
+
+
+class AnalysisService:
+    """Process pool + bounded queue + per-session cancellation + result cache"""
+
+    def __init__(self, workers=None, queue_size=WRITING_JOB_QUEUE_SIZE, profile='full', model=SPACY_MODEL):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.profile = profile
+        self.model = model
+        # Same cache key as the in-thread analysis of the process-wide model
+        self.pipeline = profile if model == SPACY_MODEL else f"{model}/{profile}"
+        self.cache = get_segment_cache()
+        self.pending = 0
+        self.rejected = 0
+        self._jobs = {}  # session -> latest job
+        self._inflight = {}  # cache key -> [future, jobs referencing it]
+        # Re-entrant: a done callback runs in the calling thread when a future
+        # is cancelled or already finished while the lock is held
+        self._lock = threading.RLock()
+        self._executor = None
+        self.broken_pools = 0  # consecutive pools lost to BrokenProcessPool
+        self.failure = None  # the last BrokenProcessPool, once the restart limit is reached
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: never fork a process that is running Streamlit's threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.profile, self.model))
+        return self._executor
+
+    def _discard_executor(self, executor, error):
+        """Drop a broken pool so the next submission starts a fresh one"""
+        with self._lock:
+            if executor is not self._executor:
+                return  # already replaced
+            self._executor = None
+            self.broken_pools += 1
+            if self.broken_pools >= POOL_RESTART_LIMIT:
+                self.failure = error
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_task(self, segment):
+        """(future, executor) for one segment, replacing a pool found broken"""
+        while True:
+            if self.failure is not None:
+                raise AnalysisUnavailableError(f"Analysis workers keep failing: {self.failure}") from self.failure
+            executor = self._get_executor()
+            try:
+                return executor.submit(_analyze_segment, segment), executor
+            except BrokenProcessPool as exc:
+                self._discard_executor(executor, exc)
+
+    def submit(self, session_id, text):
+        """Start analyzing text for a session, cancelling its previous job"""
+        segments = split_segments(text)
+        keys = [self.cache.key(segment, self.pipeline) for segment in segments]
+        parts = [self.cache.lookup(key) for key in keys]
+
+        with self._lock:
+            previous = self._jobs.get(session_id)
+            if (previous is not None and not previous.cancelled and previous.segments == segments
+                    and not previous.failed()):
+                # Rerun with unchanged text: keep following the same job
+                return previous
+            self._jobs.pop(session_id, None)
+            if previous is not None and not previous.done():
+                previous.cancelled = True
+                self._release_locked(previous)
+
+            missing = [i for i, part in enumerate(parts) if part is None]
+            new = {keys[i] for i in missing if keys[i] not in self._inflight}
+            if self.pending + len(new) > self.queue_size:
+                self.rejected += 1
+                raise QueueFullError(f"{self.pending} analysis tasks queued (limit {self.queue_size})")
+
+            futures = {}
+            job = AnalysisJob(self, session_id, segments, parts, futures, {i: keys[i] for i in missing})
+            try:
+                for i in missing:
+                    entry = self._inflight.get(keys[i])
+                    if entry is None:
+                        future, executor = self._submit_task(segments[i])
+                        entry = self._inflight[keys[i]] = [future, 0]
+                        self.pending += 1
+                        future.add_done_callback(
+                            lambda f, key=keys[i], executor=executor: self._finished(key, f, executor))
+                    entry[1] += 1
+                    futures[i] = entry[0]
+            except AnalysisUnavailableError:
+                self._release_locked(job)
+                raise
+            self._jobs[session_id] = job
+            if len(self._jobs) > self.queue_size:
+                for session, other in list(self._jobs.items()):
+                    if other.done():
+                        del self._jobs[session]
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            if self._jobs.get(job.session_id) is job:
+                del self._jobs[job.session_id]
+
+    def _finished(self, key, future, executor):
+        with self._lock:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is future:
+                del self._inflight[key]
+                self.pending -= 1
+        if future.cancelled():
+            return
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor, error)
+        elif error is None:
+            with self._lock:
+                self.broken_pools = 0
+            self.cache.store(key, future.result())
+
+    def _release(self, job):
+        with self._lock:
+            self._release_locked(job)
+
+    def _release_locked(self, job):
+        """Drop a cancelled job's references; cancel tasks no other job needs"""
+        for index, future in job.futures.items():
+            entry = self._inflight.get(job.keys[index])
+            if entry is None or entry[0] is not future:
+                continue
+            entry[1] -= 1
+            if entry[1] <= 0:
+                future.cancel()
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'pending': self.pending, 'queue_size': self.queue_size,
+                    'rejected': self.rejected, 'sessions': len(self._jobs), 'broken_pools': self.broken_pools,
+                    'available': self.failure is None}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_analysis_service():
+    """Process-wide analysis service, or None when WRITING_ANALYSIS_WORKERS is 0"""
+    global _service
+    if WRITING_ANALYSIS_WORKERS == 0:
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = AnalysisService(workers=WRITING_ANALYSIS_WORKERS)
+    return _service
@@ -0,0 +1,254 @@
+﻿"""
+Compiled columnar vocabulary format
+
+A vocabulary (CSV rows or JSON entries) compiled into a directory of
+NumPy arrays that are memory-mapped on load, so opening it costs the same
+for 50 or 100k terms and the pages are shared between processes:
+
+    manifest.json          row count, column kinds, category tables, source hash
+    <col>.offsets.npy      int64 (rows + 1): byte offsets into the string table
+    <col>.strings.npy      uint8: UTF-8 string table for the column
+    <col>.nulls.npy        bool (rows), only when the column has missing values
+    <col>.codes.npy        int16 (rows): categorical codes, -1 when missing
+
+Column kinds: 'string', 'category' (low-cardinality labels such as
+category/field/difficulty) and 'json' (lists and dicts such as synonyms
+or references, stored as JSON strings and decoded on access).
+"""
+
+import json
+import math
+import os
+import shutil
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+SUFFIX = ".vocab"
+CATEGORY_COLUMNS = ('category', 'field', 'difficulty', 'stress')
+
+
+def compiled_path(source):
+    """Artifact directory for a source file: data/x.csv -> data/x.vocab"""
+    return Path(source).with_suffix(SUFFIX)
+
+
+_digests = {}  # resolved path -> ((size, mtime_ns), digest)
+
+
+def source_digest(path):
+    """Content hash of a source file (staleness check without parsing it)
+
+    Memoized per file while its size and mtime are unchanged, so repeated
+    freshness checks cost a stat() rather than a read of the whole file.
+    """
+    path = Path(path).resolve()
+    info = path.stat()
+    stamp = (info.st_size, info.st_mtime_ns)
+    cached = _digests.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    digest = blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    _digests[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _column_kind(name, values):
+    if name in CATEGORY_COLUMNS:
+        return 'category'
+    if any(isinstance(v, (list, dict, tuple)) for v in values):
+        return 'json'
+    return 'string'
+
+
+def _write_strings(directory, name, values, encode=str):
+    nulls = np.fromiter((_missing(v) for v in values), dtype=bool, count=len(values))
+    blobs = [b"" if null else encode(v).encode("utf-8") for v, null in zip(values, nulls)]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    np.save(directory / f"{name}.offsets.npy", offsets)
+    np.save(directory / f"{name}.strings.npy", np.frombuffer(b"".join(blobs), dtype=np.uint8))
+    if nulls.any():
+        np.save(directory / f"{name}.nulls.npy", nulls)
+
+
+def compile_vocabulary(records, directory, source=None):
+    """Compile a DataFrame or list of dicts into `directory`; returns the manifest"""
+    frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+    directory = Path(directory)
+    staging = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].tolist()
+        kind = _column_kind(name, values)
+        if kind == 'category':
+            categorical = pd.Categorical([None if _missing(v) else str(v) for v in values])
+            np.save(staging / f"{name}.codes.npy", categorical.codes.astype(np.int16))
+            columns[name] = {'kind': kind, 'categories': [str(c) for c in categorical.categories]}
+        elif kind == 'json':
+            _write_strings(staging, name, values, encode=lambda v: json.dumps(v, ensure_ascii=False))
+            columns[name] = {'kind': kind}
+        else:
+            _write_strings(staging, name, values)
+            columns[name] = {'kind': kind}
+
+    manifest = {'format': FORMAT_VERSION, 'rows': len(frame), 'columns': columns}
+    if source is not None:
+        info = Path(source).stat()
+        manifest['source'] = {'name': Path(source).name, 'size': info.st_size, 'mtime_ns': info.st_mtime_ns,
+                              'blake2b': source_digest(source)}
+    (staging / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    # Swap in the whole directory so readers never see a half-written artifact
+    previous = directory.with_name(directory.name + ".old")
+    shutil.rmtree(previous, ignore_errors=True)
+    if directory.exists():
+        os.replace(directory, previous)
+    os.replace(staging, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class CompiledVocabulary:
+    """Read-only, memory-mapped compiled vocabulary
+
+    Behaves as a sequence of entry dicts (what the explorer takes); entries
+    are decoded only when accessed. Whole columns are available as arrays
+    (codes) or lists (strings) for vectorized filtering and DataFrames.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled vocabulary format: {self.manifest.get('format')}")
+        self.columns = self.manifest['columns']
+        self._arrays = {}
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return {name: self.value(name, row) for name in self.columns}
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def _array(self, filename):
+        array = self._arrays.get(filename)
+        if array is None:
+            path = self.directory / filename
+            array = np.load(path, mmap_mode='r') if path.exists() else None
+            self._arrays[filename] = array
+        return array
+
+    def codes(self, name):
+        """Categorical codes of a category column (memory-mapped, -1 = missing)"""
+        return self._array(f"{name}.codes.npy")
+
+    def categories(self, name):
+        return self.columns[name]['categories']
+
+    def value(self, name, row):
+        """One decoded cell (None when missing)"""
+        spec = self.columns[name]
+        if spec['kind'] == 'category':
+            code = self.codes(name)[row]
+            return spec['categories'][code] if code >= 0 else None
+
+        nulls = self._array(f"{name}.nulls.npy")
+        if nulls is not None and nulls[row]:
+            return None
+        offsets = self._array(f"{name}.offsets.npy")
+        text = self._array(f"{name}.strings.npy")[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+        return json.loads(text) if spec['kind'] == 'json' else text
+
+    def column(self, name):
+        """Whole column decoded to Python values (a Categorical for category columns)"""
+        spec = self.columns[name]
+        if spec['kind'] == 'category':
+            return pd.Categorical.from_codes(np.asarray(self.codes(name)), categories=spec['categories'])
+
+        offsets = np.asarray(self._array(f"{name}.offsets.npy"))
+        data = np.asarray(self._array(f"{name}.strings.npy"))
+        # Decode the table once; byte offsets become character offsets by
+        # discounting UTF-8 continuation bytes before each offset
+        text = data.tobytes().decode("utf-8")
+        continuation = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum((data & 0xC0) == 0x80, out=continuation[1:])
+        bounds = (offsets - continuation[offsets]).tolist()
+        values = [text[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        nulls = self._array(f"{name}.nulls.npy")
+        if nulls is not None:
+            for row in np.flatnonzero(nulls):
+                values[row] = None
+        if spec['kind'] == 'json':
+            values = [v if v is None else json.loads(v) for v in values]
+        return values
+
+    def to_frame(self, columns=None):
+        """pandas DataFrame of the given columns (all by default)"""
+        names = list(self.columns) if columns is None else list(columns)
+        return pd.DataFrame({name: self.column(name) for name in names})
+
+    def rows(self, positions, columns=None):
+        """DataFrame of some rows (indexed by their positions), decoding only those cells"""
+        positions = np.asarray(positions, dtype=np.int64)
+        names = list(self.columns) if columns is None else [c for c in columns if c in self.columns]
+        data = {}
+        for name in names:
+            spec = self.columns[name]
+            if spec['kind'] == 'category':
+                codes = np.asarray(self.codes(name)[positions])
+                data[name] = pd.Categorical.from_codes(codes, categories=spec['categories'])
+            else:
+                data[name] = [self.value(name, row) for row in positions.tolist()]
+        return pd.DataFrame(data, index=pd.Index(positions))
+
+    def is_fresh(self, source):
+        """True when compiled from the current content of `source`"""
+        recorded = self.manifest.get('source', {})
+        try:
+            # Size and mtime as compiled: fresh without reading the file; a size
+            # change: stale; otherwise (e.g. a fresh checkout) the digest decides
+            info = Path(source).stat()
+            if (recorded.get('size'), recorded.get('mtime_ns')) == (info.st_size, info.st_mtime_ns):
+                return True
+            if 'size' in recorded and recorded['size'] != info.st_size:
+                return False
+            return recorded.get('blake2b') is not None and recorded['blake2b'] == source_digest(source)
+        except OSError:
+            return False
+
+
+def open_compiled(source):
+    """Compiled vocabulary for a source file, or None when missing, unreadable or stale"""
+    source = Path(source)
+    directory = compiled_path(source)
+    try:
+        compiled = CompiledVocabulary(directory)
+    except (OSError, ValueError, KeyError):
+        return None
+    if source.exists() and not compiled.is_fresh(source):
+        return None
+    return compiled
@@ -1,39 +1,373 @@
 ﻿"""
-Simple file-based database for user progress
+SQLite-backed database for user progress
+
+One row per user in WAL mode, so a save rewrites only that user's row and
+readers never block writers. Concurrent saves are group-committed: whoever
+holds the commit lock flushes every pending user in one transaction.
+
+Interactions are persisted as small delta events (append_event), so the
+cost per interaction does not grow with the user's history. The per-user
+row is the snapshot; events newer than it are replayed on load and folded
+into it by periodic compaction. Events a snapshot covers are deleted when
+it is written, and the count of newer ones is read from the events table,
+so compaction survives restarts and other processes sharing the file.
+
+Flashcard answers are also appended to review_log, which neither
+compaction nor snapshots touch, so the full review history stays
+available (iter_reviews, tools/simulate_scheduling.py).
 """
 
 import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_progress (
+    user_id    TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    last_seq   INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS progress_events (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_progress_events_user ON progress_events (user_id, seq);
+CREATE TABLE IF NOT EXISTS review_log (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     TEXT NOT NULL,
+    term        TEXT NOT NULL,
+    difficulty  TEXT NOT NULL,
+    reviewed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_review_log_user ON review_log (user_id, seq);
+"""
+
+# The snapshot covers every event of the user up to last_seq at write time
+_UPSERT = """
+INSERT INTO user_progress (user_id, data, updated_at, last_seq)
+VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) FROM progress_events WHERE user_id = ?1))
+ON CONFLICT(user_id) DO UPDATE SET
+    data = excluded.data, updated_at = excluded.updated_at, last_seq = excluded.last_seq
+"""
+
+_INSERT_EVENT = """
+INSERT INTO progress_events (user_id, kind, payload, created_at) VALUES (?, ?, ?, ?)
+"""
+
+_INSERT_REVIEW = """
+INSERT INTO review_log (user_id, term, difficulty, reviewed_at) VALUES (?, ?, ?, ?)
+"""
+
+# Events folded into the user's snapshot (run after _UPSERT)
+_DELETE_SUPERSEDED = """
+DELETE FROM progress_events
+WHERE user_id = ?1 AND seq <= (SELECT last_seq FROM user_progress WHERE user_id = ?1)
+"""
+
+_COUNT_PENDING = """
+SELECT COUNT(*) FROM progress_events
+WHERE user_id = ?1 AND seq > COALESCE((SELECT last_seq FROM user_progress WHERE user_id = ?1), 0)
+"""
+
+# Fold a user's events into the snapshot once this many have accumulated
+COMPACT_EVERY = 200
+
+# Keys stored as lists by the legacy JSON file that are sets in session state
+_LEGACY_SET_KEYS = ('vocab_mastered', 'vocab_learning')
+
+
+def _encode_default(value):
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': list(value)}
+    return str(value)
+
+
+def _decode_hook(obj):
+    if len(obj) == 1 and '__set__' in obj:
+        return set(obj['__set__'])
+    return obj
+
+
+def encode_progress(progress):
+    """Serialize progress to JSON, keeping sets round-trippable"""
+    return json.dumps(progress, default=_encode_default, ensure_ascii=False)
+
+
+def decode_progress(data):
+    """Inverse of encode_progress (also accepts legacy list-encoded sets)"""
+    progress = json.loads(data, object_hook=_decode_hook)
+    for key in _LEGACY_SET_KEYS:
+        if isinstance(progress.get(key), list):
+            progress[key] = set(progress[key])
+    return progress
+
+
+def apply_event(progress, kind, payload):
+    """Apply one delta event to a progress dict in place"""
+    if kind == 'flashcard':
+        term = payload['term']
+        progress.setdefault('vocab_tracking', {})[term] = payload['tracking']
+        if payload.get('status') == 'mastered':
+            progress.setdefault('vocab_mastered', set()).add(term)
+            progress.setdefault('vocab_learning', set()).discard(term)
+        else:
+            progress.setdefault('vocab_learning', set()).add(term)
+    elif kind == 'learning_add':
+        progress.setdefault('vocab_learning', set()).add(payload['term'])
+        if payload.get('activity'):
+            progress.setdefault('activity_log', []).append(payload['activity'])
+    elif kind == 'mastered':
+        progress.setdefault('vocab_learning', set()).discard(payload['term'])
+        progress.setdefault('vocab_mastered', set()).add(payload['term'])
+    elif kind == 'quiz':
+        progress.setdefault('quiz_history', []).append(payload['result'])
+    else:
+        raise ValueError(f"Unknown progress event kind: {kind}")
+    return progress
+
+
+class _CommitBatch:
+    """Rows and events committed together; every writer in it sees the outcome"""
+
+    def __init__(self):
+        self.rows = {}
+        self.events = []
+        self.reviews = []
+        self.written = False
+        self.error = None
+
+
 class UserProgressDB:
-    def __init__(self, db_path="data/user_progress.json"):
+    def __init__(self, db_path="data/user_progress.db", pool_size=4,
+                 legacy_json="data/user_progress.json"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
-    
+
+        self._pool = queue.Queue()
+        for _ in range(max(pool_size, 1)):
+            self._pool.put(self._connect())
+
+        self._batch = _CommitBatch()
+        self._pending_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._compacting = set()
+
+        with self._connection() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(user_progress)")}
+            if columns and 'last_seq' not in columns:
+                conn.execute("ALTER TABLE user_progress ADD COLUMN last_seq INTEGER NOT NULL DEFAULT 0")
+            conn.executescript(_SCHEMA)
+
+        if legacy_json:
+            self._migrate_legacy_json(Path(legacy_json))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _write(self, rows=(), events=(), reviews=()):
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if events:
+                    conn.executemany(_INSERT_EVENT, events)
+                if reviews:
+                    conn.executemany(_INSERT_REVIEW, reviews)
+                if rows:
+                    conn.executemany(_UPSERT, rows)
+                    conn.executemany(_DELETE_SUPERSEDED, [(row[0],) for row in rows])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _flush(self, batch):
+        """Group commit: the first writer through flushes everything pending,
+        so a call returns only after its own write is committed, and raises
+        the commit's error when it failed."""
+        with self._commit_lock:
+            if not batch.written:
+                with self._pending_lock:
+                    self._batch = _CommitBatch()
+                try:
+                    self._write(list(batch.rows.values()), batch.events, batch.reviews)
+                except Exception as exc:
+                    batch.error = exc
+                batch.written = True
+        if batch.error is not None:
+            raise batch.error
+
     def save(self, user_id, progress):
-        """Save user progress"""
-        # Convert sets to lists for JSON serialization
-        serializable_progress = {
-            k: list(v) if isinstance(v, set) else v
-            for k, v in progress.items()
-        }
-        
-        with open(self.db_path, 'w') as f:
-            json.dump({user_id: serializable_progress}, f, indent=2)
-    
+        """Save a full snapshot of user progress (only this user's row is rewritten)
+
+        The events the snapshot supersedes are deleted in the same transaction.
+        """
+        payload = (user_id, encode_progress(progress), datetime.now().isoformat())
+        with self._pending_lock:
+            batch = self._batch
+            batch.rows[user_id] = payload
+        self._flush(batch)
+
+    def append_event(self, user_id, kind, payload):
+        """Persist one interaction as a small delta record (O(1) in history length)"""
+        created_at = datetime.now().isoformat()
+        record = (user_id, kind, encode_progress(payload), created_at)
+        review = None
+        if kind == 'flashcard' and payload['tracking'].get('last_difficulty'):
+            tracking = payload['tracking']
+            review = (user_id, payload['term'], tracking['last_difficulty'], tracking.get('last_review') or created_at)
+        with self._pending_lock:
+            batch = self._batch
+            batch.events.append(record)
+            if review is not None:
+                batch.reviews.append(review)
+        self._flush(batch)
+
+        if user_id in self._compacting or self.pending_event_count(user_id) < COMPACT_EVERY:
+            return
+        with self._pending_lock:
+            if user_id in self._compacting:
+                return
+            self._compacting.add(user_id)
+        threading.Thread(target=self._compact_in_background, args=(user_id,), daemon=True).start()
+
+    def pending_event_count(self, user_id):
+        """Events newer than the user's snapshot (those load() replays)"""
+        with self._connection() as conn:
+            return conn.execute(_COUNT_PENDING, (user_id,)).fetchone()[0]
+
+    def _compact_in_background(self, user_id):
+        try:
+            self.compact(user_id)
+        finally:
+            with self._pending_lock:
+                self._compacting.discard(user_id)
+
+    def compact(self, user_id):
+        """Fold the user's events into the snapshot row and drop them"""
+        with self._commit_lock, self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                progress, last_seq = self._replay(conn, user_id)
+                if last_seq is not None:
+                    conn.execute(_UPSERT, (user_id, encode_progress(progress), datetime.now().isoformat()))
+                    conn.execute(_DELETE_SUPERSEDED, (user_id,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def save_many(self, items):
+        """Save several users in one transaction: items is {user_id: progress} or pairs"""
+        items = items.items() if hasattr(items, 'items') else items
+        now = datetime.now().isoformat()
+        rows = [(user_id, encode_progress(progress), now) for user_id, progress in items]
+        with self._commit_lock:
+            self._write(rows)
+
+    def _replay(self, conn, user_id):
+        """Snapshot plus newer events; last_seq is None when the user has no data"""
+        row = conn.execute(
+            "SELECT data, last_seq FROM user_progress WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        progress, last_seq = (decode_progress(row[0]), row[1]) if row else ({}, None)
+
+        events = conn.execute(
+            "SELECT seq, kind, payload FROM progress_events WHERE user_id = ? AND seq > ? ORDER BY seq",
+            (user_id, last_seq or 0)
+        )
+        for seq, kind, payload in events:
+            apply_event(progress, kind, decode_progress(payload))
+            last_seq = seq
+        return progress, last_seq
+
     def load(self, user_id):
-        """Load user progress"""
-        if not self.db_path.exists():
+        """Load user progress (snapshot with newer events replayed)"""
+        with self._connection() as conn:
+            progress, last_seq = self._replay(conn, user_id)
+
+        if last_seq is None:
             return None
-        
-        with open(self.db_path, 'r') as f:
-            data = json.load(f)
-            user_data = data.get(user_id)
-            
-            if user_data:
-                # Convert lists back to sets
-                user_data['vocab_mastered'] = set(user_data.get('vocab_mastered', []))
-                user_data['vocab_learning'] = set(user_data.get('vocab_learning', []))
-                return user_data
-        
-        return None
\ No newline at end of file
+        return progress
+
+    def iter_events(self, user_id, kinds=None):
+        """Yield (kind, payload, created_at) of the user's uncompacted events, oldest first"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT kind, payload, created_at FROM progress_events WHERE user_id = ? ORDER BY seq",
+                (user_id,)
+            ).fetchall()
+        for kind, payload, created_at in rows:
+            if kinds is None or kind in kinds:
+                yield kind, decode_progress(payload), created_at
+
+    def iter_reviews(self, user_id):
+        """Yield (term, difficulty, reviewed_at) of every flashcard answer of the user, oldest first"""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT term, difficulty, reviewed_at FROM review_log WHERE user_id = ? ORDER BY seq",
+                (user_id,)
+            ).fetchall()
+        yield from rows
+
+    def delete(self, user_id):
+        with self._commit_lock, self._connection() as conn:
+            conn.execute("DELETE FROM user_progress WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM progress_events WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM review_log WHERE user_id = ?", (user_id,))
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def _migrate_legacy_json(self, legacy_path):
+        """Import the old single-file store once, then leave it renamed"""
+        if not legacy_path.exists():
+            return
+
+        try:
+            data = json.loads(legacy_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        if isinstance(data, dict) and data:
+            self.save_many({user_id: decode_progress(json.dumps(progress))
+                            for user_id, progress in data.items()})
+        try:
+            legacy_path.rename(legacy_path.with_suffix(".json.migrated"))
+        except OSError:
+            pass  # another process migrated it first
+
+
+_default_db = None
+_default_db_lock = threading.Lock()
+
+
+def get_progress_db():
+    """Process-wide progress database shared by all sessions"""
+    global _default_db
+    if _default_db is None:
+        with _default_db_lock:
+            if _default_db is None:
+                _default_db = UserProgressDB()
+    return _default_db
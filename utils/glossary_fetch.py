@@ -0,0 +1,236 @@
+﻿"""
+Concurrent glossary fetcher
+
+Shared by the glossary extraction tools:
+
+- one pooled requests.Session (keep-alive connections, bounded pool) driven
+  from asyncio through worker threads, with a timeout on every request
+- per-host rate limits (minimum spacing between requests to a host)
+- on-disk response cache with ETag / Last-Modified revalidation: a 304
+  answer is served from the cache
+- offline mode that replays saved fixtures instead of touching the network,
+  and a record mode that saves what was fetched as fixtures
+
+run_sources() fetches all sources concurrently and runs their parsers in
+parallel worker processes.
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from hashlib import sha1
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RATE = 1.0  # requests per second per host
+USER_AGENT = "OmicsLingua-glossary-fetcher/1.0"
+
+
+class FixtureMissingError(LookupError):
+    """Offline mode was asked for a URL that has no saved fixture"""
+
+
+@dataclass
+class FetchResult:
+    url: str
+    text: str
+    status: int
+    source: str  # 'network', 'revalidated' (304, served from the cache) or 'fixture'
+    seconds: float
+
+
+class ResponseCache:
+    """URL -> (body, validators) on disk"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url):
+        key = sha1(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def put(self, url, body, headers):
+        meta_path, body_path = self._paths(url)
+        body_path.write_text(body, encoding="utf-8")
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        }
+        meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+class Fixtures:
+    """Saved pages for offline runs: index.json maps URL -> file name"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.index_path = self.directory / "index.json"
+        try:
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, url):
+        name = self.index.get(url)
+        if name is None:
+            raise FixtureMissingError(f"No fixture for {url} in {self.directory}")
+        return (self.directory / name).read_text(encoding="utf-8")
+
+    def record(self, url, body):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = self.index.get(url) or f"{urlsplit(url).netloc.replace('.', '_')}_{sha1(url.encode()).hexdigest()[:8]}.html"
+        (self.directory / name).write_text(body, encoding="utf-8")
+        self.index[url] = name
+        self.index_path.write_text(json.dumps(self.index, indent=2, sort_keys=True), encoding="utf-8")
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host (async, per event loop)"""
+
+    def __init__(self, rates=None, default_rate=DEFAULT_RATE):
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self._locks = {}
+        self._last = {}
+
+    async def wait(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            rate = self.rates.get(host, self.default_rate)
+            interval = 1.0 / rate if rate else 0.0
+            delay = self._last.get(host, 0.0) + interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last[host] = time.monotonic()
+
+
+class GlossaryFetcher:
+    """Pooled, rate-limited, cached HTTP fetcher (or fixture replay when offline)"""
+
+    def __init__(self, cache_dir=None, fixtures_dir=None, offline=False, record=False,
+                 rates=None, default_rate=DEFAULT_RATE, timeout=DEFAULT_TIMEOUT, max_connections=8):
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.fixtures = Fixtures(fixtures_dir) if fixtures_dir else None
+        if (offline or record) and self.fixtures is None:
+            raise ValueError("offline and record modes need a fixtures directory")
+        self.offline = offline
+        self.record = record
+        self.limiter = HostRateLimiter(rates, default_rate)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session = None
+        self._slots = None
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_connections, pool_maxsize=self.max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            self._session = session
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def fetch(self, url):
+        start = time.perf_counter()
+        if self.offline:
+            return FetchResult(url, self.fixtures.get(url), 200, 'fixture', time.perf_counter() - start)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+
+        meta, cached = self.cache.get(url) if self.cache else (None, None)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        async with self._slots:
+            await self.limiter.wait(urlsplit(url).netloc)
+            session = self._get_session()
+            response = await asyncio.to_thread(session.get, url, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and cached is not None:
+            return FetchResult(url, cached, 200, 'revalidated', time.perf_counter() - start)
+        response.raise_for_status()
+
+        text = response.text
+        if self.cache:
+            self.cache.put(url, text, response.headers)
+        if self.record:
+            self.fixtures.record(url, text)
+        return FetchResult(url, text, response.status_code, 'network', time.perf_counter() - start)
+
+
+@dataclass
+class GlossarySource:
+    """One glossary page and the module-level function that parses it"""
+
+    name: str
+    url: str
+    parse: object  # callable(html, url) -> list of entry dicts; must be picklable
+    output: str = None
+
+
+async def _run_source(source, fetcher, loop, executor):
+    result = await fetcher.fetch(source.url)
+    start = time.perf_counter()
+    if executor is None:
+        entries = source.parse(result.text, source.url)
+    else:
+        entries = await loop.run_in_executor(executor, source.parse, result.text, source.url)
+    return source, result, entries, time.perf_counter() - start
+
+
+async def _run_all(sources, fetcher, workers):
+    loop = asyncio.get_running_loop()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 0 and len(sources) > 1 else None
+    try:
+        return await asyncio.gather(*(_run_source(s, fetcher, loop, executor) for s in sources))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def run_sources(sources, fetcher, workers=None):
+    """Fetch and parse sources concurrently; writes each source's JSON output
+
+    Parsers run in a process pool of `workers` processes (default: one per
+    CPU; 0 parses in this process). Returns [(source, FetchResult, entries, parse_seconds)].
+    """
+    try:
+        results = asyncio.run(_run_all(list(sources), fetcher, workers))
+    finally:
+        fetcher.close()
+
+    for source, _, entries, _ in results:
+        if source.output:
+            out = Path(source.output)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8")
+    return results
@@ -0,0 +1,271 @@
+﻿"""
+Rule-based glossary extraction from HTML
+
+A rule names the elements that hold glossary entries rather than walking a
+full document tree:
+
+    {'terms': 'dt', 'definitions': 'dd'}     each term is paired with the
+                                             definition element that follows it
+    {'items': 'li', 'split': '–'}            one element per entry, split once
+                                             on the separator
+
+plus an optional 'within' scope: a simple selector ('tag', 'tag.class',
+'tag#id', '.class', '#id', comma-separated alternatives). When no element
+matches the scope, the whole page is used.
+
+Backends, fastest first: selectolax (Lexbor), lxml, and a streaming
+html.parser fallback that needs no dependency. All of them return the same
+(term, definition) pairs: element text is its text nodes joined with
+single spaces, without the space an inline tag leaves before punctuation.
+
+lxml is in requirements.txt. The html.parser fallback is about 2-3x slower
+and only approximates HTML5 tree building: it closes <li>, <dt> and <dd>
+implicitly, but not <p> or misnested inline tags, so a rule on such
+elements may pair text differently than the tree backends.
+"""
+
+import re
+from html.parser import HTMLParser
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional
+    LexborHTMLParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # optional
+    lxml_html = None
+
+_SELECTOR = re.compile(r"^\s*([a-zA-Z][\w-]*)?(?:([.#])([\w-]+))?\s*$")
+_SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([.,;:!?)\]])")
+
+
+def _clean(pieces):
+    return " ".join(" ".join(pieces).split())
+
+
+def parse_selector(selector):
+    """'article, div.glossary' -> [(tag, kind, name)] with kind '.', '#' or None"""
+    parsed = []
+    for part in selector.split(","):
+        match = _SELECTOR.match(part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Unsupported selector {part!r} (use tag, tag.class or tag#id)")
+        tag, kind, name = match.groups()
+        parsed.append(((tag or "").lower() or None, kind, name))
+    return parsed
+
+
+def _split_item(text, separator):
+    if separator not in text:
+        return None
+    term, definition = text.split(separator, 1)
+    return term.strip(), definition.strip()
+
+
+def _pairs(rule, texts):
+    """(term, definition) from (tag, text) in document order"""
+    if 'items' in rule:
+        for _, text in texts:
+            pair = _split_item(text, rule['split'])
+            if pair:
+                yield pair
+        return
+    pending = []
+    for tag, text in texts:
+        if tag == rule['terms']:
+            pending.append(text)
+        elif pending:
+            for term in pending:
+                yield term, text
+            pending = []
+
+
+def _rule_tags(rule):
+    if 'items' in rule:
+        return {rule['items']}
+    return {rule['terms'], rule['definitions']}
+
+
+# -- selectolax ---------------------------------------------------------------
+
+def _extract_selectolax(html, rule):
+    tree = LexborHTMLParser(html)
+    tags = _rule_tags(rule)
+    css = ", ".join(sorted(tags))
+    scopes = tree.css(rule['within']) if rule.get('within') else []
+    roots = scopes or [tree.root]
+    seen = set()
+    for root in roots:
+        for node in root.css(css):
+            if node.mem_id in seen:
+                continue
+            seen.add(node.mem_id)
+            yield node.tag, " ".join(node.text(deep=True, separator=" ").split())
+
+
+# -- lxml -------------------------------------------------------------------
+
+def _xpath(selector):
+    alternatives = []
+    for tag, kind, name in parse_selector(selector):
+        step = f"//{tag or '*'}"
+        if kind == "#":
+            step += f"[@id='{name}']"
+        elif kind == ".":
+            step += f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+        alternatives.append(step)
+    return " | ".join(alternatives)
+
+
+def _extract_lxml(html, rule):
+    document = lxml_html.fromstring(html)
+    tags = _rule_tags(rule)
+    scopes = document.xpath(_xpath(rule['within'])) if rule.get('within') else []
+    roots = scopes or [document]
+    seen = set()
+    for root in roots:
+        for element in root.iter(*tags):
+            if element in seen:
+                continue
+            seen.add(element)
+            yield element.tag, _clean(_lxml_text(element, tags) if 'terms' in rule else element.itertext())
+
+
+def _lxml_text(element, tags):
+    """Text without nested rule elements: libxml2 nests an unclosed <dt> in the previous one"""
+    pieces = [element.text or ""]
+    for child in element:
+        if child.tag not in tags:
+            pieces.extend(child.itertext())
+        pieces.append(child.tail or "")
+    return pieces
+
+
+# -- html.parser (no dependency) ----------------------------------------------
+
+_LIST_TAGS = {'ul', 'ol', 'dl'}
+
+
+class _RuleParser(HTMLParser):
+    """Collects the text of rule elements in one pass over the markup
+
+    Only the text of open rule elements is buffered. Implicitly closed
+    elements (<li>, <dt>, <dd> without end tags) are closed by the next
+    sibling or by the end of their list, as browsers do.
+    """
+
+    def __init__(self, tags, scope):
+        super().__init__(convert_charrefs=True)
+        self.tags = tags
+        self.scope = scope
+        self.scope_tag = None
+        self.scope_depth = 0
+        self.scope_seen = False
+        self.list_depth = 0
+        self.open = []  # [tag, list_depth, pieces, slot in texts]
+        self.texts = []
+
+    def _matches(self, tag, attrs):
+        for want_tag, kind, name in self.scope:
+            if want_tag and want_tag != tag:
+                continue
+            if kind is None:
+                return True
+            value = dict(attrs).get('id' if kind == "#" else 'class') or ""
+            if (value == name) if kind == "#" else (name in value.split()):
+                return True
+        return False
+
+    def _close(self, index):
+        for tag, _, pieces, slot in self.open[index:]:
+            self.texts[slot] = (tag, _clean(pieces))
+        del self.open[index:]
+
+    def _in_scope(self):
+        return self.scope is None or self.scope_depth > 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.scope is not None:
+            if self.scope_depth:
+                if tag == self.scope_tag:
+                    self.scope_depth += 1
+            elif self._matches(tag, attrs):
+                self.scope_tag, self.scope_depth, self.scope_seen = tag, 1, True
+        if tag in _LIST_TAGS:
+            self.list_depth += 1
+        if tag in self.tags and self._in_scope():
+            # A new item closes an open sibling item of the same list
+            for i, item in enumerate(self.open):
+                if item[1] == self.list_depth:
+                    self._close(i)
+                    break
+            # Texts keep document (start tag) order, as in a tree walk
+            self.open.append([tag, self.list_depth, [], len(self.texts)])
+            self.texts.append(None)
+
+    def handle_endtag(self, tag):
+        if tag in self.tags:
+            for i in range(len(self.open) - 1, -1, -1):
+                if self.open[i][0] == tag:
+                    self._close(i)
+                    break
+        if tag in _LIST_TAGS:
+            for i, item in enumerate(self.open):
+                if item[1] >= self.list_depth:
+                    self._close(i)
+                    break
+            self.list_depth = max(0, self.list_depth - 1)
+        if self.scope_depth and tag == self.scope_tag:
+            self.scope_depth -= 1
+            if not self.scope_depth:
+                self._close(0)
+
+    def handle_data(self, data):
+        for item in self.open:
+            item[2].append(data)
+
+    def close(self):
+        super().close()
+        self._close(0)
+
+
+def _extract_stdlib(html, rule):
+    tags = _rule_tags(rule)
+    if rule.get('within'):
+        parser = _RuleParser(tags, parse_selector(rule['within']))
+        parser.feed(html)
+        parser.close()
+        if parser.scope_seen:
+            return parser.texts
+    parser = _RuleParser(tags, None)
+    parser.feed(html)
+    parser.close()
+    return parser.texts
+
+
+BACKENDS = {
+    'selectolax': _extract_selectolax if LexborHTMLParser is not None else None,
+    'lxml': _extract_lxml if lxml_html is not None else None,
+    'html.parser': _extract_stdlib,
+}
+
+
+def available_backends():
+    return [name for name, extract in BACKENDS.items() if extract is not None]
+
+
+def extract_pairs(html, rule, backend=None):
+    """[(term, definition)] for a rule; `backend` defaults to the fastest installed"""
+    backend = backend or available_backends()[0]
+    extract = BACKENDS.get(backend)
+    if extract is None:
+        raise ValueError(f"HTML backend {backend!r} is not available (installed: {', '.join(available_backends())})")
+    return [(_tidy(term), _tidy(definition)) for term, definition in _pairs(rule, extract(html, rule))
+            if term and definition]
+
+
+def _tidy(text):
+    """Drop the space an inline tag leaves before punctuation: '<a>reads</a>.' -> 'reads.'"""
+    return _SPACE_BEFORE_PUNCTUATION.sub(r"\1", text)
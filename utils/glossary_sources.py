@@ -0,0 +1,82 @@
+﻿"""
+Glossary source registry
+
+Sources are declared in config.GLOSSARY_SOURCES: a page URL, an extraction
+rule (see utils.glossary_parse) and the metadata stamped on every entry.
+Adding a glossary is a config entry; no script is needed:
+
+    'my_source': {
+        'url': "https://example.org/glossary",
+        'rule': {'terms': 'dt', 'definitions': 'dd', 'within': 'main'},
+        'field': "Genomics",
+        'reference': "Example",
+        'output': "tools/extracted/my_source_glossary.json",
+    }
+
+Optional keys: 'difficulty' (default Intermediate), 'provenance' (default
+<name>_glossary).
+"""
+
+from config import GLOSSARY_SOURCES
+from utils.glossary_fetch import GlossarySource
+from utils.glossary_parse import extract_pairs, parse_selector
+
+
+class RuleParser:
+    """Picklable parse(html, url) for a declared source (runs in worker processes)"""
+
+    def __init__(self, name, spec, backend=None):
+        self.rule = spec['rule']
+        self.field = spec.get('field', "")
+        self.difficulty = spec.get('difficulty', "Intermediate")
+        self.reference = spec.get('reference', name)
+        self.provenance = spec.get('provenance', f"{name}_glossary")
+        self.backend = backend
+
+    def __call__(self, html, url):
+        return [self.entry(term, definition, url) for term, definition in extract_pairs(html, self.rule, self.backend)]
+
+    def entry(self, term, definition, url):
+        return {
+            "term": term,
+            "definition": definition,
+            "field": self.field,
+            "difficulty": self.difficulty,
+            "usage_example": "",
+            "synonyms": [],
+            "related_terms": [],
+            "methods": [],
+            "applications": [],
+            "references": [{"source": self.reference, "url": url}],
+            "provenance": self.provenance,
+        }
+
+
+def validate_rule(rule):
+    if 'items' in rule:
+        if not rule.get('split'):
+            raise ValueError("An 'items' rule needs a 'split' separator")
+    elif not ('terms' in rule and 'definitions' in rule):
+        raise ValueError("A rule needs 'items' and 'split', or 'terms' and 'definitions'")
+    if rule.get('within'):
+        parse_selector(rule['within'])
+
+
+def load_sources(specs=GLOSSARY_SOURCES, backend=None):
+    """{name: GlossarySource} from declarations; raises ValueError on a malformed rule"""
+    sources = {}
+    for name, spec in specs.items():
+        try:
+            validate_rule(spec['rule'])
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Glossary source {name!r}: {e}") from e
+        sources[name] = GlossarySource(
+            name=name,
+            url=spec['url'],
+            parse=RuleParser(name, spec, backend),
+            output=spec.get('output', f"tools/extracted/{name}_glossary.json"),
+        )
+    return sources
+
+
+SOURCES = load_sources()
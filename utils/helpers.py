@@ -3,13 +3,34 @@ Helper functions
 """
 
 import streamlit as st
-from datetime import datetime, timedelta
-import pandas as pd
-from pathlib import Path
+from datetime import datetime
 import json
+import logging
+
+from utils.vocab_store import get_vocabulary_store
+from utils.database import get_progress_db
+from utils.scheduler import next_review_after
+
+logger = logging.getLogger(__name__)
+
+def _authenticated_user_id():
+    """Stable id of a viewer logged in with st.login (Streamlit >= 1.42), else None"""
+    user = getattr(st, 'user', None)
+    try:
+        if user is None or not user.get('is_logged_in'):
+            return None
+        subject = user.get('sub') or user.get('email')
+    except Exception:  # no auth configured
+        return None
+    return f"{user.get('iss') or 'oidc'}:{subject}" if subject else None
 
 def init_session_state():
     """Initialize all session state variables"""
+    if 'user_id' not in st.session_state:
+        # Progress is stored only for an authenticated viewer; anonymous
+        # sessions keep it in session state and write nothing
+        st.session_state.user_id = _authenticated_user_id()
+    
     if 'user_progress' not in st.session_state:
         st.session_state.user_progress = {
             'vocab_mastered': set(),
@@ -26,6 +47,9 @@ def init_session_state():
             'words_today': 0,
             'vocab_timeline': []
         }
+        stored = _load_stored_progress(st.session_state.user_id) if st.session_state.user_id else None
+        if stored:
+            st.session_state.user_progress.update(stored)
     
     if 'learning_profile' not in st.session_state:
         st.session_state.learning_profile = {
@@ -58,47 +82,31 @@ def check_daily_streak():
         st.session_state.user_progress['streak_days'] = 1
 
 def load_vocabulary_data():
-    """Load vocabulary database"""
-    vocab_file = Path("data/omics_vocabulary.csv")
-    
-    if vocab_file.exists():
-        return pd.read_csv(vocab_file)
-    else:
-        # Return sample data
-        return pd.DataFrame({
-            'term': ['Genome', 'Transcriptome', 'Proteome', 'Metabolome', 'Metagenome'],
-            'definition': [
-                'The complete set of genetic material in an organism',
-                'The complete set of RNA transcripts produced by the genome',
-                'The entire set of proteins expressed by a genome',
-                'The complete set of small-molecule chemicals found in a biological sample',
-                'Genetic material recovered from environmental samples'
-            ],
-            'category': ['Genomics', 'Transcriptomics', 'Proteomics', 'Metabolomics', 'Metagenomics'],
-            'difficulty': ['beginner', 'intermediate', 'intermediate', 'advanced', 'advanced'],
-            'example': [
-                'The human genome contains approximately 3 billion base pairs.',
-                'RNA-seq is used to analyze the transcriptome.',
-                'Mass spectrometry helps identify proteins in the proteome.',
-                'The metabolome reflects the physiological state of a cell.',
-                'Shotgun sequencing is used for metagenome analysis.'
-            ],
-            'phonetic': ['ˈdʒiːnəʊm', 'trænˈskrɪptəʊm', 'ˈprəʊtiːəʊm', 'məˈtæbələʊm', 'ˈmetəˌdʒiːnəʊm'],
-            'etymology': [
-                'From gene + -ome (complete set)',
-                'From transcript + -ome',
-                'From protein + -ome',
-                'From metabolite + -ome',
-                'From meta- (beyond) + genome'
-            ],
-            'syllables': ['ge-nome', 'tran-scrip-tome', 'pro-te-ome', 'me-tab-o-lome', 'meta-ge-nome']
-        })
+    """Load vocabulary database (shared, read-only snapshot)"""
+    return get_vocabulary_store().snapshot().frame
 
 def calculate_next_review(term, difficulty):
     """Calculate next review date for spaced repetition"""
-    intervals = {'easy': 7, 'medium': 3, 'hard': 1}
-    days = intervals.get(difficulty, 3)
-    return datetime.now() + timedelta(days=days)
+    tracking = st.session_state.get('user_progress', {}).get('vocab_tracking', {}).get(term)
+    next_review, _ = next_review_after(difficulty, tracking)
+    return next_review
+
+def _load_stored_progress(user_id):
+    """Persisted progress for a user (snapshot + replayed events), if any"""
+    try:
+        return get_progress_db().load(user_id)
+    except Exception as e:
+        logger.error(f"Failed to load progress for {user_id}: {e}")
+        return None
+
+def record_progress_event(kind, payload):
+    """Persist one progress delta for the current user (see utils.database.apply_event)"""
+    if not st.session_state.get('user_id'):
+        return
+    try:
+        get_progress_db().append_event(st.session_state.user_id, kind, payload)
+    except Exception as e:
+        logger.error(f"Failed to persist '{kind}' event: {e}")
 
 def add_to_learning_list(term):
     """Add term to learning list"""
@@ -106,4 +114,6 @@ def add_to_learning_list(term):
     
     # Log activity
     activity = f"Added '{term}' to learning list - {datetime.now().strftime('%H:%M')}"
-    st.session_state.user_progress['activity_log'].append(activity)
\ No newline at end of file
+    st.session_state.user_progress['activity_log'].append(activity)
+    
+    record_progress_event('learning_add', {'term': term, 'activity': activity})
\ No newline at end of file
@@ -0,0 +1,184 @@
+﻿"""
+Incremental writing analysis
+
+A draft is split into segments (paragraphs; paragraphs longer than
+WRITING_SEGMENT_MAX_CHARS into sentences) and each segment is analyzed on
+its own: spaCy report fields and the raw counts behind the readability
+scores (utils.readability).
+Results are cached per segment content hash, so after an edit only the
+changed segments are parsed, and the document-level metrics are
+re-aggregated from the cached per-segment stats. The cost of an edit
+scales with the size of the change, not of the draft.
+
+The aggregated values match utils.nlp_engine.analyze_text /
+check_passive_voice / get_readability_score on the whole text, except
+that textstat's sentence count does not run across paragraph breaks and
+the whitespace between paragraphs is not counted as words.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import WRITING_SEGMENT_CACHE_SIZE, WRITING_SEGMENT_MAX_CHARS
+from utils.nlp_engine import _pipeline_key, build_text_report
+from utils.readability import combine_counts, readability_counts, scores_from_counts
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Report fields kept per segment (the Doc itself is not cached)
+_REPORT_FIELDS = ('tokens', 'sentence_lengths', 'passive_sentences', 'entities', 'terms',
+                  'agreement_issues', 'pos_tags')
+
+
+def split_segments(text, max_chars=WRITING_SEGMENT_MAX_CHARS):
+    """Paragraphs of text; a paragraph over max_chars is split into sentences"""
+    segments = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            segments.append(paragraph)
+        else:
+            segments.extend(s for s in _SENTENCE_END.split(paragraph) if s)
+    return segments
+
+
+def segment_stats(segment, nlp):
+    """Everything the Free Writing view reports, for one segment"""
+    report = build_text_report(nlp(segment))
+    stats = {field: report[field] for field in _REPORT_FIELDS}
+    stats['readability'] = readability_counts(segment)
+    return stats
+
+
+def aggregate_readability(counts):
+    """get_readability_score's result from summed per-segment counts"""
+    counts = combine_counts(counts)
+    return scores_from_counts(counts) if counts['words'] else None
+
+
+class SegmentCache:
+    """LRU of per-segment stats keyed by pipeline and segment content hash"""
+
+    def __init__(self, max_entries=WRITING_SEGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(segment, pipeline):
+        return pipeline, hashlib.blake2b(segment.encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, key):
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                self._stats.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return stats
+
+    def store(self, key, stats):
+        with self._lock:
+            self._stats[key] = stats
+            while len(self._stats) > self.max_entries:
+                self._stats.popitem(last=False)
+
+    def get(self, segment, nlp):
+        """(stats, analyzed now) for a segment, analyzing it on a miss"""
+        key = self.key(segment, _pipeline_key(nlp))
+        stats = self.lookup(key)
+        if stats is not None:
+            return stats, False
+        # Analyze outside the lock so other sessions are not blocked
+        stats = segment_stats(segment, nlp)
+        self.store(key, stats)
+        return stats, True
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._stats),
+                    'max_entries': self.max_entries}
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_segment_cache = SegmentCache()
+
+
+def analyze_draft(text, nlp=None):
+    """Document-level analysis of a draft, re-analyzing only changed segments
+
+    Returns None for an empty draft, otherwise
+    {'analysis', 'readability', 'passive_sentences', 'terms',
+     'agreement_issues', 'segments', 'reanalyzed', 'seconds'} where
+    'analysis' has the keys of nlp_engine.analyze_text.
+    
+    Without a pipeline (nlp is None, e.g. the model is not installed) only
+    readability is computed: 'analysis' is None and the lists are empty.
+    """
+    started = time.perf_counter()
+    segments = split_segments(text)
+    if not segments:
+        return None
+    if nlp is None:
+        return {
+            'analysis': None,
+            'readability': aggregate_readability([readability_counts(segment) for segment in segments]),
+            'passive_sentences': [],
+            'terms': [],
+            'agreement_issues': [],
+            'segments': len(segments),
+            'reanalyzed': len(segments),
+            'seconds': time.perf_counter() - started
+        }
+
+    parts, reanalyzed = [], 0
+    for segment in segments:
+        stats, fresh = _segment_cache.get(segment, nlp)
+        parts.append(stats)
+        reanalyzed += fresh
+    return aggregate_draft(parts, reanalyzed, time.perf_counter() - started)
+
+
+def aggregate_draft(parts, reanalyzed=0, seconds=0.0):
+    """Document-level result (see analyze_draft) from per-segment stats"""
+    tokens = sum(p['tokens'] for p in parts)
+    sentence_lengths = [n for p in parts for n in p['sentence_lengths']]
+    return {
+        'analysis': {
+            'tokens': tokens,
+            'sentences': len(sentence_lengths),
+            'entities': [e for p in parts for e in p['entities']],
+            'pos_tags': [t for p in parts for t in p['pos_tags']],
+            'avg_sentence_length': tokens / max(len(sentence_lengths), 1)
+        },
+        'readability': aggregate_readability([p['readability'] for p in parts]),
+        'passive_sentences': [s for p in parts for s in p['passive_sentences']],
+        'terms': list(dict.fromkeys(t for p in parts for t in p['terms'])),
+        'agreement_issues': [i for p in parts for i in p['agreement_issues']],
+        'segments': len(parts),
+        'reanalyzed': reanalyzed,
+        'seconds': seconds
+    }
+
+
+def get_segment_cache():
+    """The process-wide per-segment result cache"""
+    return _segment_cache
+
+
+def segment_cache_stats():
+    return _segment_cache.stats()
@@ -1,113 +1,369 @@
 ﻿"""
 NLP engine using spaCy with additional text analysis functions
+
+Pure analysis core: no Streamlit dependency, and spaCy/textstat are only
+imported when first needed so headless workers and tests start quickly.
+Streamlit caching of the model lives in utils.ui.
 """
 
-import spacy
-import streamlit as st
-from config import SPACY_MODEL
-import textstat
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import SPACY_MODEL, SPACY_PROFILES, DOC_CACHE_MAX_BYTES
+
+# Rough per-token footprint of a Doc beyond its tensor (TokenC struct, lexeme refs)
+_TOKEN_OVERHEAD_BYTES = 256
+
+# Profiles ordered cheapest to richest; a richer Doc can serve a cheaper request
+PROFILE_ORDER = ('tokenize', 'parse', 'full')
+
+logger = logging.getLogger(__name__)
 
-@st.cache_resource
-def load_model():
-    """Load spaCy model"""
+class ModelNotAvailableError(RuntimeError):
+    """The spaCy model is not installed; provision it before starting the app"""
+
+def load_model(profile='full', model=SPACY_MODEL):
+    """Load spaCy model with the components of a profile excluded (uncached)"""
+    import spacy
+    
+    settings = SPACY_PROFILES[profile]
     try:
-        nlp = spacy.load(SPACY_MODEL)
-        return nlp
-    except OSError:
-        st.warning(f"Downloading {SPACY_MODEL}...")
-        import subprocess
-        subprocess.run(["python", "-m", "spacy", "download", SPACY_MODEL])
-        nlp = spacy.load(SPACY_MODEL)
-        return nlp
+        nlp = spacy.load(model, exclude=settings['exclude'])
+    except OSError as e:
+        # Never download from a request: provisioning is an explicit step
+        raise ModelNotAvailableError(
+            f"spaCy model '{model}' is not installed. "
+            f"Run `python tools/provision_models.py` (or `pip install -r requirements.txt`)."
+        ) from e
+    
+    has_sentences = any(nlp.has_pipe(name) for name in ('parser', 'senter', 'sentencizer'))
+    if settings.get('sentencizer') and not has_sentences:
+        nlp.add_pipe('sentencizer')
+    return nlp
 
-def analyze_text(text, nlp):
-    """Analyze text with spaCy"""
-    if not nlp:
-        return None
+_IMPORTED_AT = time.perf_counter()
+_models = {}
+_model_profiles = {}
+_model_stats = {}
+_model_locks = {profile: threading.Lock() for profile in SPACY_PROFILES}
+_unavailable_warned = set()
+
+def get_model(profile='full'):
+    """Process-wide model for a profile, loaded on first use
+    
+    Single-flight: concurrent first requests wait on one load under a
+    per-profile lock instead of each loading the model.
+    """
+    nlp = _models.get(profile)
+    if nlp is not None:
+        return nlp
     
-    if not text or len(text.strip()) < 3:
+    with _model_locks[profile]:
+        nlp = _models.get(profile)
+        if nlp is None:
+            started = time.perf_counter()
+            nlp = load_model(profile)
+            ready = time.perf_counter()
+            _model_profiles[id(nlp)] = profile
+            _model_stats[profile] = {
+                'pipes': list(nlp.pipe_names),
+                'load_seconds': round(ready - started, 3),
+                'ready_after_import_seconds': round(ready - _IMPORTED_AT, 3)
+            }
+            _models[profile] = nlp
+            logger.info(f"spaCy profile '{profile}' ready in {ready - started:.2f}s")
+    return nlp
+
+def check_model_ready(profiles=('full',)):
+    """Startup readiness check: load the given profiles now or raise ModelNotAvailableError"""
+    for profile in profiles:
+        get_model(profile)
+    return model_stats()
+
+def model_stats():
+    """Load time and pipeline components of each loaded profile"""
+    return {profile: dict(stats) for profile, stats in _model_stats.items()}
+
+def requires_profile(profile):
+    """Declare the cheapest pipeline profile an analysis function needs"""
+    def decorate(func):
+        func.nlp_profile = profile
+        return func
+    return decorate
+
+def _pipeline_key(nlp):
+    return _model_profiles.get(id(nlp), id(nlp))
+
+class DocCache:
+    """LRU cache of parsed Docs keyed by text content, bounded by an estimated byte budget"""
+
+    def __init__(self, max_bytes=DOC_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_bytes(doc):
+        tensor = getattr(doc, "tensor", None)
+        tensor_bytes = getattr(tensor, "nbytes", 0) or 0
+        return len(doc.text.encode("utf-8")) + tensor_bytes + len(doc) * _TOKEN_OVERHEAD_BYTES
+
+    def get(self, text, nlp=None, profile='full'):
+        """Return the parsed Doc for text, parsing it only on a cache miss
+        
+        With an explicit nlp the Doc must come from that pipeline. Without
+        one, a Doc from the requested profile or any richer profile is reused.
+        """
+        digest = self._digest(text)
+        doc = self._lookup(digest, self._candidates(nlp, profile))
+        if doc is not None:
+            return doc
+
+        if nlp is None:
+            nlp = get_model(profile)
+
+        # Parse outside the lock so other sessions are not blocked
+        doc = nlp(text)
+        self._store((_pipeline_key(nlp), digest), doc)
+        return doc
+
+    def get_many(self, texts, nlp=None, profile='full', batch_size=32):
+        """Docs for several texts; the misses are parsed together with nlp.pipe
+        
+        Repeated texts are parsed once.
+        """
+        digests = [self._digest(text) for text in texts]
+        candidates = self._candidates(nlp, profile)
+        docs = [self._lookup(digest, candidates) for digest in digests]
+        missing = {}
+        for index, doc in enumerate(docs):
+            if doc is None:
+                missing.setdefault(digests[index], []).append(index)
+        if not missing:
+            return docs
+
+        if nlp is None:
+            nlp = get_model(profile)
+        pipeline = _pipeline_key(nlp)
+        parsed = nlp.pipe((texts[indexes[0]] for indexes in missing.values()), batch_size=batch_size)
+        for (digest, indexes), doc in zip(missing.items(), parsed):
+            self._store((pipeline, digest), doc)
+            for index in indexes:
+                docs[index] = doc
+        return docs
+
+    @staticmethod
+    def _digest(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _candidates(nlp, profile):
+        if nlp is not None:
+            return [_pipeline_key(nlp)]
+        return PROFILE_ORDER[PROFILE_ORDER.index(profile):]
+
+    def _lookup(self, digest, candidates):
+        with self._lock:
+            for pipeline in candidates:
+                entry = self._docs.get((pipeline, digest))
+                if entry is not None:
+                    self._docs.move_to_end((pipeline, digest))
+                    self.hits += 1
+                    return entry[0]
+            self.misses += 1
         return None
+
+    def _store(self, key, doc):
+        size = self._estimate_bytes(doc)
+        with self._lock:
+            if key not in self._docs and size <= self.max_bytes:
+                self._docs[key] = (doc, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._docs.popitem(last=False)
+                    self.bytes -= evicted
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._docs),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+_doc_cache = DocCache()
+
+def get_doc(text, nlp=None, profile='full'):
+    """Parsed Doc for text, shared by every analysis function
     
-    doc = nlp(text)
-    return {
-        'tokens': len([token for token in doc if not token.is_punct]),
-        'sentences': len(list(doc.sents)),
-        'entities': [(ent.text, ent.label_) for ent in doc.ents],
-        'pos_tags': [(token.text, token.pos_) for token in doc if not token.is_space],
-        'avg_sentence_length': len([token for token in doc if not token.is_punct]) / max(len(list(doc.sents)), 1)
-    }
+    Pass nlp to parse with a specific pipeline, or leave it out to use the
+    process-wide model of the given profile.
+    """
+    return _doc_cache.get(text, nlp, profile)
 
-def check_passive_voice(text, nlp):
-    """Detect passive voice constructions"""
-    if not nlp or not text:
-        return []
+def get_docs(texts, nlp=None, profile='full', batch_size=32):
+    """Parsed Docs for a batch of texts (see get_doc), parsing the uncached ones with nlp.pipe"""
+    return _doc_cache.get_many(texts, nlp, profile, batch_size)
+
+def doc_cache_stats():
+    """Hit/miss counters and size of the shared Doc cache"""
+    return _doc_cache.stats()
+
+def _as_doc(text, nlp, profile='full'):
+    """Accept either raw text or an already parsed Doc"""
+    if not isinstance(text, str):
+        return text
+    return get_doc(text, nlp, profile)
+
+def build_text_report(doc):
+    """Walk a Doc once and collect every writing metric the app reports"""
+    report = doc.user_data.get('text_report')
+    if report is not None:
+        return report
+    
+    has_parse = doc.has_annotation("DEP")
+    if has_parse or doc.has_annotation("SENT_START"):
+        sentences = doc.sents
+    else:
+        sentences = [doc[:]]
     
-    doc = nlp(text)
+    word_count = 0
+    sentence_lengths = []
     passive_sentences = []
+    pos_tags = []
+    agreement_issues = []
     
-    for sent in doc.sents:
+    for sent in sentences:
+        sent_words = 0
+        is_passive = False
+        
         for token in sent:
+            if not token.is_punct:
+                sent_words += 1
+            if not token.is_space:
+                pos_tags.append((token.text, token.pos_))
+            
             # Detect passive: auxiliary verb + past participle
             if token.dep_ == "auxpass":
-                passive_sentences.append(sent.text)
-                break
+                is_passive = True
+            
+            # Subject-verb agreement (simplified)
+            if token.pos_ == "VERB" and token.dep_ == "ROOT":
+                subject = next((child for child in token.children if child.dep_ == "nsubj"), None)
+                if subject is not None and subject.tag_ == "NNS" and token.tag_ not in ["VBP", "VBZ"]:
+                    agreement_issues.append({
+                        'type': 'subject_verb_agreement',
+                        'text': f"{subject.text} {token.text}",
+                        'suggestion': "Check subject-verb agreement"
+                    })
+        
+        word_count += sent_words
+        sentence_lengths.append(sent_words)
+        if is_passive:
+            passive_sentences.append(sent.text)
+    
+    # Noun phrases that look like technical terms (compound or noun-headed)
+    terms = []
+    if has_parse:
+        terms = [
+            chunk.text for chunk in doc.noun_chunks
+            if len(chunk.text.split()) > 1 or chunk.root.pos_ == "NOUN"
+        ]
     
-    return passive_sentences
+    report = {
+        'tokens': word_count,
+        'sentences': len(sentence_lengths),
+        'sentence_lengths': sentence_lengths,
+        'avg_sentence_length': word_count / max(len(sentence_lengths), 1),
+        'passive_sentences': passive_sentences,
+        'entities': [(ent.text, ent.label_) for ent in doc.ents],
+        'terms': list(dict.fromkeys(terms)),
+        'agreement_issues': agreement_issues,
+        'pos_tags': pos_tags
+    }
+    doc.user_data['text_report'] = report
+    return report
 
-def get_readability_score(text):
-    """Calculate readability metrics"""
-    if not text or len(text.strip()) < 10:
-        return None
+def get_text_report(text, nlp=None, profile='full'):
+    """Structured report for text (or a Doc), computed once per cached Doc
     
+    None when no model is available for the profile: the checks below then
+    return empty results, as they do without nlp. Use check_model_ready to
+    fail at startup instead.
+    """
+    if not text:
+        return None
     try:
-        return {
-            'flesch_reading_ease': round(textstat.flesch_reading_ease(text), 1),
-            'flesch_kincaid_grade': round(textstat.flesch_kincaid_grade(text), 1),
-            'avg_sentence_length': round(textstat.avg_sentence_length(text), 1),
-            'difficult_words': textstat.difficult_words(text),
-            'reading_time_minutes': round(textstat.reading_time(text, ms_per_char=14.69) / 60, 1)
-        }
-    except Exception as e:
-        st.error(f"Readability calculation error: {e}")
+        doc = _as_doc(text, nlp, profile)
+    except ModelNotAvailableError as e:
+        if profile not in _unavailable_warned:
+            _unavailable_warned.add(profile)
+            logger.warning(f"Text checks return empty results: {e}")
         return None
+    return build_text_report(doc)
 
-def extract_scientific_terms(text, nlp):
-    """Extract scientific and technical terms"""
-    if not nlp or not text:
-        return []
+@requires_profile('full')
+def analyze_text(text, nlp=None):
+    """Analyze text with spaCy"""
+    raw = text if isinstance(text, str) else text.text
+    if not raw or len(raw.strip()) < 3:
+        return None
     
-    doc = nlp(text)
-    scientific_terms = []
+    report = get_text_report(text, nlp, analyze_text.nlp_profile)
+    if report is None:
+        return None
+    return {
+        'tokens': report['tokens'],
+        'sentences': report['sentences'],
+        'entities': report['entities'],
+        'pos_tags': report['pos_tags'],
+        'avg_sentence_length': report['avg_sentence_length']
+    }
+
+@requires_profile('parse')
+def check_passive_voice(text, nlp=None):
+    """Detect passive voice constructions"""
+    report = get_text_report(text, nlp, check_passive_voice.nlp_profile)
+    return list(report['passive_sentences']) if report else []
+
+def get_readability_score(text):
+    """Calculate readability metrics (textstat's formulas, counted in one pass)
     
-    # Look for noun phrases and technical entities
-    for chunk in doc.noun_chunks:
-        # Filter for potential scientific terms (capitalized or compound nouns)
-        if len(chunk.text.split()) > 1 or chunk.root.pos_ == "NOUN":
-            scientific_terms.append(chunk.text)
+    Needs no pipeline: the raw text is counted the way textstat counts it.
+    """
+    from utils.readability import readability_scores
     
-    return list(set(scientific_terms))
+    try:
+        return readability_scores(text)
+    except Exception as e:
+        logger.error(f"Readability calculation error: {e}")
+        return None
 
-def check_grammar_basic(text, nlp):
+@requires_profile('parse')
+def extract_scientific_terms(text, nlp=None):
+    """Extract scientific and technical terms"""
+    report = get_text_report(text, nlp, extract_scientific_terms.nlp_profile)
+    return list(report['terms']) if report else []
+
+@requires_profile('parse')
+def check_grammar_basic(text, nlp=None):
     """Basic grammar checking"""
-    if not nlp or not text:
-        return []
-    
-    doc = nlp(text)
-    issues = []
-    
-    # Check for common issues
-    for token in doc:
-        # Subject-verb agreement (simplified)
-        if token.pos_ == "VERB" and token.dep_ == "ROOT":
-            subjects = [child for child in token.children if child.dep_ == "nsubj"]
-            if subjects:
-                subject = subjects[0]
-                # Basic check
-                if subject.tag_ == "NNS" and token.tag_ not in ["VBP", "VBZ"]:
-                    issues.append({
-                        'type': 'subject_verb_agreement',
-                        'text': f"{subject.text} {token.text}",
-                        'suggestion': "Check subject-verb agreement"
-                    })
-    
-    return issues
\ No newline at end of file
+    report = get_text_report(text, nlp, check_grammar_basic.nlp_profile)
+    return list(report['agreement_issues']) if report else []
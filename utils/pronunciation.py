@@ -0,0 +1,649 @@
+﻿"""
+Omics pronunciation lexicon
+
+Maps a term or word to its syllable breakdown, syllable count, IPA
+transcription and primary stress, so the Pronunciation tab and the
+readability syllable counts agree on words such as "metagenomics" or
+"CRISPR-Cas9" that general-purpose hyphenation dictionaries get wrong.
+
+Entries come from the vocabulary data (phonetic, syllables and stress
+columns; syllable counts and stress are read off the IPA where there is
+one). Words with no data are generated by rules: known omics
+abbreviations, spelled-out acronyms, numbers, and a spelling syllabifier
+with English stress rules. A generated entry has an IPA transcription
+only when all its parts are known.
+
+The compiled lexicon is an open-addressing hash table over NumPy arrays,
+memory-mapped on load, so a lookup is O(1) and the pages are shared
+between processes:
+
+    manifest.json                    row and slot counts, source hashes
+    slots.npy                        int32 (power of two): row number, -1 when empty
+    hashes.npy                       uint64 (rows): hash of the row's key
+    syllable_count.npy               uint8 (rows)
+    stress.npy                       int8 (rows): primary-stress syllable (1-based), 0 unknown
+    origin.npy                       uint8 (rows): index into ORIGINS
+    <col>.offsets.npy / .strings.npy key, syllables (breakdown), ipa, stress_text
+
+Keys are lower-cased with punctuation removed and whitespace collapsed
+(lexicon_key), the same form textstat gives a word, so readability looks
+words up directly; it only trusts the counts of vocabulary entries
+(curated_syllable_count), not the generated ones.
+
+get_lexicon() only reads: a lexicon older than its sources is still
+served, with a warning. It is rebuilt by tools/build_pronunciation_lexicon.py
+and by the pronunciation stage of tools/build_vocabulary.py, each build
+staging in its own temporary directory next to the lexicon.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+
+from config import PRONUNCIATION_LEXICON_DIR, PRONUNCIATION_SOURCES
+from utils.compiled_vocab import _write_strings, source_digest
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+ORIGINS = ('vocabulary', 'composed', 'rules')
+STRING_COLUMNS = ('key', 'syllables', 'ipa', 'stress_text')
+ORDINALS = ('first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth', 'ninth', 'tenth')
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_PIECES = re.compile(r"[A-Za-z]+|[0-9]+")
+_STRESS_ORDINAL = re.compile(r"^(?:primary stress on\s+)?(?:the\s+)?(" + "|".join(ORDINALS) + r")(?:\s+syllable)?$",
+                             re.IGNORECASE)
+
+# Abbreviations read as words, not letter by letter: (breakdown, IPA, stress)
+SPOKEN_ABBREVIATIONS = {
+    'crispr': ("cris-per", "ˈkrɪspə", 1),
+    'cas': ("cas", "kæs", 1),
+    'seq': ("seq", "sɛk", 1),
+    'chip': ("chip", "tʃɪp", 1),
+    'snp': ("snip", "snɪp", 1),
+    'snps': ("snips", "snɪps", 1),
+    'gwas': ("gee-was", "ˈdʒiːwɒs", 1),
+    'talen': ("ta-len", "ˈtælən", 1),
+    'omics': ("o-mics", "ˈəʊmɪks", 1),
+    'fasta': ("fas-ta", "ˈfæstə", 1),
+    'blast': ("blast", "blɑːst", 1),
+}
+# Letter names for spelled-out acronyms: (IPA, syllables)
+LETTERS = {
+    'a': ("eɪ", 1), 'b': ("biː", 1), 'c': ("siː", 1), 'd': ("diː", 1), 'e': ("iː", 1), 'f': ("ɛf", 1),
+    'g': ("dʒiː", 1), 'h': ("eɪtʃ", 1), 'i': ("aɪ", 1), 'j': ("dʒeɪ", 1), 'k': ("keɪ", 1), 'l': ("ɛl", 1),
+    'm': ("ɛm", 1), 'n': ("en", 1), 'o': ("əʊ", 1), 'p': ("piː", 1), 'q': ("kjuː", 1), 'r': ("ɑːr", 1),
+    's': ("ɛs", 1), 't': ("tiː", 1), 'u': ("juː", 1), 'v': ("viː", 1), 'w': ("ˈdʌbəljuː", 3),
+    'x': ("ɛks", 1), 'y': ("waɪ", 1), 'z': ("zɛd", 1),
+}
+# Numbers up to 99 are read as words, longer ones digit by digit: (breakdown, IPA, syllables)
+DIGITS = {
+    '0': ("ze-ro", "ˈzɪərəʊ", 2), '1': ("one", "wʌn", 1), '2': ("two", "tuː", 1), '3': ("three", "θriː", 1),
+    '4': ("four", "fɔː", 1), '5': ("five", "faɪv", 1), '6': ("six", "sɪks", 1), '7': ("sev-en", "ˈsɛvən", 2),
+    '8': ("eight", "eɪt", 1), '9': ("nine", "naɪn", 1),
+}
+TEENS = {
+    '10': ("ten", "tɛn", 1), '11': ("e-lev-en", "ɪˈlɛvən", 3), '12': ("twelve", "twɛlv", 1),
+    '13': ("thir-teen", "θɜːˈtiːn", 2), '14': ("four-teen", "fɔːˈtiːn", 2), '15': ("fif-teen", "fɪfˈtiːn", 2),
+    '16': ("six-teen", "sɪksˈtiːn", 2), '17': ("sev-en-teen", "sɛvənˈtiːn", 3), '18': ("eigh-teen", "eɪˈtiːn", 2),
+    '19': ("nine-teen", "naɪnˈtiːn", 2),
+}
+TENS = {
+    '2': ("twen-ty", "ˈtwɛnti", 2), '3': ("thir-ty", "ˈθɜːti", 2), '4': ("for-ty", "ˈfɔːti", 2),
+    '5': ("fif-ty", "ˈfɪfti", 2), '6': ("six-ty", "ˈsɪksti", 2), '7': ("sev-en-ty", "ˈsɛvənti", 3),
+    '8': ("eigh-ty", "ˈeɪti", 2), '9': ("nine-ty", "ˈnaɪnti", 2),
+}
+# Stems that mark a word as omics vocabulary worth a lexicon entry
+OMICS_STEMS = re.compile(r"genom|transcript|prote|metabol|omic|ome$|omes$|phylo|epigen|nucle|lipid|glyc|ribo|"
+                         r"plasmid|cytom|microbi|phenom|interactom|allel|haplo|chromat|ortholog|paralog")
+# Common omics words the vocabulary may only use in passing; generated when it has no data for them
+SEED_TERMS = ('genomics', 'transcriptomics', 'proteomics', 'metabolomics', 'metagenomics', 'epigenomics',
+              'lipidomics', 'glycomics', 'phenomics', 'multi-omics', 'DNA', 'RNA', 'mRNA', 'cDNA', 'PCR', 'qPCR',
+              'RNA-seq', 'scRNA-seq', 'ChIP-seq', 'ATAC-seq', 'CRISPR', 'CRISPR-Cas9', 'GWAS', 'SNP', 'SNPs',
+              'FASTA', 'BLAST', '16S', 'sequencing', 'bioinformatics', 'microbiome', 'nucleotide', 'polymerase')
+
+# -omes whose field is an -omics (not chromosome, ribosome)
+_OMES = re.compile(r"[A-Za-z]*(?:gen|prote|metabol|transcript|lipid|glyc|phen|interact|microbi|vir)ome",
+                   re.IGNORECASE)
+_IPA_DIPHTHONGS = ('eɪ', 'aɪ', 'ɔɪ', 'əʊ', 'oʊ', 'aʊ', 'ɪə', 'eə', 'ɛə', 'ʊə')
+# Centring diphthongs only before r or at the end of a word (bacˈtɪəriə, but ˈnjuːklɪəsəʊm)
+_IPA_CENTRING = ('ɪə', 'ʊə')
+_IPA_VOWELS = frozenset("iɪeɛæaɑɒɔʌʊuəɜɐoyɚɝ")
+_VOWELS = frozenset("aeiouy")
+# Adjacent vowels pronounced as two syllables (pro-te-ome, bac-te-ri-a)
+_HIATUS = frozenset(('eo', 'io', 'ia', 'iu', 'ua', 'uo', 'ii', 'oe'))
+# Consonant pairs that start a syllable (nu-cle-o-tide, se-quen-cing); ck and ng end one
+_ONSETS = frozenset(('ch', 'sh', 'th', 'ph', 'gh', 'wh', 'qu', 'bl', 'cl', 'fl', 'gl', 'pl', 'br', 'cr', 'dr', 'fr',
+                     'gr', 'pr', 'tr'))
+_CODAS = frozenset(('ck', 'ng'))
+
+
+def lexicon_key(text):
+    """Lookup key: lower-case, punctuation removed, whitespace collapsed"""
+    return " ".join(_PUNCTUATION.sub("", text.lower()).split())
+
+
+def key_hash(key):
+    return int.from_bytes(blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def ordinal(n):
+    return ORDINALS[n - 1] if 1 <= n <= len(ORDINALS) else f"{n}th"
+
+
+def stress_description(stress):
+    return f"Primary stress on {ordinal(stress)} syllable" if stress else ""
+
+
+# -- IPA ----------------------------------------------------------------------
+
+def ipa_syllables(ipa):
+    """(syllable count, primary-stress syllable or 0) read off an IPA transcription"""
+    count, stress, marked, i = 0, 0, False, 0
+    while i < len(ipa):
+        if ipa[i] == 'ˈ':
+            marked = True
+            i += 1
+            continue
+        pair = ipa[i:i + 2]
+        if pair in _IPA_DIPHTHONGS and (pair not in _IPA_CENTRING or ipa[i + 2:i + 3] in ("", "r", " ")):
+            i += 2
+        elif ipa[i] in _IPA_VOWELS:
+            i += 1
+        else:
+            i += 1
+            continue
+        if i < len(ipa) and ipa[i] == 'ː':
+            i += 1
+        count += 1
+        if marked and not stress:
+            stress = count
+    return count, stress
+
+
+# -- spelling rules -------------------------------------------------------------
+
+def _nuclei(word):
+    """[(start, end)] of the vowel nuclei of a lower-case word"""
+    nuclei, i = [], 0
+    while i < len(word):
+        ch = word[i]
+        is_vowel = ch in _VOWELS and not (ch == 'y' and i == 0 and len(word) > 1 and word[1] in _VOWELS)
+        if ch == 'u' and i > 0 and word[i - 1] == 'q':
+            is_vowel = False
+        if not is_vowel:
+            i += 1
+            continue
+        start = i
+        i += 1
+        # y closes a vowel (assay, key) unless a vowel follows it (mayo)
+        while i < len(word) and word[i] in _VOWELS and (word[i] != 'y' or word[i + 1:i + 2] not in _VOWELS):
+            pair = word[i - 1:i + 1]
+            # -tion, -sion, -cial, -tian: the i is a glide, not a syllable
+            glide = pair[0] == 'i' and i >= 2 and word[i - 2] in "tsc"
+            # -eic, -eus and -eum are two syllables (nu-cle-ic, nu-cle-us), unlike pro-tein;
+            # so is the o of a bio- prefix (bi-o-in-for-ma-tics)
+            split = (word.endswith(("eic", "eus", "eum"), 0, i + 2) and i + 2 == len(word)
+                     or word.startswith("bio") and i == 3)
+            if (pair in _HIATUS and not glide) or split:
+                break
+            i += 1
+        nuclei.append((start, i))
+
+    if len(nuclei) > 1:
+        end = nuclei[-1]
+        # Silent final e (genome, peptide) and the e of -es/-ed (genomes, cloned),
+        # but not syllabic -le (nucleotide keeps its final syllable via "ide")
+        if end == (len(word) - 1, len(word)) and word.endswith("e") and not word.endswith(("le", "ee")):
+            nuclei.pop()
+        elif end == (len(word) - 2, len(word) - 1) and word.endswith("es") and word[-3] not in "sxzcg":
+            nuclei.pop()
+        elif end == (len(word) - 2, len(word) - 1) and word.endswith("ed") and word[-3] not in "td":
+            nuclei.pop()
+    if word.endswith(("ism", "isms")):
+        # Syllabic m: po-ly-mor-phi-sm
+        nuclei.append((len(word) - 1 - word.endswith("s"), len(word) - word.endswith("s")))
+    return nuclei or [(0, len(word))]
+
+
+def syllabify(word):
+    """Hyphenated syllables of a lower-case word by spelling rules"""
+    nuclei = _nuclei(word)
+    cuts = []
+    for (_, end), (start, _) in zip(nuclei, nuclei[1:]):
+        cluster = word[end:start]
+        if len(cluster) <= 1 or cluster in _ONSETS:
+            cuts.append(end)
+        elif cluster in _CODAS:
+            cuts.append(end + 2)
+        else:
+            cuts.append(end + 1)
+    bounds = [0, *cuts, len(word)]
+    return [word[a:b] for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def rule_stress(word, count):
+    """Primary-stress syllable (1-based) of a word by English suffix rules"""
+    if count <= 1:
+        return 1
+    if word.endswith(("tion", "sion", "cian", "ic", "ics")):
+        return count - 1
+    if word.endswith(("ical", "ity", "ogy", "omy", "graphy", "metry", "ome", "omes", "ism")) and count >= 3:
+        return count - 2
+    for suffix in ("ing", "ed", "er", "s", "al", "ally"):
+        if word.endswith(suffix) and len(word) > len(suffix) + 3:
+            base = word[:-len(suffix)]
+            base_count = len(_nuclei(base))
+            if 1 <= base_count < count:
+                return rule_stress(base, base_count)
+    return 1 if count == 2 else max(1, count - 2)
+
+
+# -- building entries -----------------------------------------------------------
+
+def _piece_entry(piece, lexicon):
+    """(breakdown, IPA or None, syllables, stress, from the lexicon) of a letter or digit run"""
+    key = piece.lower()
+    entry = lexicon.get(key) if lexicon is not None else None
+    if entry is not None:
+        return entry['syllables'], entry['ipa'] or None, entry['syllable_count'], entry['stress'], True
+    if key in SPOKEN_ABBREVIATIONS:
+        breakdown, ipa, stress = SPOKEN_ABBREVIATIONS[key]
+        return breakdown, ipa, breakdown.count("-") + 1, stress, False
+    if piece.isdigit():
+        number = piece.lstrip("0") or "0"
+        if number in TEENS:
+            words = [TEENS[number]]
+        elif len(number) == 2:
+            words = [TENS[number[0]]] + ([DIGITS[number[1]]] if number[1] != "0" else [])
+        else:
+            words = [DIGITS[d] for d in piece]
+        count = sum(w[2] for w in words)
+        # Stress falls on the last word
+        last_count, last_stress = ipa_syllables(words[-1][1])
+        return (" ".join(w[0] for w in words), " ".join(w[1] for w in words), count,
+                count - last_count + (last_stress or 1), False)
+    if (piece.isupper() and len(piece) <= 5) or len(piece) == 1 or sum(c.isupper() for c in piece) > 1 \
+            or not _VOWELS.intersection(key):
+        # Spelled out (DNA, qPCR), stressing the last letter
+        letters = [LETTERS[c] for c in key if c in LETTERS]
+        count = sum(letter[1] for letter in letters)
+        return "-".join(piece.upper()), " ".join(letter[0] for letter in letters), count, count, False
+    syllables = syllabify(key)
+    return "-".join(syllables), None, len(syllables), rule_stress(key, len(syllables)), False
+
+
+def _word_entry(word, lexicon):
+    """Entry fields for one whitespace-separated word (pieces split at hyphens, digits)"""
+    pieces = _PIECES.findall(word)
+    if not pieces:
+        return None
+    parts = [_piece_entry(piece, lexicon) for piece in pieces]
+    # Compounds take the stress of their first part
+    return {
+        'syllables': "-".join(p[0] for p in parts),
+        'ipa': " ".join(p[1] for p in parts) if all(p[1] for p in parts) else "",
+        'syllable_count': sum(p[2] for p in parts),
+        'stress': parts[0][3],
+        'origin': 'composed' if any(p[4] for p in parts) else 'rules',
+    }
+
+
+def generate_entry(term, lexicon=None):
+    """Entry for a term with no vocabulary data, composed from known words where possible
+
+    lexicon: a mapping key -> entry (a PronunciationLexicon or dict) for
+    the words already known.
+    """
+    words = [w for w in term.split() if _PIECES.search(w)]
+    known = [lexicon.get(lexicon_key(w)) if lexicon is not None else None for w in words]
+    entries = [k or _word_entry(w, lexicon) for k, w in zip(known, words)]
+    if not entries:
+        return None
+    count = sum(e['syllable_count'] for e in entries)
+    if len(entries) == 1:
+        stress, stress_text = entries[0]['stress'], stress_description(entries[0]['stress'])
+    else:
+        # Noun phrases stress their last word
+        stress = sum(e['syllable_count'] for e in entries[:-1]) + entries[-1]['stress']
+        stress_text = f"Primary stress on {ordinal(len(entries))} word"
+    return {
+        'key': lexicon_key(term),
+        'syllables': " ".join(e['syllables'] for e in entries),
+        'ipa': " ".join(e['ipa'] for e in entries) if all(e['ipa'] for e in entries) else "",
+        'syllable_count': count,
+        'stress': stress,
+        'stress_text': stress_text,
+        'origin': 'rules' if all(e['origin'] == 'rules' for e in entries) else 'composed',
+    }
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) and value.strip() else ""
+
+
+def _normalize_stress(text, stress):
+    """Vocabulary stress notes, completed where they are a bare ordinal ("second")"""
+    match = _STRESS_ORDINAL.match(text)
+    if match:
+        return stress_description(ORDINALS.index(match.group(1).lower()) + 1)
+    return text or stress_description(stress)
+
+
+def vocabulary_entries(term, phonetic, syllables, stress_note):
+    """Entries from one vocabulary row: the term and, for phrases, each of its words"""
+    key = lexicon_key(term)
+    phonetic, syllables, stress_note = _text(phonetic), _text(syllables), _text(stress_note)
+    if not key or not (phonetic or syllables):
+        return []
+
+    count, stress = ipa_syllables(phonetic) if phonetic else (0, 0)
+    if not count:
+        count = len([s for s in re.split(r"[-\s]+", syllables) if s])
+    match = _STRESS_ORDINAL.match(stress_note)
+    if match:
+        stress = ORDINALS.index(match.group(1).lower()) + 1
+    entries = [{
+        'key': key,
+        'syllables': syllables or "-".join(syllabify(key)),
+        'ipa': phonetic,
+        'syllable_count': count,
+        'stress': stress,
+        'stress_text': _normalize_stress(stress_note, stress),
+        'origin': 'vocabulary',
+    }]
+
+    words = term.split()
+    if len(words) > 1:
+        breakdowns = syllables.split()
+        breakdowns = breakdowns if len(breakdowns) == len(words) else [""] * len(words)
+        for word, breakdown, ipa in zip(words, breakdowns, _align_ipa(phonetic, breakdowns)):
+            if not breakdown and not ipa:
+                continue
+            key = lexicon_key(word)
+            word_count, word_stress = ipa_syllables(ipa) if ipa else (0, 0)
+            if not word_count:
+                word_count = len([s for s in breakdown.split("-") if s])
+            if not word_stress:
+                # Spelled-out letters (R-N-A) stress the last one
+                spelled = bool(breakdown) and all(len(s) == 1 and s.isupper() for s in breakdown.split("-"))
+                word_stress = word_count if spelled else rule_stress(key, word_count)
+            entries.append({
+                'key': key,
+                'syllables': breakdown or "-".join(syllabify(key)),
+                'ipa': ipa,
+                'syllable_count': word_count,
+                'stress': word_stress,
+                'stress_text': stress_description(word_stress),
+                'origin': 'vocabulary',
+            })
+    return entries
+
+
+def _align_ipa(phonetic, breakdowns):
+    """Per-word IPA of a phrase transcription, grouping its space-separated chunks
+    by the syllable count of each word's breakdown ("" where they do not line up)"""
+    chunks = phonetic.split()
+    if len(chunks) == len(breakdowns):
+        return chunks
+    aligned, i = [], 0
+    for breakdown in breakdowns:
+        wanted = len([s for s in breakdown.split("-") if s])
+        group, count = [], 0
+        while wanted and count < wanted and i < len(chunks):
+            group.append(chunks[i])
+            count += ipa_syllables(chunks[i])[0]
+            i += 1
+        if not wanted or count != wanted:
+            return [""] * len(breakdowns)
+        aligned.append(" ".join(group))
+    return aligned if i == len(chunks) else [""] * len(breakdowns)
+
+
+def omics_words(text):
+    """Words of running text that are omics vocabulary (stems, acronyms, alphanumerics)"""
+    for token in text.split():
+        token = token.strip(".,;:()[]{}\"'")
+        if not token or not _PIECES.search(token):
+            continue
+        key = lexicon_key(token)
+        if (OMICS_STEMS.search(key) or any(c.isdigit() for c in key) and any(c.isalpha() for c in key)
+                or (len(token) >= 2 and token.isupper() and token.isalpha())):
+            yield token
+
+
+def collect_entries(frames):
+    """{key: entry} from vocabulary DataFrames, earlier frames and rows first"""
+    entries = {}
+    for frame in frames:
+        columns = {name: frame[name].tolist() if name in frame else [None] * len(frame)
+                   for name in ('term', 'phonetic', 'syllables', 'stress')}
+        for term, phonetic, syllables, stress in zip(*columns.values()):
+            if not isinstance(term, str):
+                continue
+            for entry in vocabulary_entries(term, phonetic, syllables, stress):
+                entries.setdefault(entry['key'], entry)
+
+    # Rules for terms without data, their words, omics words of the definitions,
+    # the seed terms, and the -omics field of each -ome (metagenome -> metagenomics)
+    candidates = []
+    for frame in frames:
+        for name in ('term', 'definition', 'example'):
+            if name not in frame:
+                continue
+            for text in frame[name].dropna().astype(str):
+                if name == 'term':
+                    candidates.append(text)
+                    candidates.extend(text.split())
+                else:
+                    candidates.extend(omics_words(text))
+    candidates.extend(SEED_TERMS)
+    candidates.extend(c[:-1] + "ics" for c in list(candidates) if _OMES.fullmatch(c))
+    for candidate in candidates:
+        key = lexicon_key(candidate)
+        if key and key not in entries:
+            entry = generate_entry(candidate, entries)
+            if entry is not None:
+                entries[key] = entry
+    return entries
+
+
+# -- compiled table -------------------------------------------------------------
+
+def build_lexicon(entries, directory=PRONUNCIATION_LEXICON_DIR, sources=()):
+    """Compile {key: entry} into `directory`; returns the manifest"""
+    rows = [entries[key] for key in sorted(entries)]
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    # Private to this build, on the lexicon's filesystem so the swap is a rename
+    work = Path(tempfile.mkdtemp(prefix=f".{directory.name}-", dir=directory.parent))
+    try:
+        manifest = _write_lexicon(rows, work / "new", sources)
+        if directory.exists():
+            os.replace(directory, work / "old")
+        os.replace(work / "new", directory)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return manifest
+
+
+def _write_lexicon(rows, staging, sources):
+    staging.mkdir()
+
+    hashes = np.fromiter((key_hash(row['key']) for row in rows), dtype=np.uint64, count=len(rows))
+    # Load factor at most 1/2, so probe chains stay short
+    size = 1 << max(4, (2 * len(rows) - 1).bit_length())
+    slots = np.full(size, -1, dtype=np.int32)
+    mask = size - 1
+    for row, value in enumerate(hashes.tolist()):
+        slot = value & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = row
+
+    np.save(staging / "slots.npy", slots)
+    np.save(staging / "hashes.npy", hashes)
+    np.save(staging / "syllable_count.npy", np.array([min(r['syllable_count'], 255) for r in rows], dtype=np.uint8))
+    np.save(staging / "stress.npy", np.array([min(r['stress'], 127) for r in rows], dtype=np.int8))
+    np.save(staging / "origin.npy", np.array([ORIGINS.index(r['origin']) for r in rows], dtype=np.uint8))
+    for name in STRING_COLUMNS:
+        _write_strings(staging, name, [row[name] for row in rows])
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'rows': len(rows),
+        'slots': size,
+        'origins': {origin: sum(r['origin'] == origin for r in rows) for origin in ORIGINS},
+        'sources': [{'name': Path(s).name, 'blake2b': source_digest(s)} for s in sources if Path(s).exists()],
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    (staging / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest
+
+
+def build_from_sources(sources=PRONUNCIATION_SOURCES, directory=PRONUNCIATION_LEXICON_DIR):
+    import pandas as pd
+
+    frames = [pd.read_csv(source) for source in sources if Path(source).exists()]
+    return build_lexicon(collect_entries(frames), directory, sources)
+
+
+_CURATED = ORIGINS.index('vocabulary')
+
+
+class PronunciationLexicon:
+    """Read-only, memory-mapped lexicon; get(key) is one hash probe sequence"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported pronunciation lexicon format: {self.manifest.get('format')}")
+        load = lambda name: np.load(self.directory / f"{name}.npy", mmap_mode='r')  # noqa: E731
+        self._slots = load("slots")
+        self._mask = len(self._slots) - 1
+        self._hashes = load("hashes")
+        self._counts = load("syllable_count")
+        self._stress = load("stress")
+        self._origin = load("origin")
+        self._strings = {name: (load(f"{name}.offsets"), load(f"{name}.strings")) for name in STRING_COLUMNS}
+
+    @classmethod
+    def load(cls, directory=PRONUNCIATION_LEXICON_DIR):
+        """The lexicon, or None when it has not been built"""
+        try:
+            return cls(directory)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __contains__(self, key):
+        return self.row(key) is not None
+
+    def _string(self, name, row):
+        offsets, data = self._strings[name]
+        return data[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def row(self, key):
+        """Row number of a normalized key, or None"""
+        value = key_hash(key)
+        slot = value & self._mask
+        while True:
+            row = int(self._slots[slot])
+            if row < 0:
+                return None
+            if int(self._hashes[row]) == value and self._string('key', row) == key:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def syllable_count(self, key):
+        row = self.row(key)
+        return None if row is None else int(self._counts[row])
+
+    def curated_syllable_count(self, key):
+        """Syllable count of a vocabulary entry; None for generated entries and unknown keys"""
+        row = self.row(key)
+        return None if row is None or self._origin[row] != _CURATED else int(self._counts[row])
+
+    def entry(self, row):
+        return {
+            'key': self._string('key', row),
+            'syllables': self._string('syllables', row),
+            'ipa': self._string('ipa', row),
+            'syllable_count': int(self._counts[row]),
+            'stress': int(self._stress[row]),
+            'stress_text': self._string('stress_text', row),
+            'origin': ORIGINS[self._origin[row]],
+        }
+
+    def get(self, key, default=None):
+        row = self.row(key)
+        return default if row is None else self.entry(row)
+
+    def is_fresh(self, sources=PRONUNCIATION_SOURCES):
+        """True when built from the current content of the sources"""
+        recorded = {s['name']: s['blake2b'] for s in self.manifest.get('sources', [])}
+        try:
+            return all(recorded.get(Path(s).name) == source_digest(s) for s in sources if Path(s).exists())
+        except OSError:
+            return False
+
+
+_lexicon = None  # (stamp, lexicon or None)
+_lexicon_lock = threading.Lock()
+
+
+def _stamp(directory, sources):
+    """Size and mtime of the sources and the manifest: a cheap change check before hashing"""
+    stamp = []
+    for path in (*map(Path, sources), Path(directory) / "manifest.json"):
+        try:
+            info = path.stat()
+            stamp.append((info.st_size, info.st_mtime_ns))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _load_current(directory, sources):
+    """The lexicon as it is on disk; a missing or stale one is only logged"""
+    lexicon = PronunciationLexicon.load(directory)
+    if lexicon is None:
+        logger.warning("No pronunciation lexicon in %s; run tools/build_pronunciation_lexicon.py", directory)
+    elif not lexicon.is_fresh(sources):
+        logger.warning("The pronunciation lexicon in %s is older than its sources; "
+                       "run tools/build_pronunciation_lexicon.py", directory)
+    return lexicon
+
+
+def get_lexicon():
+    """Process-wide lexicon (memory-mapped), or None when there is none
+
+    Reloaded when the manifest or a source file changes size or mtime.
+    """
+    global _lexicon
+    stamp = _stamp(PRONUNCIATION_LEXICON_DIR, PRONUNCIATION_SOURCES)
+    if _lexicon is None or _lexicon[0] != stamp:
+        with _lexicon_lock:
+            if _lexicon is None or _lexicon[0] != stamp:
+                _lexicon = (stamp, _load_current(PRONUNCIATION_LEXICON_DIR, PRONUNCIATION_SOURCES))
+    return _lexicon[1]
+
+
+def pronunciation(term):
+    """Lexicon entry for a term, generated by the rules when the lexicon lacks it"""
+    lexicon = get_lexicon()
+    entry = lexicon.get(lexicon_key(term)) if lexicon is not None else None
+    return entry or generate_entry(term, lexicon)
@@ -0,0 +1,160 @@
+﻿"""
+Quiz generation from precomputed distractor pools
+
+Built once per vocabulary version: definitions, terms and categories as
+integer-indexed arrays, plus every category's rows laid out contiguously
+(CSR-style) so a term's distractor pool is a slice. A whole quiz draws its
+distractors in one vectorized pass: for each question, k distinct rows
+from its pool excluding the correct answer (Floyd's sampling on random
+numbers drawn once for the quiz), unless the offline similarity index
+supplies the most confusable definitions.
+
+Distractors come from the term's own category when it has enough terms
+(plausible wrong answers), otherwise from the whole vocabulary. Quizzes on
+vocabularies with fewer than four terms get fewer options.
+"""
+
+import re
+
+import numpy as np
+
+QUESTION_TYPES = ('multiple_choice', 'fill_blank', 'true_false')
+# Quiz type names shown in the UI
+TYPE_CHOICES = {
+    'Mixed': QUESTION_TYPES,
+    'Multiple Choice': ('multiple_choice',),
+    'Fill in the Blank': ('fill_blank',),
+    'True/False': ('true_false',),
+}
+DISTRACTORS = 3
+BLANK = "_____"
+
+
+class QuizPool:
+    """Integer-indexed vocabulary arrays and per-category distractor pools"""
+
+    def __init__(self, terms, definitions, categories):
+        self.terms = np.asarray(terms, dtype=object)
+        self.definitions = np.asarray(definitions, dtype=object)
+        self.category_names, codes = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        self.categories = codes.astype(np.int32)
+        n = len(self.terms)
+
+        # Pool table: one pool per category, then the whole vocabulary
+        order = np.argsort(self.categories, kind='stable').astype(np.int32)
+        counts = np.bincount(self.categories, minlength=len(self.category_names))
+        self.members = np.concatenate([order, np.arange(n, dtype=np.int32)])
+        self.pool_start = np.concatenate([[0], np.cumsum(counts)[:-1], [n]]).astype(np.int64)
+        self.pool_size = np.concatenate([counts, [n]]).astype(np.int64)
+        self.global_pool = len(self.category_names)
+
+        # Position of every row inside its category pool
+        self.rank_in_category = np.empty(n, dtype=np.int64)
+        self.rank_in_category[order] = np.arange(n) - np.repeat(self.pool_start[:-1], counts)
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(
+            frame['term'].astype(str).to_numpy(),
+            frame['definition'].fillna('').astype(str).to_numpy(),
+            frame['category'].astype(object).fillna('').astype(str).to_numpy(),
+        )
+
+    def __len__(self):
+        return len(self.terms)
+
+    def draw_distractors(self, rows, rng, k=DISTRACTORS):
+        """Rows of k distinct distractors per question (-1 where the pool is too small)
+
+        Same-category pools are used when they hold at least k other terms.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        k = max(min(k, len(self) - 1), 0)
+        if k == 0:
+            return np.full((len(rows), 0), -1, dtype=np.int64)
+
+        pool = self.categories[rows].astype(np.int64)
+        use_global = self.pool_size[pool] <= k
+        pool = np.where(use_global, self.global_pool, pool)
+        correct_at = np.where(use_global, rows, self.rank_in_category[rows])
+        others = self.pool_size[pool] - 1
+
+        # Floyd: step j picks from [0, others - k + j]; a repeat takes the top value
+        u = rng.random((len(rows), k))
+        picks = np.empty((len(rows), k), dtype=np.int64)
+        for j in range(k):
+            top = others - k + j
+            choice = (u[:, j] * (top + 1)).astype(np.int64)
+            taken = (picks[:, :j] == choice[:, None]).any(axis=1)
+            picks[:, j] = np.where(taken, top, choice)
+
+        # Skip over the correct answer, then map pool positions to rows
+        picks += picks >= correct_at[:, None]
+        return self.members[self.pool_start[pool][:, None] + picks]
+
+    def generate(self, rows, count, q_type='Mixed', rng=None, similar=None):
+        """Quiz questions for `count` terms sampled from `rows` (frame positions)
+
+        With a similarity index (utils.similarity_index), terms whose k
+        nearest definitions are known use those as distractors.
+        """
+        rng = rng or np.random.default_rng()
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return []
+        rows = rng.choice(rows, size=min(count, len(rows)), replace=False)
+
+        types = np.asarray(TYPE_CHOICES.get(q_type, QUESTION_TYPES))
+        kinds = types[rng.integers(len(types), size=len(rows))]
+        distractors = self.draw_distractors(rows, rng)
+        if similar is not None and distractors.shape[1]:
+            nearest = similar.neighbours_for(rows, distractors.shape[1])
+            if nearest.shape[1] == distractors.shape[1]:
+                known = (nearest >= 0).all(axis=1)
+                distractors[known] = nearest[known]
+        # Options in random order: column 0 is the correct row
+        options = np.concatenate([rows[:, None], distractors], axis=1)
+        options = rng.permuted(options, axis=1)
+        truthful = rng.random(len(rows)) < 0.5
+
+        questions = []
+        for i, row in enumerate(rows):
+            term, definition = self.terms[row], self.definitions[row]
+            explanation = f"In {self.category_names[self.categories[row]]}: {definition}"
+            kind = kinds[i]
+            if kind == 'multiple_choice' and distractors.shape[1] == 0:
+                kind = 'fill_blank'
+
+            if kind == 'multiple_choice':
+                questions.append({
+                    'type': 'multiple_choice',
+                    'question': f"What is the definition of '{term}'?",
+                    'options': self.definitions[options[i]].tolist(),
+                    'correct_answer': definition,
+                    'explanation': explanation
+                })
+            elif kind == 'fill_blank':
+                clue = re.sub(re.escape(term), BLANK, definition, flags=re.IGNORECASE)
+                questions.append({
+                    'type': 'fill_blank',
+                    'question': f"Which term matches this definition? {clue}",
+                    'correct_answer': term,
+                    'explanation': explanation
+                })
+            else:
+                shown_true = truthful[i] or distractors.shape[1] == 0
+                shown = definition if shown_true else self.definitions[distractors[i, 0]]
+                questions.append({
+                    'type': 'true_false',
+                    'question': f"True or false: '{term}' means \"{shown}\"",
+                    'correct_answer': "True" if shown_true or shown == definition else "False",
+                    'explanation': explanation
+                })
+        return questions
+
+
+def quiz_pool_for(snapshot):
+    """Quiz pool for a vocabulary snapshot, built once per file version"""
+    # Only the columns it needs are decoded from a compiled vocabulary
+    columns = ('term', 'definition', 'category')
+    return snapshot.derived('quiz_pool', lambda snap: QuizPool.from_frame(snap.columns(columns)))
@@ -0,0 +1,201 @@
+﻿"""
+One-pass readability scoring
+
+Computes the scores of nlp_engine.get_readability_score (Flesch reading
+ease, Flesch-Kincaid grade, average sentence length, difficult words,
+reading time) from a single set of counts per text, instead of five
+textstat calls that each re-tokenize the text and re-syllabify every
+word. Syllables of the curated vocabulary words come from the
+pronunciation lexicon (utils.pronunciation), all others from the same
+pyphen dictionary as textstat; both are memoized per word (as is the
+difficult-word test) in bounded LRUs shared by all texts.
+
+Words, sentences and difficult words follow textstat 0.7.3's own rules
+(punctuation-stripped whitespace tokens, its sentence regex, the Dale-Chall
+easy-word list), so the scores are identical to textstat's for text
+without vocabulary words, or with use_lexicon(False). The counts are
+additive, so the scores of a document can be computed from the counts of
+its paragraphs (see utils.incremental_analysis).
+"""
+
+import importlib.util
+import math
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from config import READABILITY_SYLLABLE_CACHE_SIZE, READABILITY_USE_LEXICON
+from utils.pronunciation import get_lexicon
+
+# textstat 0.7.3 patterns and English constants
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SENTENCE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+_WORD_CHARACTER = re.compile(r"\w")
+_DIFFICULT_CANDIDATE = re.compile(r"[\w\='‘’]+")
+FRE_BASE, FRE_SENTENCE_LENGTH, FRE_SYLLABLES_PER_WORD = 206.835, 1.015, 84.6
+MS_PER_CHAR = 14.69
+DIFFICULT_SYLLABLES = 2
+MIN_TEXT_LENGTH = 10
+
+_resources = {}
+_resources_lock = threading.Lock()
+_use_lexicon = READABILITY_USE_LEXICON
+_lexicon = None  # the lexicon the word caches were filled from
+
+
+def _load_resources():
+    """pyphen dictionary and Dale-Chall easy words, loaded once
+
+    The word list is read from textstat's package data without importing
+    textstat (whose import pulls in pkg_resources).
+    """
+    if not _resources:
+        with _resources_lock:
+            if not _resources:
+                from pyphen import Pyphen
+
+                package = Path(importlib.util.find_spec("textstat").origin).parent
+                with open(package / "resources" / "en" / "easy_words.txt", encoding="utf-8") as f:
+                    easy_words = frozenset(line.strip() for line in f)
+                _resources.update(pyphen=Pyphen(lang="en_US"), easy_words=easy_words)
+    return _resources
+
+
+def use_lexicon(enabled=True):
+    """Take syllables from the pronunciation lexicon (the default) or from pyphen alone"""
+    global _use_lexicon
+    _use_lexicon = enabled
+    _sync_lexicon()
+
+
+def legacy_round(number, points=0):
+    """textstat's half-away-from-zero rounding"""
+    p = 10 ** points
+    return float(math.floor((number * p) + math.copysign(0.5, number))) / p
+
+
+def _sync_lexicon():
+    """Follow a reloaded or rebuilt lexicon, dropping the counts taken from the old one"""
+    global _lexicon
+    lexicon = get_lexicon() if _use_lexicon else None
+    if lexicon is not _lexicon:
+        _lexicon = lexicon
+        clear_word_caches()
+
+
+@lru_cache(maxsize=READABILITY_SYLLABLE_CACHE_SIZE)
+def syllables(word):
+    """Syllables of a lower-case word without punctuation: its curated lexicon
+    count, otherwise pyphen hyphenation points + 1"""
+    if _lexicon is not None:
+        count = _lexicon.curated_syllable_count(word)
+        if count:
+            return count
+    return len(_load_resources()['pyphen'].positions(word)) + 1
+
+
+def syllable_cache_stats():
+    info = syllables.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize, 'max_entries': info.maxsize}
+
+
+def clear_word_caches():
+    syllables.cache_clear()
+    is_difficult.cache_clear()
+
+
+@lru_cache(maxsize=READABILITY_SYLLABLE_CACHE_SIZE)
+def is_difficult(word):
+    """Dale-Chall difficult word: not on the easy-word list and of two syllables or more"""
+    if word in _load_resources()['easy_words']:
+        return False
+    word = _PUNCTUATION.sub("", word)
+    return bool(word) and syllables(word) >= DIFFICULT_SYLLABLES
+
+
+def _is_long_sentence(sentence):
+    """More than two words once punctuation is removed (a token survives if it has a word character)"""
+    tokens = sentence.split()
+    if len(tokens) < 3:
+        return False
+    words = 0
+    for token in tokens:
+        if token.isalnum() or _WORD_CHARACTER.search(token):
+            words += 1
+            if words > 2:
+                return True
+    return False
+
+
+def readability_counts(text):
+    """Additive counts behind the scores of a text
+
+    {'words', 'syllables', 'sentences', 'difficult_words' (sorted list),
+    'word_chars'}; 'sentences' counts the sentences of more than two words
+    and may be 0.
+    """
+    _sync_lexicon()
+    stripped = _PUNCTUATION.sub("", text)
+    lowered = text.lower()
+    # textstat lower-cases before removing punctuation; that only makes a
+    # difference outside ASCII
+    syllable_words = (stripped.lower() if text.isascii() else _PUNCTUATION.sub("", lowered)).split()
+    return {
+        'words': len(stripped.split()),
+        'syllables': sum(map(syllables, syllable_words)),
+        'sentences': sum(map(_is_long_sentence, _SENTENCE.findall(text))),
+        'difficult_words': sorted(filter(is_difficult, set(_DIFFICULT_CANDIDATE.findall(lowered)))),
+        'word_chars': sum(map(len, text.split())),
+    }
+
+
+def combine_counts(counts):
+    """Counts of a document from the counts of its parts"""
+    counts = list(counts)
+    return {
+        'words': sum(c['words'] for c in counts),
+        'syllables': sum(c['syllables'] for c in counts),
+        'sentences': sum(c['sentences'] for c in counts),
+        'difficult_words': sorted(set().union(*(c['difficult_words'] for c in counts))),
+        'word_chars': sum(c['word_chars'] for c in counts),
+    }
+
+
+def scores_from_counts(counts):
+    """The get_readability_score dict for counts, with textstat's rounding"""
+    words = counts['words']
+    sentence_length = legacy_round(words / max(1, counts['sentences']), 1)
+    syllables_per_word = legacy_round(counts['syllables'] / words, 1) if words else 0.0
+    reading_ease = legacy_round(FRE_BASE - FRE_SENTENCE_LENGTH * sentence_length
+                                - FRE_SYLLABLES_PER_WORD * syllables_per_word, 2)
+    grade = legacy_round(0.39 * sentence_length + 11.8 * syllables_per_word - 15.59, 1)
+    reading_seconds = legacy_round(counts['word_chars'] * MS_PER_CHAR / 1000, 2)
+    return {
+        'flesch_reading_ease': round(reading_ease, 1),
+        'flesch_kincaid_grade': round(grade, 1),
+        'avg_sentence_length': round(sentence_length, 1),
+        'difficult_words': len(counts['difficult_words']),
+        'reading_time_minutes': round(reading_seconds / 60, 1)
+    }
+
+
+def readability_scores(text):
+    """Scores of a text or spaCy Doc, or None for text under MIN_TEXT_LENGTH characters
+
+    A Doc keeps its scores in user_data, so the checks sharing a cached Doc
+    count it once.
+    """
+    doc = None
+    if text is not None and not isinstance(text, str):
+        doc, text = text, text.text
+        scores = doc.user_data.get('readability')
+        if scores is not None:
+            return scores
+
+    if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+        return None
+    scores = scores_from_counts(readability_counts(text))
+    if doc is not None:
+        doc.user_data['readability'] = scores
+    return scores
@@ -0,0 +1,220 @@
+﻿"""
+Spaced-repetition review scheduler
+
+Review state is held in columnar NumPy arrays (one slot per term) with
+due dates as epoch-day integers, plus a due-date index: a heap of
+(due day, sequence, slot) entries. Rescheduling a term pushes a new entry
+(O(log n)) and leaves the old one to be dropped lazily at compaction;
+"due today" walks only the due part of the heap (O(k log k)).
+Bulk rescheduling is vectorized. Intervals come from a pluggable algorithm
+(utils.spaced_repetition, config.SCHEDULING_ALGORITHM).
+"""
+
+import heapq
+from datetime import date, datetime
+
+import numpy as np
+
+from config import SCHEDULING_ALGORITHM
+from utils.spaced_repetition import STATE_COLUMNS, get_algorithm, new_state
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Flashcard answers, encoded as small ints for the grade arrays
+GRADES = ('hard', 'medium', 'easy')
+GRADE_CODES = {name: code for code, name in enumerate(GRADES)}
+
+_NEVER = np.iinfo(np.int32).max
+
+
+def epoch_day(value=None):
+    """Days since 1970-01-01 for a date/datetime/ISO string (today if None)"""
+    if value is None:
+        value = date.today()
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_epoch_day(day):
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+class ReviewScheduler:
+    """Columnar review state with a lazily invalidated due-date heap"""
+
+    def __init__(self, capacity=64, algorithm=SCHEDULING_ALGORITHM):
+        self.algorithm = get_algorithm(algorithm) if isinstance(algorithm, str) else algorithm
+        self.terms = []
+        self._slots = {}
+        self.state = new_state(capacity)
+        self.due = np.full(capacity, _NEVER, dtype=np.int32)
+        self.last_day = np.zeros(capacity, dtype=np.int32)
+        # Due-date index: heap of (due day, sequence, slot); an entry is live
+        # while its sequence is the slot's latest (ties keep indexing order)
+        self._heap = []
+        self._live = [-1] * capacity  # per slot, read entry by entry while walking the heap
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self._slots
+
+    @classmethod
+    def from_tracking(cls, vocab_tracking, algorithm=SCHEDULING_ALGORITHM):
+        """Build from session_state['vocab_tracking'] (ISO dates plus optional 'srs' state)"""
+        scheduler = cls(capacity=max(len(vocab_tracking), 64), algorithm=algorithm)
+        terms = [term for term, data in vocab_tracking.items() if 'next_review' in data]
+
+        for slot, term in enumerate(terms):
+            data = vocab_tracking[term]
+            scheduler.due[slot] = epoch_day(data['next_review'])
+            if data.get('last_review'):
+                scheduler.last_day[slot] = epoch_day(data['last_review'])
+            srs = data.get('srs') or {'reps': data.get('reviews', 0)}
+            for name, value in srs.items():
+                if name in scheduler.state:
+                    scheduler.state[name][slot] = value
+
+        scheduler.terms = terms
+        scheduler._slots = {term: slot for slot, term in enumerate(terms)}
+        scheduler._rebuild_index()
+        return scheduler
+
+    def _grow(self, needed):
+        capacity = len(self.due)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        grown = new_state(capacity)
+        for name, column in self.state.items():
+            grown[name][:len(column)] = column
+        self.state = grown
+        for name, fill in (('due', _NEVER), ('last_day', 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self._live.extend([-1] * (capacity - len(self._live)))
+
+    def _rebuild_index(self):
+        n = len(self.terms)
+        self._heap = list(zip(self.due[:n].tolist(), range(n), range(n)))
+        heapq.heapify(self._heap)
+        self._live[:n] = range(n)
+        self._sequence = n
+
+    def _index(self, slot):
+        """Index a slot at its current due day, superseding its previous entry"""
+        self._live[slot] = self._sequence
+        heapq.heappush(self._heap, (int(self.due[slot]), self._sequence, slot))
+        self._sequence += 1
+        if len(self._heap) > 2 * len(self.terms) + 64:
+            # Mostly superseded entries: keep the live ones
+            live = self._live
+            self._heap = [entry for entry in self._heap if live[entry[2]] == entry[1]]
+            heapq.heapify(self._heap)
+
+    def _due_slots(self, today):
+        """Slots due on or before `today`, most overdue first
+
+        Walks the heap from the root without popping: a node due after
+        `today` has no due descendants, so only the due entries and their
+        direct children are visited.
+        """
+        heap, live = self._heap, self._live
+        size = len(heap)
+        due, stack = [], [0] if heap else []
+        while stack:
+            i = stack.pop()
+            entry = heap[i]
+            if entry[0] <= today:
+                due.append(entry)
+                child = 2 * i + 1
+                if child < size:
+                    stack.append(child)
+                    if child + 1 < size:
+                        stack.append(child + 1)
+        due.sort()
+        return [slot for _, sequence, slot in due if live[slot] == sequence]
+
+    def _slot(self, term):
+        slot = self._slots.get(term)
+        if slot is None:
+            slot = len(self.terms)
+            self._grow(slot + 1)
+            self.terms.append(term)
+            self._slots[term] = slot
+            self._index(slot)
+        return slot
+
+    def set_state(self, term, due_day, **state):
+        """Overwrite one term's due day (and any state columns) and reindex it"""
+        slot = self._slot(term)
+        self.due[slot] = due_day
+        for name, value in state.items():
+            self.state[name][slot] = value
+        self._index(slot)
+
+    def state_of(self, term):
+        """Plain-dict review state of one term (JSON-friendly, stored in vocab_tracking)"""
+        slot = self._slots[term]
+        state = {name: self.state[name][slot].item() for name in STATE_COLUMNS}
+        return {name: round(value, 4) if isinstance(value, float) else value for name, value in state.items()}
+
+    def due_count(self, today=None):
+        return len(self._due_slots(epoch_day() if today is None else today))
+
+    def due_terms(self, today=None):
+        """Terms due on or before `today` (epoch day), most overdue first"""
+        return [self.terms[slot] for slot in self._due_slots(epoch_day() if today is None else today)]
+
+    def reschedule(self, terms, grades, today=None):
+        """Vectorized review of many terms answered with the given grade codes"""
+        today = epoch_day() if today is None else today
+        slots = np.fromiter((self._slot(term) for term in terms), dtype=np.int32)
+        grades = np.asarray(grades, dtype=np.int32)
+
+        elapsed = np.where(self.state['reps'][slots] > 0, today - self.last_day[slots], 0)
+        reviewed = self.algorithm.review(
+            {name: column[slots] for name, column in self.state.items()}, grades, elapsed
+        )
+        for name, column in reviewed.items():
+            self.state[name][slots] = column
+
+        self.last_day[slots] = today
+        self.due[slots] = today + self.state['interval'][slots]
+        for slot in dict.fromkeys(slots.tolist()):
+            self._index(slot)
+        return self.due[slots]
+
+    def review(self, term, difficulty, today=None):
+        """Record one flashcard answer; returns the new due date and review state"""
+        today = epoch_day() if today is None else today
+        slot = self._slot(term)
+
+        elapsed = today - self.last_day[slot] if self.state['reps'][slot] > 0 else 0
+        reviewed = self.algorithm.review(
+            {name: column[slot:slot + 1] for name, column in self.state.items()},
+            np.array([GRADE_CODES[difficulty]], dtype=np.int32),
+            np.array([elapsed])
+        )
+        for name, column in reviewed.items():
+            self.state[name][slot] = column[0]
+
+        self.last_day[slot] = today
+        self.due[slot] = today + self.state['interval'][slot]
+        self._index(slot)
+        return from_epoch_day(self.due[slot]), self.state_of(term)
+
+
+def next_review_after(difficulty, tracking=None, now=None, algorithm=SCHEDULING_ALGORITHM):
+    """Next review datetime and review state for one answer, given the term's tracking entry"""
+    now = now or datetime.now()
+    scheduler = ReviewScheduler.from_tracking({'term': tracking or {}}, algorithm=algorithm)
+    due, state = scheduler.review('term', difficulty, epoch_day(now))
+    return datetime.combine(due, now.time()), state
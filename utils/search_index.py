@@ -0,0 +1,208 @@
+﻿"""
+Inverted index for vocabulary search
+
+Built once per vocabulary version and then queried on every keystroke:
+
+- prefix: word-start prefix match via a sorted array of word-start suffixes
+- substring: trigram postings intersected, then verified on the candidates
+  (queries shorter than a trigram scan the texts linearly)
+- token: exact word lookup in token postings
+
+All queries return sorted numpy arrays of row positions.
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+FIELDS = ('term', 'synonyms', 'definition')
+NGRAM = 3
+PREFIX_KEY_LENGTH = 32
+
+_WORD = re.compile(r"\w+")
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def normalize(text):
+    """Case-fold text for indexing and querying"""
+    if text is None:
+        return ""
+    if isinstance(text, float) and text != text:  # NaN from pandas
+        return ""
+    return str(text).casefold()
+
+
+class _Postings:
+    """Compressed (CSR) postings lists: key -> sorted row positions"""
+
+    def __init__(self, pairs):
+        key_ids = {}
+        key_buf = array('i')
+        row_buf = array('i')
+        for key, row in pairs:
+            key_id = key_ids.get(key)
+            if key_id is None:
+                key_id = key_ids[key] = len(key_ids)
+            key_buf.append(key_id)
+            row_buf.append(row)
+
+        keys = np.frombuffer(key_buf, dtype=np.int32) if key_buf else _EMPTY
+        rows = np.frombuffer(row_buf, dtype=np.int32) if row_buf else _EMPTY
+        order = np.lexsort((rows, keys))
+        self._keys = key_ids
+        self._rows = rows[order]
+        self._offsets = np.zeros(len(key_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=len(key_ids)), out=self._offsets[1:])
+
+    def get(self, key):
+        key_id = self._keys.get(key)
+        if key_id is None:
+            return _EMPTY
+        return self._rows[self._offsets[key_id]:self._offsets[key_id + 1]]
+
+
+class _FieldIndex:
+    """Index structures for one text field"""
+
+    def __init__(self, texts):
+        # texts: one normalized string per row ('' when missing)
+        self.texts = texts
+        grams, tokens, starts = [], [], []
+
+        for row, text in enumerate(texts):
+            if not text:
+                continue
+            grams.extend((g, row) for g in {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)})
+            words = list(_WORD.finditer(text))
+            tokens.extend((w, row) for w in {m.group() for m in words})
+            starts.extend((text[m.start():m.start() + PREFIX_KEY_LENGTH], row) for m in words)
+
+        self.grams = _Postings(grams)
+        self.tokens = _Postings(tokens)
+
+        starts.sort()
+        self.prefix_keys = [key for key, _ in starts]
+        self.prefix_rows = np.fromiter((row for _, row in starts), dtype=np.int32, count=len(starts))
+
+    def prefix(self, query):
+        key = query[:PREFIX_KEY_LENGTH]
+        lo = bisect_left(self.prefix_keys, key)
+        hi = bisect_left(self.prefix_keys, key + "\U0010ffff", lo)
+        rows = np.unique(self.prefix_rows[lo:hi])
+        if len(query) > PREFIX_KEY_LENGTH:
+            rows = self._verify(rows, query)
+        return rows
+
+    def substring(self, query):
+        if len(query) < NGRAM:
+            # No trigram to look up: a short query may match anywhere in a word
+            texts = self.texts
+            return np.fromiter((r for r in range(len(texts)) if query in texts[r]), dtype=np.int32)
+
+        postings = sorted(
+            (self.grams.get(query[i:i + NGRAM]) for i in range(len(query) - NGRAM + 1)),
+            key=len
+        )
+        candidates = postings[0]
+        for rows in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+
+        if len(query) == NGRAM:
+            return candidates
+        return self._verify(candidates, query)
+
+    def token(self, query):
+        words = _WORD.findall(query)
+        if not words:
+            return _EMPTY
+        rows = self.tokens.get(words[0])
+        for word in words[1:]:
+            rows = np.intersect1d(rows, self.tokens.get(word), assume_unique=True)
+        return rows
+
+    def _verify(self, rows, query):
+        texts = self.texts
+        return np.fromiter((r for r in rows if query in texts[r]), dtype=np.int32)
+
+
+class VocabularySearchIndex:
+    """Prefix, substring and token search over term, synonyms and definition"""
+
+    def __init__(self, terms, synonyms=None, definitions=None):
+        size = len(terms)
+        synonyms = synonyms if synonyms is not None else [()] * size
+        definitions = definitions if definitions is not None else [""] * size
+
+        self.size = size
+        self._fields = {
+            'term': _FieldIndex([normalize(t) for t in terms]),
+            # Synonyms are joined on newlines so a match never spans two of them
+            'synonyms': _FieldIndex(["\n".join(normalize(s) for s in syns or ()) for syns in synonyms]),
+            'definition': _FieldIndex([normalize(d) for d in definitions]),
+        }
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build from a vocabulary DataFrame (synonyms column is optional, ';'-separated)"""
+        synonyms = None
+        if 'synonyms' in frame.columns:
+            synonyms = [
+                [s.strip() for s in str(v).split(';') if s.strip()] if isinstance(v, str) else v
+                for v in frame['synonyms'].tolist()
+            ]
+        definitions = frame['definition'].tolist() if 'definition' in frame.columns else None
+        return cls(frame['term'].tolist(), synonyms, definitions)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build from a list of vocabulary dicts (explorer/JSON format)"""
+        return cls(
+            [e.get("term", "") for e in entries],
+            [e.get("synonyms") or [] for e in entries],
+            [e.get("definition", "") for e in entries],
+        )
+
+    def search(self, query, fields=FIELDS, mode="substring"):
+        """Rows where any of `fields` matches `query` ('prefix', 'substring' or 'token')"""
+        query = normalize(query).strip()
+        if not query:
+            return np.arange(self.size, dtype=np.int32)
+
+        result = _EMPTY
+        for name in fields:
+            rows = getattr(self._fields[name], mode)(query)
+            result = rows if not len(result) else np.union1d(result, rows)
+        return result
+
+    def prefix(self, query, fields=FIELDS):
+        return self.search(query, fields, "prefix")
+
+    def substring(self, query, fields=FIELDS):
+        return self.search(query, fields, "substring")
+
+    def token(self, query, fields=FIELDS):
+        return self.search(query, fields, "token")
+
+
+def search_index_for(snapshot):
+    """Search index for a vocabulary snapshot, built once per file version"""
+    columns = ('term', 'synonyms', 'definition')
+    return snapshot.derived('search_index', lambda snap: VocabularySearchIndex.from_frame(snap.columns(columns)))
+
+
+_entries_cache = {}
+
+
+def search_index_for_entries(entries):
+    """Search index for a list of entries, rebuilt only when a different list is passed"""
+    cached = _entries_cache.get('entries')
+    if cached is not None and cached[0] is entries and cached[1] == len(entries):
+        return cached[2]
+    index = VocabularySearchIndex.from_entries(entries)
+    # Hold a reference to the list so its identity stays valid while cached
+    _entries_cache['entries'] = (entries, len(entries), index)
+    return index
@@ -0,0 +1,265 @@
+﻿"""
+Offline nearest-neighbour index over term definitions
+
+TF-IDF vectors (sublinear tf, L2-normalized) compared by cosine similarity,
+computed exactly with a NumPy inverted index. The build keeps the k most
+similar definitions of every term and stores them next to the vocabulary:
+
+    <dir>/keys.npy        uint64 per row: hash of (term, definition)
+    <dir>/neighbours.npy  int32 (rows, k): row numbers, -1 when fewer exist
+    <dir>/scores.npy      float32 (rows, k): cosine similarity
+    <dir>/manifest.json   k, row count, build info
+
+At runtime the arrays are memory-mapped, so the k most confusable
+definitions of a term are one O(k) row read. Rows are matched by key, so
+an index built for an older file still serves the unchanged terms.
+
+Rebuilds are incremental: only new or changed rows are compared against
+everything; unchanged rows keep their neighbours and merge in the new rows.
+IDF weights of kept scores drift as the corpus grows, so a full rebuild
+happens once more than REBUILD_FRACTION of the rows changed.
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+
+from config import SIMILARITY_INDEX_DIR, SIMILARITY_NEIGHBOURS
+
+REBUILD_FRACTION = 0.25
+# Upper bound on the dense score block (queries x targets) per step
+_BLOCK_CELLS = 4_000_000
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-]+")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from in into is it its of on or that the their this to
+used which with within
+""".split())
+
+
+def row_key(term, definition):
+    digest = blake2b(f"{term}\x1f{definition}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def row_keys(frame):
+    """uint64 key per row; a row's key changes when its term or definition does"""
+    return np.fromiter(
+        (row_key(t, d) for t, d in zip(frame['term'].astype(str), frame['definition'].fillna('').astype(str))),
+        dtype=np.uint64, count=len(frame)
+    )
+
+
+class _TfidfMatrix:
+    """Row-normalized TF-IDF vectors in CSR form"""
+
+    def __init__(self, texts):
+        vocabulary = {}
+        indptr, indices, counts = [0], [], []
+        for text in texts:
+            tf = {}
+            for word in _WORD.findall(text.casefold()):
+                if word not in _STOPWORDS:
+                    token = vocabulary.setdefault(word, len(vocabulary))
+                    tf[token] = tf.get(token, 0) + 1
+            indices.extend(tf)
+            counts.extend(tf.values())
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        n = len(texts)
+        df = np.bincount(self.indices, minlength=len(vocabulary))
+        idf = np.log((1 + n) / (1 + df)) + 1
+        data = (1 + np.log(np.asarray(counts, dtype=np.float64))) * idf[self.indices]
+
+        norms = np.sqrt(np.add.reduceat(data ** 2, self.indptr[:-1])) if len(data) else np.zeros(n)
+        lengths = np.diff(self.indptr)
+        norms = np.where(lengths > 0, norms, 1.0)
+        self.data = data / np.repeat(norms, lengths)
+        self.n_tokens = len(vocabulary)
+
+    def rows_of(self, rows):
+        """(row number per entry, token, weight) for the given rows"""
+        starts, stops = self.indptr[rows], self.indptr[rows + 1]
+        lengths = stops - starts
+        entry = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.repeat(np.arange(len(rows)), lengths), self.indices[entry], self.data[entry]
+
+    def postings(self, targets):
+        """Inverted index restricted to `targets`: CSR token -> (target slot, weight)"""
+        owner, tokens, weights = self.rows_of(targets)
+        order = np.argsort(tokens, kind='stable')
+        offsets = np.zeros(self.n_tokens + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tokens, minlength=self.n_tokens), out=offsets[1:])
+        return offsets, owner[order], weights[order]
+
+
+def _top_k(matrix, queries, targets, k, texts):
+    """k most similar targets for each query row: (rows, scores), -1 padded"""
+    queries = np.asarray(queries, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    neighbours = np.full((len(queries), k), -1, dtype=np.int32)
+    scores = np.zeros((len(queries), k), dtype=np.float32)
+    if not len(queries) or not len(targets):
+        return neighbours, scores
+
+    offsets, post_slot, post_weight = matrix.postings(targets)
+    block = max(1, _BLOCK_CELLS // len(targets))
+
+    for begin in range(0, len(queries), block):
+        q_rows = queries[begin:begin + block]
+        q_slot, q_token, q_weight = matrix.rows_of(q_rows)
+        lengths = offsets[q_token + 1] - offsets[q_token]
+        entry = np.repeat(offsets[q_token] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        cells = np.repeat(q_slot, lengths) * len(targets) + post_slot[entry]
+        sims = np.bincount(cells, np.repeat(q_weight, lengths) * post_weight[entry],
+                           minlength=len(q_rows) * len(targets)).reshape(len(q_rows), len(targets))
+
+        # Never offer the term itself or an identical definition as a distractor
+        same = texts[q_rows][:, None] == texts[targets][None, :]
+        sims[same] = 0.0
+
+        take = min(k, len(targets))
+        top = np.argpartition(-sims, take - 1, axis=1)[:, :take]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind='stable')
+        top, top_sims = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_sims, order, axis=1)
+
+        found = top_sims > 0
+        neighbours[begin:begin + len(q_rows), :take] = np.where(found, targets[top], -1)
+        scores[begin:begin + len(q_rows), :take] = np.where(found, top_sims, 0.0)
+    return neighbours, scores
+
+
+def _merge(neighbours, scores, extra_neighbours, extra_scores, k):
+    """Keep the k best of two neighbour lists per row"""
+    all_n = np.concatenate([neighbours, extra_neighbours], axis=1)
+    all_s = np.concatenate([scores, extra_scores], axis=1)
+    all_s = np.where(all_n >= 0, all_s, -1.0)
+    order = np.argsort(-all_s, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(all_n, order, axis=1), np.take_along_axis(all_s, order, axis=1).clip(0)
+
+
+class SimilarityIndex:
+    """Memory-mapped nearest-neighbour lists, addressed by vocabulary row"""
+
+    def __init__(self, keys, neighbours, scores, manifest):
+        self.keys = keys
+        self.neighbours = neighbours
+        self.scores = scores
+        self.manifest = manifest
+        self.k = neighbours.shape[1]
+        self._to_stored = None
+        self._from_stored = None
+
+    @classmethod
+    def load(cls, directory=SIMILARITY_INDEX_DIR):
+        """Open a built index (arrays memory-mapped); None when missing or unreadable"""
+        directory = Path(directory)
+        try:
+            manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+            keys = np.load(directory / "keys.npy", mmap_mode='r')
+            neighbours = np.load(directory / "neighbours.npy", mmap_mode='r')
+            scores = np.load(directory / "scores.npy", mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return cls(keys, neighbours, scores, manifest)
+
+    def bind(self, keys):
+        """Address rows by the positions of `keys` (the current vocabulary frame)"""
+        if len(keys) != len(self.keys) or not np.array_equal(keys, self.keys):
+            stored = {int(key): row for row, key in enumerate(self.keys)}
+            self._to_stored = np.fromiter((stored.get(int(key), -1) for key in keys), dtype=np.int64, count=len(keys))
+            self._from_stored = np.full(len(self.keys) + 1, -1, dtype=np.int64)
+            matched = self._to_stored >= 0
+            self._from_stored[self._to_stored[matched]] = np.flatnonzero(matched)
+        return self
+
+    def neighbours_for(self, rows, k=None):
+        """(len(rows), k) most similar rows, best first; -1 where unknown"""
+        rows = np.asarray(rows, dtype=np.int64)
+        k = self.k if k is None else min(k, self.k)
+        if self._to_stored is None:
+            return np.asarray(self.neighbours[rows, :k], dtype=np.int64)
+
+        stored = self._to_stored[rows]
+        found = np.asarray(self.neighbours[np.maximum(stored, 0), :k], dtype=np.int64)
+        # -1 neighbours index the trailing -1 slot of _from_stored
+        found = self._from_stored[found]
+        found[stored < 0] = -1
+        return found
+
+
+def build_similarity_index(frame, directory=SIMILARITY_INDEX_DIR, k=SIMILARITY_NEIGHBOURS, incremental=True):
+    """Build (or incrementally update) the index for a vocabulary frame; returns build stats"""
+    directory = Path(directory)
+    texts = frame['definition'].fillna('').astype(str).to_numpy(dtype=object)
+    keys = row_keys(frame)
+    n = len(frame)
+    matrix = _TfidfMatrix(list(texts))
+    everything = np.arange(n)
+
+    previous = SimilarityIndex.load(directory) if incremental else None
+    stats = {'rows': n, 'k': k, 'recomputed': n, 'mode': 'full'}
+
+    if previous is not None and previous.k == k:
+        previous.bind(keys)
+        kept = np.flatnonzero(previous._to_stored >= 0) if previous._to_stored is not None else everything
+        changed = np.setdiff1d(everything, kept)
+        removed = len(previous.keys) - len(kept)
+
+        if len(changed) + removed <= REBUILD_FRACTION * max(n, 1):
+            neighbours = np.full((n, k), -1, dtype=np.int32)
+            scores = np.zeros((n, k), dtype=np.float32)
+            neighbours[kept] = previous.neighbours_for(kept)
+            stored = previous._to_stored[kept] if previous._to_stored is not None else kept
+            scores[kept] = previous.scores[stored]
+
+            # Rows that lost a neighbour to a removal get a fresh list
+            lost = kept[((neighbours[kept] < 0) & (scores[kept] > 0)).any(axis=1)]
+            scores[lost] = 0
+            fresh = np.union1d(changed, lost)
+
+            neighbours[fresh], scores[fresh] = _top_k(matrix, fresh, everything, k, texts)
+            others = np.setdiff1d(kept, lost)
+            extra = _top_k(matrix, others, changed, k, texts)
+            neighbours[others], scores[others] = _merge(neighbours[others], scores[others], *extra, k)
+            stats.update(recomputed=len(fresh), mode='incremental', changed=len(changed), removed=removed)
+        else:
+            previous = None
+    else:
+        previous = None
+
+    if previous is None:
+        neighbours, scores = _top_k(matrix, everything, everything, k, texts)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    _replace_array(directory / "keys.npy", keys)
+    _replace_array(directory / "neighbours.npy", neighbours.astype(np.int32))
+    _replace_array(directory / "scores.npy", scores.astype(np.float32))
+    manifest = dict(stats, built_at=datetime.now().isoformat(timespec='seconds'), method='tfidf-cosine')
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return stats
+
+
+def _replace_array(path, array):
+    """Write then rename, so processes that mapped the old file keep a valid view"""
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def similarity_index_for(snapshot, directory=SIMILARITY_INDEX_DIR):
+    """Similarity index bound to a vocabulary snapshot (None when not built)"""
+    def build(snap):
+        index = SimilarityIndex.load(directory)
+        return index.bind(row_keys(snap.columns(('term', 'definition')))) if index is not None else False
+
+    return snapshot.derived('similarity_index', build) or None
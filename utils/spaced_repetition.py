@@ -0,0 +1,248 @@
+﻿"""
+Spaced-repetition scheduling algorithms and a review simulator
+
+Every algorithm works on columnar state (dict of NumPy arrays, one entry
+per term) and updates many reviews at once:
+
+- fixed:  the original 1/3/7-day intervals per answer
+- ladder: Leitner-style boxes over config.RETENTION_DAYS
+- sm2:    SuperMemo-2 with per-term ease factors and growing intervals
+- fsrs:   FSRS-4.5 memory model (stability/difficulty) with a target retention
+
+Answers are the app's grade codes (utils.scheduler.GRADES): 0 = hard
+(treated as a lapse), 1 = medium, 2 = easy.
+"""
+
+import numpy as np
+
+from config import RETENTION_DAYS, DESIRED_RETENTION
+
+STATE_COLUMNS = {
+    'reps': (np.int32, 0),
+    'lapses': (np.int32, 0),
+    'streak': (np.int32, 0),
+    'interval': (np.int32, 0),
+    'ease': (np.float32, 2.5),
+    'stability': (np.float32, 0.0),
+    'difficulty': (np.float32, 0.0),
+    'box': (np.int32, 0),
+}
+
+
+def new_state(n):
+    """Default columnar state for n terms that were never reviewed"""
+    return {name: np.full(n, default, dtype=dtype) for name, (dtype, default) in STATE_COLUMNS.items()}
+
+
+class SchedulingAlgorithm:
+    """Base class: review() returns updated state columns for the reviewed rows"""
+
+    name = None
+
+    def review(self, state, grades, elapsed):
+        """state: dict of arrays for the reviewed terms; grades/elapsed: int arrays"""
+        raise NotImplementedError
+
+    def _common(self, state, grades):
+        updated = {name: column.copy() for name, column in state.items()}
+        updated['reps'] += 1
+        updated['lapses'] += (grades == 0)
+        updated['streak'] = np.where(grades == 0, 0, updated['streak'] + 1).astype(np.int32)
+        return updated
+
+
+class FixedIntervals(SchedulingAlgorithm):
+    name = 'fixed'
+    intervals = np.array([1, 3, 7], dtype=np.int32)
+
+    def review(self, state, grades, elapsed):
+        updated = self._common(state, grades)
+        updated['interval'] = self.intervals[grades]
+        return updated
+
+
+class RetentionLadder(SchedulingAlgorithm):
+    """Leitner boxes: easy climbs two boxes, medium one, hard drops to the first"""
+
+    name = 'ladder'
+
+    def __init__(self, ladder=RETENTION_DAYS):
+        self.ladder = np.asarray(ladder, dtype=np.int32)
+
+    def review(self, state, grades, elapsed):
+        updated = self._common(state, grades)
+        step = np.array([0, 1, 2], dtype=np.int32)[grades]
+        box = np.where(grades == 0, 0, updated['box'] + step)
+        box = np.minimum(box, len(self.ladder) - 1)
+        updated['box'] = box
+        updated['interval'] = self.ladder[box]
+        return updated
+
+
+class SM2(SchedulingAlgorithm):
+    name = 'sm2'
+    # SM-2 response quality for hard / medium / easy
+    quality = np.array([2, 4, 5], dtype=np.float32)
+
+    def review(self, state, grades, elapsed):
+        updated = self._common(state, grades)
+        q = self.quality[grades]
+        passed = q >= 3
+
+        ease = updated['ease'] + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+        updated['ease'] = np.where(passed, np.maximum(ease, 1.3), updated['ease']).astype(np.float32)
+
+        # Consecutive successful repetitions drive the interval growth
+        streak = updated['streak']
+        grown = np.rint(np.maximum(state['interval'], 1) * updated['ease'])
+        interval = np.select([streak <= 1, streak == 2], [1, 6], grown)
+        updated['interval'] = interval.astype(np.int32)
+        return updated
+
+
+class FSRS(SchedulingAlgorithm):
+    """FSRS-4.5 with its published default weights"""
+
+    name = 'fsrs'
+    weights = np.array([
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755
+    ])
+    DECAY = -0.5
+    FACTOR = 19 / 81
+    # FSRS ratings (1 again .. 4 easy) for hard / medium / easy
+    ratings = np.array([1, 3, 4], dtype=np.int32)
+
+    def __init__(self, desired_retention=DESIRED_RETENTION):
+        self.desired_retention = desired_retention
+
+    def retrievability(self, elapsed, stability):
+        stability = np.maximum(stability, 1e-3)
+        return (1 + self.FACTOR * elapsed / stability) ** self.DECAY
+
+    def _init_difficulty(self, rating):
+        w = self.weights
+        return np.clip(w[4] - (rating - 3) * w[5], 1, 10)
+
+    def next_memory(self, stability, difficulty, reps, rating, elapsed):
+        """Next (stability, difficulty) after a review with the given FSRS rating"""
+        w = self.weights
+        first = reps == 0
+
+        init_s = w[rating - 1]
+        init_d = self._init_difficulty(rating)
+
+        r = self.retrievability(elapsed, stability)
+        d = difficulty - w[6] * (rating - 3)
+        d = np.clip(w[7] * self._init_difficulty(3) + (1 - w[7]) * d, 1, 10)
+
+        hard_penalty = np.where(rating == 2, w[15], 1.0)
+        easy_bonus = np.where(rating == 4, w[16], 1.0)
+        s_recall = stability * (
+            np.exp(w[8]) * (11 - d) * np.power(np.maximum(stability, 1e-3), -w[9])
+            * (np.exp(w[10] * (1 - r)) - 1) * hard_penalty * easy_bonus + 1
+        )
+        s_forget = (
+            w[11] * np.power(d, -w[12]) * (np.power(stability + 1, w[13]) - 1)
+            * np.exp(w[14] * (1 - r))
+        )
+        s = np.where(rating == 1, s_forget, s_recall)
+
+        return np.where(first, init_s, s), np.where(first, init_d, d)
+
+    def interval_for(self, stability):
+        interval = stability / self.FACTOR * (self.desired_retention ** (1 / self.DECAY) - 1)
+        return np.maximum(np.rint(interval), 1).astype(np.int32)
+
+    def review(self, state, grades, elapsed):
+        updated = self._common(state, grades)
+        stability, difficulty = self.next_memory(
+            state['stability'], state['difficulty'], state['reps'], self.ratings[grades], elapsed
+        )
+        updated['stability'] = stability.astype(np.float32)
+        updated['difficulty'] = difficulty.astype(np.float32)
+        updated['interval'] = self.interval_for(stability)
+        return updated
+
+
+ALGORITHMS = {cls.name: cls for cls in (FixedIntervals, RetentionLadder, SM2, FSRS)}
+
+
+def get_algorithm(name):
+    """Instantiate a scheduling algorithm by name"""
+    try:
+        return ALGORITHMS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown scheduling algorithm '{name}'. Choose from: {', '.join(ALGORITHMS)}")
+
+
+def simulate(history, algorithm, days=30, start_day=None, seed=0):
+    """Replay a learner's review history, then simulate `days` more days
+
+    history: iterable of (term, epoch_day, grade_code) review records.
+    The learner is modelled with the FSRS memory model (independent of the
+    algorithm being evaluated): a due term is recalled with probability R,
+    a recall is answered 'easy' at the learner's historical easy rate and
+    'medium' otherwise, and a failure is answered 'hard'.
+
+    Returns {'reviews_per_day': array, 'retention': array (mean R per day)}.
+    """
+    algorithm = get_algorithm(algorithm) if isinstance(algorithm, str) else algorithm
+    memory = FSRS()
+    rng = np.random.default_rng(seed)
+
+    records = sorted(history, key=lambda r: r[1])
+    terms = list(dict.fromkeys(term for term, _, _ in records))
+    slots = {term: i for i, term in enumerate(terms)}
+    n = len(terms)
+
+    state = new_state(n)
+    mem_s = np.zeros(n)
+    mem_d = np.zeros(n)
+    mem_reps = np.zeros(n, dtype=np.int32)
+    last_day = np.zeros(n, dtype=np.int64)
+    due = np.zeros(n, dtype=np.int64)
+
+    def apply(rows, grades, day):
+        elapsed = (day - last_day[rows]).astype(np.float64)
+        reviewed = algorithm.review({k: v[rows] for k, v in state.items()}, grades, elapsed)
+        for k, v in reviewed.items():
+            state[k][rows] = v
+        mem_s[rows], mem_d[rows] = memory.next_memory(
+            mem_s[rows], mem_d[rows], mem_reps[rows], memory.ratings[grades], elapsed
+        )
+        mem_reps[rows] += 1
+        last_day[rows] = day
+        due[rows] = day + state['interval'][rows]
+
+    # Replay the observed history (one vectorized step per day)
+    grades_seen = np.array([g for _, _, g in records], dtype=np.int32)
+    record_days = np.array([d for _, d, _ in records], dtype=np.int64)
+    record_rows = np.array([slots[t] for t, _, _ in records], dtype=np.int64)
+    for day in np.unique(record_days):
+        mask = record_days == day
+        # A term reviewed twice in a day keeps its last answer
+        rows, last_idx = np.unique(record_rows[mask][::-1], return_index=True)
+        apply(rows, grades_seen[mask][::-1][last_idx], day)
+
+    successes = grades_seen[grades_seen > 0]
+    p_easy = float(np.mean(successes == 2)) if len(successes) else 0.5
+
+    first_day = int(record_days.max()) + 1 if n else 0
+    if start_day is not None:
+        first_day = start_day
+
+    reviews_per_day = np.zeros(days, dtype=np.int32)
+    retention = np.zeros(days)
+    for offset in range(days):
+        day = first_day + offset
+        rows = np.flatnonzero(due <= day)
+        if len(rows):
+            r = memory.retrievability(day - last_day[rows], mem_s[rows])
+            recalled = rng.random(len(rows)) < r
+            grades = np.where(recalled, np.where(rng.random(len(rows)) < p_easy, 2, 1), 0).astype(np.int32)
+            apply(rows, grades, day)
+        reviews_per_day[offset] = len(rows)
+        retention[offset] = memory.retrievability(day - last_day, mem_s).mean() if n else 0.0
+
+    return {'reviews_per_day': reviews_per_day, 'retention': retention}
@@ -2,9 +2,31 @@
 UI utilities and custom CSS
 """
 
+import logging
+
 import streamlit as st
 from datetime import datetime
 
+from utils.nlp_engine import ModelNotAvailableError, check_model_ready, get_model
+
+logger = logging.getLogger(__name__)
+
+@st.cache_resource(ttl=3600)
+def get_nlp_model():
+    """Streamlit-cached spaCy model shared by all sessions (None if unavailable)"""
+    try:
+        check_model_ready(('full',))
+        return get_model('full')
+    except ModelNotAvailableError as e:
+        # Fail fast: the app never downloads models from a request
+        logger.error(str(e))
+        st.error(f"NLP engine not provisioned. {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to load NLP model: {e}")
+        st.error("Failed to load NLP engine. Some features may be limited.")
+        return None
+
 def load_css():
     """Load custom CSS"""
     st.markdown("""
@@ -0,0 +1,398 @@
+﻿"""
+Vocabulary build pipeline
+
+Declared sources (config.VOCAB_SOURCES) go through content-addressed stages:
+
+    load      one per source file: read CSV/JSON/NDJSON, unify the schema
+    normalize one per source file: canonical terms (utils.vocab_normalize)
+    merge     group by normalized term, combine fields across sources
+              (streaming external merge beyond VOCAB_MERGE_MEMORY_LIMIT)
+    dedupe    cluster near-duplicate entries (MinHash/LSH) and merge them
+    emit      runtime CSV the app loads + its compiled artifact + the
+              merge report (<output>.merges.json) for review
+
+Every stage output is cached under its key, a hash of the stage name and
+version, its parameters and the keys of its inputs (a source's key is the
+hash of its content). Only sources whose content changed are re-read, and
+a re-run with no changes only stats the source files.
+
+Entries are unified to one schema: `field` becomes `category`,
+`usage_example` becomes `example`, difficulty is lower-cased and
+`synonyms` is always a list. Terms folded into an entry by normalization
+or near-duplicate merging are listed in its `variants`.
+"""
+
+import glob
+import json
+import math
+import os
+import shutil
+from hashlib import blake2b
+from pathlib import Path
+
+import pandas as pd
+
+from config import BASE_DIR, VOCAB_BUILD_CACHE, VOCAB_MERGE_MEMORY_LIMIT, VOCAB_NEAR_DUPLICATES, VOCAB_SOURCES
+from utils.compiled_vocab import compile_vocabulary, compiled_path, source_digest
+from utils.vocab_normalize import canonical_term, near_duplicates, normalize_key
+from utils.vocab_stream import EXPANSION, iter_records, merge_stream, read_ndjson, write_ndjson
+
+RUNTIME_COLUMNS = ['term', 'definition', 'category', 'difficulty', 'example',
+                   'phonetic', 'etymology', 'syllables', 'stress']
+LIST_FIELDS = ('synonyms', 'related_terms', 'methods', 'applications', 'references', 'contexts', 'variants')
+
+# Source spellings of the unified field names
+FIELD_ALIASES = {
+    'term': ('term', 'Term', 'TERM'),
+    'definition': ('definition', 'Definition'),
+    'category': ('category', 'field', 'Field', 'Category'),
+    'difficulty': ('difficulty', 'Difficulty'),
+    'example': ('example', 'usage_example', 'Usage', 'Example'),
+}
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or value == ""
+
+
+def unify_entry(raw, provenance=""):
+    """One source record in the unified schema (None when it has no term)"""
+    entry = {}
+    for name, aliases in FIELD_ALIASES.items():
+        value = next((raw[a] for a in aliases if a in raw and not _missing(raw[a])), None)
+        entry[name] = "" if value is None else str(value).strip()
+    if not entry['term']:
+        return None
+    entry['difficulty'] = entry['difficulty'].lower()
+
+    taken = {alias for aliases in FIELD_ALIASES.values() for alias in aliases}
+    for name, value in raw.items():
+        if name in taken or name in entry or _missing(value):
+            continue
+        if name in LIST_FIELDS:
+            if isinstance(value, str):
+                value = [item.strip() for item in value.split(";") if item.strip()]
+            entry[name] = list(value)
+        elif name == 'provenance':
+            continue
+        else:
+            entry[name] = value.strip() if isinstance(value, str) else value
+
+    for name in LIST_FIELDS:
+        entry.setdefault(name, [])
+    recorded = raw.get('provenance') or []
+    if isinstance(recorded, str):
+        recorded = recorded.split(",")
+    entry['provenance'] = sorted({p.strip() for p in recorded if p.strip()} | ({provenance} if provenance else set()))
+    return entry
+
+
+def merge_entries(groups):
+    """Combine the entries of one term; groups are in source priority order
+
+    Scalar fields come from the first (highest-priority) source that has
+    them; an authoritative source's definition is kept, otherwise the
+    longest definition wins. List fields are unioned; other spellings of
+    the term are kept in `variants`.
+    """
+    merged = {}
+    for entry, authoritative in groups:
+        if not merged:
+            merged = {k: (list(v) if isinstance(v, list) else v) for k, v in entry.items()}
+            merged['_authoritative'] = authoritative
+            continue
+        variants = merged.setdefault('variants', [])
+        if entry['term'].casefold() != merged['term'].casefold() and entry['term'] not in variants:
+            variants.append(entry['term'])
+        for name, value in entry.items():
+            if isinstance(value, list):
+                seen = merged.setdefault(name, [])
+                seen.extend(v for v in value if v not in seen)
+            elif name == 'definition':
+                if not merged['_authoritative'] and len(value) > len(merged.get('definition', "")):
+                    merged['definition'] = value
+            elif _missing(merged.get(name)):
+                merged[name] = value
+    merged.pop('_authoritative', None)
+    merged['provenance'] = sorted(set(merged.get('provenance', [])))
+    return merged
+
+
+def _hash(*parts):
+    digest = blake2b(digest_size=16)
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Content-addressed store of stage outputs (NDJSON files named by key)"""
+
+    def __init__(self, directory=VOCAB_BUILD_CACHE):
+        self.directory = Path(directory)
+        self.objects = self.directory / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.directory / "state.json"
+        try:
+            self.state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault('digests', {})
+
+    def path(self, key):
+        return self.objects / f"{key}.ndjson"
+
+    def has(self, key):
+        return self.path(key).exists()
+
+    def read(self, key):
+        """Records of a stage output, streamed from disk"""
+        return read_ndjson(self.path(key))
+
+    def write(self, key, records):
+        return write_ndjson(records, self.path(key))
+
+    def digest(self, path):
+        """Content hash of a source, re-hashed only when its size or mtime changed"""
+        stat = Path(path).stat()
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        known = self.state['digests'].get(str(path))
+        if known and known['stamp'] == stamp:
+            return known['digest']
+        digest = source_digest(path)
+        self.state['digests'][str(path)] = {'stamp': stamp, 'digest': digest}
+        return digest
+
+    def save_state(self):
+        self.state_path.write_text(json.dumps(self.state, indent=2), encoding="utf-8")
+
+
+class Stage:
+    """A cached pipeline step: key = hash(name, version, params, input keys)"""
+
+    name = None
+    version = 1
+
+    def key(self, inputs, **params):
+        return _hash(self.name, self.version, params, inputs)
+
+
+class LoadStage(Stage):
+    name = 'load'
+    version = 2
+
+    def run(self, path, provenance):
+        for raw in iter_records(path):
+            entry = unify_entry(raw, provenance)
+            if entry is not None:
+                yield entry
+
+
+class NormalizeStage(Stage):
+    """Canonical display terms; context suffixes move to `contexts`"""
+
+    name = 'normalize'
+    version = 1
+
+    def run(self, entries):
+        for entry in entries:
+            term, contexts = canonical_term(entry['term'])
+            if not term:
+                continue
+            if term != entry['term']:
+                entry['variants'] = entry.get('variants', []) + [entry['term']]
+                entry['term'] = term
+            entry['contexts'] = entry.get('contexts', []) + [c for c in contexts if c not in entry.get('contexts', [])]
+            yield entry
+
+
+class MergeStage(Stage):
+    name = 'merge'
+    version = 2
+
+    def run(self, sources, memory_limit=None, expected_bytes=0, stats=None):
+        """sources: [(entries, authoritative)] in priority order
+
+        Inputs larger than memory_limit allows are merged by the streaming
+        external merge (utils.vocab_stream); the result is the same.
+        """
+        if memory_limit and expected_bytes * EXPANSION > memory_limit:
+            key = lambda entry: normalize_key(entry['term'])  # noqa: E731
+            yield from merge_stream(sources, key, merge_entries, memory_limit, expected_bytes, stats=stats)
+            return
+
+        groups = {}
+        for entries, authoritative in sources:
+            for entry in entries:
+                groups.setdefault(normalize_key(entry['term']), []).append((entry, authoritative))
+        for group in groups.values():
+            yield merge_entries(group)
+
+
+class DedupeStage(Stage):
+    """Merge near-duplicate entries into the first entry of their cluster"""
+
+    name = 'dedupe'
+    version = 1
+
+    def run(self, read, report, term=0.7, definition=0.5, review=0.85):
+        """read() iterates the merged entries; `report` (a dict) is filled for review
+
+        Only terms and definitions are held in memory for clustering, and
+        the entries folded into another one for the final pass.
+        """
+        terms, definitions, canonicalized = [], [], []
+        for entry in read():
+            terms.append(entry['term'])
+            definitions.append(entry.get('definition', ""))
+            if entry.get('variants'):
+                canonicalized.append({'term': entry['term'], 'variants': entry['variants']})
+        clusters, flagged = near_duplicates(terms, definitions, term, definition, review)
+
+        root_of = {member: root for root, members in clusters.items() for member, _, _ in members}
+        folded = {}
+        for i, entry in enumerate(read()):
+            if i in root_of:
+                folded[i] = entry
+
+        report['canonicalized'] = canonicalized
+        report['near_duplicates'] = [
+            {'term': terms[root], 'merged': [
+                {'term': terms[member], 'definition': definitions[member], 'provenance': folded[member]['provenance'],
+                 'term_similarity': round(term_sim, 2), 'definition_similarity': round(definition_sim, 2)}
+                for member, term_sim, definition_sim in members]}
+            for root, members in clusters.items()
+        ]
+        report['review'] = [
+            {'terms': [terms[i], terms[j]], 'term_similarity': round(term_sim, 2),
+             'definition_similarity': round(definition_sim, 2)}
+            for i, j, term_sim, definition_sim in flagged
+        ]
+
+        for i, entry in enumerate(read()):
+            if i in root_of:
+                continue
+            if i in clusters:
+                # The first entry keeps its definition; the others become variants
+                entry = merge_entries([(entry, True)] + [(folded[m], False) for m, _, _ in clusters[i]])
+            yield entry
+
+
+def runtime_frame(entries):
+    """Runtime vocabulary table (the CSV the app loads) from unified entries"""
+    return pd.DataFrame([{name: entry.get(name, "") for name in RUNTIME_COLUMNS} for entry in entries],
+                        columns=RUNTIME_COLUMNS)
+
+
+def write_runtime_csv(entries, path, chunk_rows=10_000):
+    """Write the runtime CSV in chunks; returns the row count"""
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    rows, chunk = 0, []
+    with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) == chunk_rows:
+                runtime_frame(chunk).to_csv(f, index=False, header=rows == 0)
+                rows, chunk = rows + len(chunk), []
+        if chunk or rows == 0:
+            runtime_frame(chunk).to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    os.replace(tmp, path)
+    return rows
+
+
+def expand_sources(sources=VOCAB_SOURCES, root=BASE_DIR):
+    """[(source spec, path)] for every file the declared sources match, in order"""
+    files = []
+    for spec in sources:
+        pattern = str(Path(root) / spec['path'])
+        for path in sorted(glob.glob(pattern)):
+            files.append((spec, Path(path)))
+    return files
+
+
+def merge_report_path(output):
+    """Review report of merged terms: data/x.csv -> data/x.merges.json"""
+    return Path(output).with_suffix(".merges.json")
+
+
+def build_vocabulary(output, sources=VOCAB_SOURCES, cache=None, force=False, log=print, root=BASE_DIR,
+                     memory_limit=VOCAB_MERGE_MEMORY_LIMIT, near_duplicate=VOCAB_NEAR_DUPLICATES):
+    """Run the pipeline; returns {'rows', 'changed', 'stages': {name: 'cached'|'built'}, 'skipped', 'report'}
+
+    near_duplicate: similarity thresholds {'term', 'definition', 'review'}
+    for the dedupe stage. 'skipped' names the declared sources whose
+    pattern matched no file (they are logged, not an error).
+    """
+    cache = cache or StageCache()
+    output = Path(output)
+    stages = {}
+
+    files = expand_sources(sources, root)
+    matched = {id(spec) for spec, _ in files}
+    skipped = [spec['name'] for spec in sources if id(spec) not in matched]
+    for spec in sources:
+        if id(spec) not in matched:
+            log(f"  {'skipped':<7} {spec['name']}: no files match {spec['path']}")
+
+    load, normalize = LoadStage(), NormalizeStage()
+    loaded = []
+    for spec, path in files:
+        provenance = spec.get('provenance') or f"{spec['name']}:{path.stem}"
+        key = load.key(cache.digest(path), provenance=provenance)
+        label = f"load {path.relative_to(root) if path.is_relative_to(root) else path}"
+        if force or not cache.has(key):
+            cache.write(key, load.run(path, provenance))
+            stages[label] = 'built'
+        else:
+            stages[label] = 'cached'
+        normalized = normalize.key(key)
+        if force or not cache.has(normalized):
+            cache.write(normalized, normalize.run(cache.read(key)))
+        loaded.append((normalized, bool(spec.get('authoritative'))))
+
+    merge = MergeStage()
+    merge_key = merge.key(loaded)
+    if force or not cache.has(merge_key):
+        expected = sum(cache.path(key).stat().st_size for key, _ in loaded)
+        merged = merge.run(((cache.read(key), authoritative) for key, authoritative in loaded),
+                           memory_limit=memory_limit, expected_bytes=expected)
+        cache.write(merge_key, merged)
+        stages['merge'] = 'built'
+    else:
+        stages['merge'] = 'cached'
+
+    dedupe = DedupeStage()
+    dedupe_key = dedupe.key(merge_key, **near_duplicate)
+    report_path = cache.objects / f"{dedupe_key}.report.json"
+    if force or not cache.has(dedupe_key) or not report_path.exists():
+        report = {}
+        cache.write(dedupe_key, dedupe.run(lambda: cache.read(merge_key), report, **near_duplicate))
+        report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        stages['dedupe'] = 'built'
+    else:
+        stages['dedupe'] = 'cached'
+
+    # Emit only when the deduplicated content differs from what was last emitted
+    emit_key = _hash('emit', dedupe_key, RUNTIME_COLUMNS, str(output))
+    emitted = cache.state.get('emitted', {}).get(str(output))
+    changed = (force or emitted != emit_key or not output.exists() or not compiled_path(output).exists()
+               or not merge_report_path(output).exists())
+    rows = None
+    if changed:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        rows = write_runtime_csv(cache.read(dedupe_key), output)
+        compile_vocabulary(pd.read_csv(output), compiled_path(output), source=output)
+        shutil.copyfile(report_path, merge_report_path(output))
+        cache.state.setdefault('emitted', {})[str(output)] = emit_key
+        stages['emit'] = 'built'
+    else:
+        stages['emit'] = 'cached'
+
+    cache.save_state()
+    for label, status in stages.items():
+        log(f"  {status:<7} {label}")
+    return {'rows': rows, 'changed': changed, 'stages': stages, 'skipped': skipped,
+            'report': json.loads(report_path.read_text(encoding="utf-8"))}
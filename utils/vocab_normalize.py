@@ -0,0 +1,208 @@
+﻿"""
+Term normalization and near-duplicate detection for the vocabulary build
+
+Canonicalization (exact duplicates):
+- display term: Unicode NFKC, typographic dashes and quotes folded to
+  ASCII, whitespace collapsed, context suffixes such as
+  "(analysis context)" moved to the entry's contexts
+- grouping key: the display term case-folded, with hyphens, slashes and
+  spaces between word parts removed and the last word singularized, so
+  "RNA-seq", "RNA seq" and "RNAseq" (or "SNP" and "SNPs") share a key
+
+Near duplicates: MinHash signatures over character shingles of the key
+and word shingles of the definition, bucketed by LSH banding, so
+candidate pairs are found in time linear in the number of entries. A
+candidate is merged when both its term and its definition are similar;
+pairs similar in only one of them are listed for review.
+"""
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+# Typographic variants folded to ASCII (NFKC leaves these alone)
+_FOLD = str.maketrans({
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '−': '-',
+    '‘': "'", '’': "'", '′': "'", '“': '"', '”': '"',
+})
+CONTEXT_SUFFIX = re.compile(r"\s*\(([^()]*?)\s+context\)\s*$", re.IGNORECASE)
+_JOINERS = re.compile(r"[\s\-_/]+")
+_WORDS = re.compile(r"\w+")
+# Words ending in s that are not plurals
+_SINGULAR = {'species', 'series', 'means', 'news', 'mass', 'bias', 'chaos', 'lens', 'atlas', 'gas'}
+
+
+def canonical_term(term):
+    """(display term, contexts) for a raw term"""
+    term = " ".join(unicodedata.normalize("NFKC", term).translate(_FOLD).split())
+    contexts = []
+    match = CONTEXT_SUFFIX.search(term)
+    while match:
+        contexts.insert(0, match.group(1).strip().lower())
+        term = term[:match.start()]
+        match = CONTEXT_SUFFIX.search(term)
+    return term.strip(), contexts
+
+
+def singular(word):
+    """English plural -> singular for glossary head nouns (lower-case input)"""
+    if len(word) <= 3 or word in _SINGULAR or not word.isalpha():
+        return word
+    if word.endswith("yses"):
+        return word[:-2] + "is"
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is", "ics", "as", "os")):
+        return word[:-1]
+    return word
+
+
+def normalize_key(term):
+    """Grouping key for exact-duplicate detection"""
+    term, _ = canonical_term(term)
+    words = term.casefold().split()
+    if words:
+        words[-1] = "-".join(singular(part) for part in words[-1].split("-"))
+    return _JOINERS.sub("", " ".join(words))
+
+
+# -- MinHash / LSH ------------------------------------------------------------
+
+_PRIME = (1 << 31) - 1
+
+
+def term_shingles(key, size=3):
+    padded = f" {key} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+def definition_shingles(definition, size=2):
+    words = _WORDS.findall(definition.casefold())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+
+
+class MinHasher:
+    """MinHash signatures for many shingle sets at once (num_perm uint32 each)"""
+
+    def __init__(self, num_perm=60, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets):
+        """(n, num_perm) uint32 signatures; an empty set gets an all-max row"""
+        hashes, starts = [], []
+        for shingles in shingle_sets:
+            starts.append(len(hashes))
+            hashes.extend(zlib.crc32(s.encode("utf-8")) for s in shingles)
+        n = len(starts)
+        signatures = np.full((n, len(self.a)), _PRIME, dtype=np.uint32)
+        if not hashes:
+            return signatures
+        values = np.asarray(hashes, dtype=np.uint64)
+        starts = np.asarray(starts, dtype=np.int64)
+        filled = np.diff(np.append(starts, len(values))) > 0
+        for k, (a, b) in enumerate(zip(self.a, self.b)):
+            permuted = (a * values + b) % _PRIME
+            signatures[filled, k] = np.minimum.reduceat(permuted, starts[filled])
+        return signatures
+
+
+def similarities(signatures, pairs, chunk=100_000):
+    """Estimated Jaccard similarity of each (i, j) row pair"""
+    result = np.empty(len(pairs), dtype=np.float32)
+    for at in range(0, len(pairs), chunk):
+        i, j = pairs[at:at + chunk, 0], pairs[at:at + chunk, 1]
+        result[at:at + chunk] = (signatures[i] == signatures[j]).mean(axis=1)
+    return result
+
+
+def lsh_candidates(signatures, bands):
+    """Candidate pairs (i, j), i < j, sharing at least one band bucket
+
+    Within a bucket every member is paired with the bucket's first member
+    only, which keeps the work linear; transitive matches are joined by the
+    clustering. Returns an (m, 2) int64 array.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    nonempty = ~(signatures == _PRIME).all(axis=1)
+    codes = []
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        members = np.flatnonzero((counts[inverse] > 1) & nonempty)
+        if not len(members):
+            continue
+        buckets = inverse[members]
+        _, first = np.unique(buckets, return_index=True)
+        head = np.full(len(counts), -1, dtype=np.int64)
+        head[buckets[first]] = members[first]  # members ascend, so the first is the smallest
+        heads = head[buckets]
+        keep = heads != members
+        codes.append(heads[keep] * n + members[keep])
+    if not codes:
+        return np.empty((0, 2), dtype=np.int64)
+    codes = np.unique(np.concatenate(codes))
+    return np.stack([codes // n, codes % n], axis=1)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        a, b = self.find(i), self.find(j)
+        if a != b:
+            # The earliest entry (highest source priority) stays the root
+            self.parent[max(a, b)] = min(a, b)
+
+
+def near_duplicates(terms, definitions, term_threshold=0.7, definition_threshold=0.5, review_threshold=0.85,
+                    num_perm=60, bands=10):
+    """Cluster near-duplicate entries given their terms and definitions
+
+    Returns (clusters, review): clusters maps a representative index (the
+    first entry of the cluster) to [(member index, term sim, definition
+    sim)]; review lists (i, j, term sim, definition sim) for pairs that
+    were not merged but have a term or definition similarity of at least
+    review_threshold. The default banding (10 bands of 6 rows) catches
+    pairs from about 0.7 similarity up.
+    """
+    hasher = MinHasher(num_perm)
+    n = len(terms)
+    terms = hasher.signatures(term_shingles(normalize_key(term)) for term in terms)
+    definitions = hasher.signatures(definition_shingles(definition or "") for definition in definitions)
+
+    pairs = np.unique(np.concatenate([lsh_candidates(terms, bands), lsh_candidates(definitions, bands)]), axis=0)
+    term_sims, definition_sims = similarities(terms, pairs), similarities(definitions, pairs)
+    merge = (term_sims >= term_threshold) & (definition_sims >= definition_threshold)
+    flag = ~merge & ((term_sims >= review_threshold) | (definition_sims >= review_threshold))
+
+    union = _UnionFind(n)
+    for i, j in pairs[merge].tolist():
+        union.union(i, j)
+
+    clusters = {}
+    for (i, j), term_sim, definition_sim in zip(pairs[merge].tolist(), term_sims[merge].tolist(),
+                                                definition_sims[merge].tolist()):
+        root = union.find(i)
+        members = clusters.setdefault(root, {})
+        for member in (i, j):
+            if member != root:
+                members.setdefault(member, (term_sim, definition_sim))
+    review = [(i, j, t, d) for (i, j), t, d in zip(pairs[flag].tolist(), term_sims[flag].tolist(),
+                                                   definition_sims[flag].tolist())]
+    return ({root: [(m, *sims) for m, sims in sorted(members.items())] for root, members in sorted(clusters.items())},
+            review)
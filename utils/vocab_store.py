@@ -0,0 +1,189 @@
+﻿"""
+Process-wide vocabulary store shared by all sessions
+
+The vocabulary is parsed once per process and reloaded only when the file
+on disk changes (mtime or size). Every session reads the same snapshot, so
+the DataFrame it exposes must be treated as read-only.
+
+When a fresh compiled artifact sits next to the CSV (utils.compiled_vocab,
+tools/compile_vocabulary.py) it is memory-mapped instead of parsing the CSV,
+and the snapshot serves filters and lookups from the mapped columns: codes
+for category columns, single decoded columns for the derived indexes, and
+frames of just the rows (and columns) a view shows. The full frame is only
+built when something asks for snapshot.frame.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.compiled_vocab import compiled_path, open_compiled
+
+VOCAB_FILE = Path("data/omics_vocabulary.csv")
+
+
+def _sample_vocabulary():
+    """Built-in sample used when no vocabulary file is available"""
+    return pd.DataFrame({
+        'term': ['Genome', 'Transcriptome', 'Proteome', 'Metabolome', 'Metagenome'],
+        'definition': [
+            'The complete set of genetic material in an organism',
+            'The complete set of RNA transcripts produced by the genome',
+            'The entire set of proteins expressed by a genome',
+            'The complete set of small-molecule chemicals found in a biological sample',
+            'Genetic material recovered from environmental samples'
+        ],
+        'category': ['Genomics', 'Transcriptomics', 'Proteomics', 'Metabolomics', 'Metagenomics'],
+        'difficulty': ['beginner', 'intermediate', 'intermediate', 'advanced', 'advanced'],
+        'example': [
+            'The human genome contains approximately 3 billion base pairs.',
+            'RNA-seq is used to analyze the transcriptome.',
+            'Mass spectrometry helps identify proteins in the proteome.',
+            'The metabolome reflects the physiological state of a cell.',
+            'Shotgun sequencing is used for metagenome analysis.'
+        ],
+        'phonetic': ['ˈdʒiːnəʊm', 'trænˈskrɪptəʊm', 'ˈprəʊtiːəʊm', 'məˈtæbələʊm', 'ˈmetəˌdʒiːnəʊm'],
+        'etymology': [
+            'From gene + -ome (complete set)',
+            'From transcript + -ome',
+            'From protein + -ome',
+            'From metabolite + -ome',
+            'From meta- (beyond) + genome'
+        ],
+        'syllables': ['ge-nome', 'tran-scrip-tome', 'pro-te-ome', 'me-tab-o-lome', 'meta-ge-nome']
+    })
+
+
+class VocabularySnapshot:
+    """Read-only vocabulary for one version of the source file
+
+    Backed by a DataFrame (parsed CSV or the sample) or by a memory-mapped
+    CompiledVocabulary; rows are addressed by position either way.
+    """
+
+    def __init__(self, frame, version, compiled=None):
+        self._frame = frame
+        self.version = version
+        # Memory-mapped CompiledVocabulary serving the columns, if any
+        self.compiled = compiled
+        self._columns = {}
+        self._derived = {}
+        # Re-entrant: a derived() builder may read snapshot.frame
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.compiled) if self._frame is None else len(self._frame)
+
+    @property
+    def frame(self):
+        """The whole vocabulary as a DataFrame (materialized on first use when compiled)"""
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    self._frame = self.compiled.to_frame()
+        return self._frame
+
+    @property
+    def column_names(self):
+        return list(self.compiled.columns) if self._frame is None else list(self._frame.columns)
+
+    def column(self, name):
+        """One whole column as a Series, decoded once per snapshot"""
+        if self._frame is not None:
+            return self._frame[name]
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns.setdefault(name, pd.Series(self.compiled.column(name), name=name))
+        return values
+
+    def columns(self, names):
+        """DataFrame of the given columns (those present), for the derived indexes"""
+        return pd.DataFrame({name: self.column(name) for name in names if name in self.column_names})
+
+    def isin(self, name, values):
+        """Boolean mask of the rows whose `name` is one of `values`
+
+        Category columns of a compiled vocabulary are matched on their codes
+        without decoding the column.
+        """
+        if self._frame is None and self.compiled.columns[name]['kind'] == 'category':
+            categories = self.compiled.categories(name)
+            wanted = [categories.index(v) for v in values if v in categories]
+            return np.isin(np.asarray(self.compiled.codes(name)), wanted)
+        return self.column(name).isin(list(values)).to_numpy()
+
+    def rows(self, positions=None, columns=None):
+        """DataFrame of the rows at `positions` (all rows when None), indexed by position"""
+        if positions is None:
+            positions = np.arange(len(self))
+        if self._frame is None:
+            return self.compiled.rows(positions, columns)
+        frame = self._frame.iloc[np.asarray(positions, dtype=np.int64)]
+        return frame if columns is None else frame[[c for c in columns if c in frame.columns]]
+
+    def derived(self, name, builder):
+        """Return a structure built from this snapshot, building it once per version"""
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = builder(self)
+                    self._derived[name] = value
+        return value
+
+
+class VocabularyStore:
+    """Loads the vocabulary once and reloads it only when the file changes"""
+
+    def __init__(self, path=VOCAB_FILE):
+        self.path = Path(path)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        # Without the CSV, a compiled artifact alone is versioned by its manifest
+        for path in (self.path, compiled_path(self.path) / "manifest.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            return (stat.st_mtime_ns, stat.st_size)
+        return None
+
+    def snapshot(self):
+        """Return the current snapshot, reloading if the file changed on disk"""
+        version = self._file_version()
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is None or current.version != version:
+                compiled = open_compiled(self.path) if version is not None else None
+                if compiled is not None:
+                    frame = None  # served from the mapped columns
+                elif version is None or not self.path.exists():
+                    frame = _sample_vocabulary()
+                else:
+                    frame = pd.read_csv(self.path)
+                current = VocabularySnapshot(frame, version, compiled)
+                self._snapshot = current
+        return current
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vocabulary_store(path=VOCAB_FILE):
+    """Return the process-wide store for a vocabulary file"""
+    key = str(Path(path).resolve())
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, VocabularyStore(path))
+    return store
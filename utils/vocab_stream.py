@@ -0,0 +1,241 @@
+﻿"""
+Streaming, memory-bounded glossary merge
+
+Sources are read as record iterators (chunked CSV, NDJSON lines, JSON
+arrays decoded incrementally, via ijson when installed) and merged in
+three passes whose memory use depends on the configured limit rather than
+the corpus size:
+
+1. hash-partition: each record is appended to a spill file chosen by a
+   hash of its normalized term, through buffers flushed at half the limit
+   (one spill file open at a time, however many partitions there are)
+2. per partition: fold duplicates together in memory (a partition still
+   over the limit is partitioned again with another hash salt)
+3. k-way merge of the per-partition results by first-seen position, so
+   the output keeps the order of the sources like the in-memory merge
+   (in passes of at most MAX_OPEN_FILES results)
+
+Output is written as NDJSON, one entry per line, as it is produced.
+"""
+
+import heapq
+import json
+import math
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # optional: faster incremental JSON parsing
+    ijson = None
+
+CSV_CHUNK_ROWS = 10_000
+# In-memory size of a grouped partition relative to its spill file
+EXPANSION = 8
+# Spill size relative to the source files (unified entries plus ordinal and key)
+SPILL_GROWTH = 3
+MAX_DEPTH = 4
+# Files a k-way merge pass reads at once, well under the usual 1024 descriptor limit
+MAX_OPEN_FILES = 64
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text):
+    """'256M' -> bytes (K/M/G suffixes, optional trailing B)"""
+    text = str(text).strip().upper().rstrip('B')
+    unit = text[-1] if text and text[-1] in _UNITS else ''
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+
+
+def _iter_json_array(f, chunk_size=1 << 16):
+    """Items of a top-level JSON array, decoded without reading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    while True:
+        # Skip separators up to the next value
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,\ufeff":
+                pos += 1
+            if not started and pos < len(buffer):
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started, pos = True, pos + 1
+                continue
+            break
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            more = f.read(chunk_size)
+            if not more:
+                if buffer[pos:].strip():
+                    raise
+                return
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield item
+        pos = end
+
+
+def iter_records(path, chunk_rows=CSV_CHUNK_ROWS):
+    """Raw records of a CSV, NDJSON or JSON-array file, one at a time"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+            yield from chunk.to_dict("records")
+    elif path.suffix == ".ndjson":
+        with open(path, encoding="utf-8-sig") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        if ijson is not None:
+            with open(path, "rb") as f:
+                yield from ijson.items(f, "item")
+        else:
+            with open(path, encoding="utf-8-sig") as f:
+                yield from _iter_json_array(f)
+
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def write_ndjson(records, path):
+    """Write records incrementally (atomic rename); returns the record count"""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def _partition_of(key, salt, partitions):
+    return zlib.crc32(f"{salt}\x1f{key}".encode("utf-8")) % partitions
+
+
+def _flush(paths, buffers):
+    """Append the buffered lines to their spill files, one file open at a time"""
+    for path, buffer in zip(paths, buffers):
+        if buffer:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(buffer) + "\n")
+            buffer.clear()
+
+
+def _spill(rows, directory, partitions, memory_limit, salt):
+    """Hash-partition rows ([ordinal, key, authoritative, entry]) into spill files"""
+    paths = [directory / f"part-{salt}-{i}.ndjson" for i in range(partitions)]
+    for path in paths:
+        path.touch()
+    buffers = [[] for _ in range(partitions)]
+    buffered = 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False)
+        part = _partition_of(row[1], salt, partitions)
+        buffers[part].append(line)
+        buffered += len(line)
+        if buffered >= memory_limit // 2:
+            _flush(paths, buffers)
+            buffered = 0
+    _flush(paths, buffers)
+    return paths
+
+
+def _merge_partition(path, merge, directory, memory_limit, depth, stats, results):
+    """Merge one spill file into a result file sorted by first ordinal"""
+    size = path.stat().st_size
+    if size * EXPANSION > memory_limit and depth < MAX_DEPTH:
+        # Skewed partition: split it again with a different salt
+        partitions = max(2, math.ceil(size * EXPANSION / memory_limit))
+        stats['repartitioned'] += 1
+        parts = _spill(read_ndjson(path), directory, partitions, memory_limit, salt=f"{depth + 1}.{path.stem}")
+        path.unlink()
+        for part in parts:
+            # A part that did not shrink holds a single hot key; splitting again won't help
+            stuck = part.stat().st_size >= size
+            _merge_partition(part, merge, directory, memory_limit, MAX_DEPTH if stuck else depth + 1, stats, results)
+        return
+
+    # Duplicates are folded as they arrive, so a hot key costs one entry
+    groups = {}
+    for ordinal, key, authoritative, entry in read_ndjson(path):
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [ordinal, merge([(entry, authoritative)]), authoritative]
+        else:
+            group[1] = merge([(group[1], group[2]), (entry, authoritative)])
+    path.unlink()
+    stats['max_partition_bytes'] = max(stats['max_partition_bytes'], size)
+
+    merged = sorted(((first, entry) for first, entry, _ in groups.values()), key=lambda item: item[0])
+    result = path.with_name(f"merged-{path.name}")
+    write_ndjson(merged, result)
+    results.append(result)
+
+
+def _merge_results(results, directory):
+    """Merge result files (sorted by first ordinal) until MAX_OPEN_FILES or fewer remain"""
+    generation = 0
+    while len(results) > MAX_OPEN_FILES:
+        merged = []
+        for start in range(0, len(results), MAX_OPEN_FILES):
+            batch = results[start:start + MAX_OPEN_FILES]
+            path = directory / f"run-{generation}-{start // MAX_OPEN_FILES}.ndjson"
+            write_ndjson(heapq.merge(*(read_ndjson(r) for r in batch), key=lambda item: item[0]), path)
+            for r in batch:
+                r.unlink()
+            merged.append(path)
+        results = merged
+        generation += 1
+    return results
+
+
+def merge_stream(sources, key, merge, memory_limit, expected_bytes=None, workdir=None, stats=None):
+    """Yield merged entries in first-seen order with memory bounded by `memory_limit`
+
+    sources: iterable of (records, authoritative), in priority order.
+    key(entry) groups duplicates; merge([(entry, authoritative), ...]) combines
+    them and must fold: merging a merged entry with the next one gives the
+    same result as merging the whole group at once.
+    expected_bytes (e.g. total input file size) sizes the partition count.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(records=0, partitions=0, repartitioned=0, max_partition_bytes=0)
+
+    def rows():
+        ordinal = 0
+        for records, authoritative in sources:
+            for entry in records:
+                yield [ordinal, key(entry), authoritative, entry]
+                ordinal += 1
+        stats['records'] = ordinal
+
+    partitions = max(1, math.ceil((expected_bytes or memory_limit) * SPILL_GROWTH * EXPANSION / memory_limit))
+    stats['partitions'] = partitions
+
+    with tempfile.TemporaryDirectory(prefix="vocab-merge-", dir=workdir) as tmp:
+        tmp = Path(tmp)
+        parts = _spill(rows(), tmp, partitions, memory_limit, salt=0)
+
+        # Each partition's merged result goes back to disk sorted by first
+        # ordinal, then all of them are k-way merged into source order
+        results = []
+        for part in parts:
+            _merge_partition(part, merge, tmp, memory_limit, 0, stats, results)
+
+        results = _merge_results(results, tmp)
+        for _, entry in heapq.merge(*(read_ndjson(r) for r in results), key=lambda item: item[0]):
+            yield entry